@@ -1,7 +1,87 @@
 """
     pyCC.py\n
     Modified by DrkWithT (Derek Tan)\n
-    The pending rewrite will use Python command line arg parsing / processing...
+    Command line driver: parses args, then runs the front end on a C source or loads IR text made by an earlier run.\n
+    TODO add -S once the ASM generator exists.
 """
 
-# TODO
+import argparse
+import os
+import sys
+
+if __package__ in (None, ''):
+    # NOTE run as a script, this file's folder is first on the path and its name would shadow the pyCC package.
+    sys.path[0] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import pyCC.pyCmp.ir_text as ir_text
+import pyCC.pyCmp.ir_types as ir_types
+import pyCC.pyCmp.pyCmp as driver
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(prog='pyCC', description='A basic C compiler for a small C99 subset.')
+    arg_parser.add_argument('input', help='C source, or IR text with -from-ir')
+    arg_parser.add_argument('-emit-ir', dest='emit_ir', action='store_true', help='write the IR as text and stop')
+    arg_parser.add_argument('-from-ir', dest='from_ir', action='store_true', help='read IR text made by -emit-ir instead of a C source')
+    arg_parser.add_argument('-o', dest='output', default=None, help='output path, where - means stdout (default: input with an .ir suffix)')
+
+    return arg_parser
+
+def report_errors(result: driver.CompileResult, source_path: str):
+    parse_errors, sem_errors, _, _ = result
+
+    for (line, column), lexeme, message in parse_errors:
+        print(f'{source_path}:{line}:{column}: syntax error at \'{lexeme}\': {message}', file=sys.stderr)
+
+    for symbol, scope_name, message in sem_errors:
+        print(f'{source_path}: semantic error on {symbol} in {scope_name}: {message}', file=sys.stderr)
+
+def load_steps(args: argparse.Namespace) -> ir_types.StepList | None:
+    """
+        Gives the IR of the input, or None after reporting why there is none.
+    """
+    try:
+        with open(args.input) as input_file:
+            if args.from_ir:
+                return list(ir_text.read_ir(input_file))
+
+            source = input_file.read()
+    except (OSError, ValueError) as error:
+        print(f'pyCC: {error}', file=sys.stderr)
+        return None
+
+    result = driver.compile_whole(source)
+    report_errors(result, args.input)
+
+    if len(result[0]) != 0 or len(result[1]) != 0:
+        return None
+
+    return result[3]
+
+def main(argv: list[str] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    steps = load_steps(args)
+
+    if steps is None:
+        return 1
+
+    if not args.emit_ir:
+        # NOTE there is no backend yet, so a run without -emit-ir only checks its input.
+        return 0
+
+    output_path = args.output or os.path.splitext(args.input)[0] + '.ir'
+
+    if output_path == '-':
+        ir_text.write_ir(steps, sys.stdout)
+        return 0
+
+    try:
+        with open(output_path, 'w') as output_file:
+            ir_text.write_ir(steps, output_file)
+    except OSError as error:
+        print(f'pyCC: {error}', file=sys.stderr)
+        return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,7 +5,7 @@
 """
 
 from enum import Enum, auto
-from pyCC.pyCmp.lexer import TokenObj
+from pyCC.pyCmp.lexer import LiteralToken, TokenType
 import pyCC.pyCmp.ast_visitor as pycc_ast_visitor
 
 ## Enums, Types ##
@@ -41,7 +41,11 @@ class OpType(Enum):
     OP_ASSIGN = auto()
     OP_NONE = auto()
 
-ParamList = list[tuple[DataType, str]]
+# NOTE each param is its type, spelling, and interned symbol id.
+ParamList = list[tuple[DataType, str, int]]
+
+# NOTE represents a resolved name as (scope depth, slot index, semantics.SymbolNote)... one tuple is shared by all uses of a declaration, see semantics.Resolver.
+Binding = tuple[int, int, "any"]
 
 ## Constants ##
 
@@ -65,9 +69,28 @@ OP_ARITY_TABLE = {
 ## Base Classes ##
 
 class Expr:
+    __slots__ = ('early_type', 'resolved_type')
+
+    def __init__(self):
+        # NOTE type caches: the early type is filled once by annotate_early_types, and the resolved type by the semantic checker.
+        self.early_type: DataType | None = None
+        self.resolved_type: DataType | None = None
+
     def deduce_early_type(self) -> DataType:
         pass
 
+    def get_resolved_type(self) -> DataType | None:
+        return self.resolved_type
+
+    def set_resolved_type(self, data_type: DataType):
+        self.resolved_type = data_type
+
+    def get_binding(self) -> Binding | None:
+        """
+            NOTE only names and calls are ever bound.
+        """
+        return None
+
     def get_op_arity(self) -> OpArity:
         pass
 
@@ -78,6 +101,8 @@ class Expr:
         pass
 
 class Stmt:
+    __slots__ = ()
+
     def is_expr_stmt(self) -> bool:
         pass
 
@@ -94,33 +119,70 @@ class Stmt:
 
 class Literal(Expr):
     ArrayType = list[Expr]
-    LiteralData = tuple[TokenObj, ArrayType | None];
+    LiteralData = tuple[LiteralToken | None, ArrayType | None];
+
+    # NOTE the token is kept unpacked into slots, so a literal holds no nested tuple.
+    __slots__ = ('token_kind', 'value', 'name', 'array', 'binding')
 
     def __init__(self, data: LiteralData, data_type: DataType):
         super().__init__()
 
         data_0, data_1 = data;
 
-        self.data = data
-
         if data_0 is not None:
-            self.arr_flag = False
-            self.data_type = data_type
-        elif data_1 is not None:
-            self.arr_flag = True
-            self.data_type = data_type
+            self.token_kind, self.value, self.name = data_0
+        else:
+            self.token_kind = None
+            self.value = 0
+            self.name = None
+
+        self.array = data_1
+        self.binding: Binding | None = None
+
+        if data_0 is not None or data_1 is not None:
+            self.early_type = data_type
         else:
-            self.arr_flag = False
-            self.data_type = DataType.UNKNOWN
+            self.early_type = DataType.UNKNOWN
 
     def is_array(self) -> bool:
-        return self.arr_flag
+        return self.token_kind is None and self.array is not None
 
     def get_data(self) -> LiteralData:
-        return self.data
+        """
+            NOTE rebuilds the (token, array) pair... prefer the per-field getters.
+        """
+        token = (self.token_kind, self.value, self.name) if self.token_kind is not None else None
+        return (token, self.array)
+
+    def get_token_kind(self) -> TokenType | None:
+        return self.token_kind
+
+    def get_value(self) -> int:
+        """
+            NOTE gives the pre-decoded value of an int or char literal token.
+        """
+        return self.value
+
+    def get_name(self) -> str | None:
+        """
+            NOTE gives the spelling of an identifier literal, else None.
+        """
+        return self.name
+
+    def get_symbol(self) -> int:
+        """
+            NOTE gives the interned id of an identifier literal, else 0.
+        """
+        return self.value if self.token_kind == TokenType.IDENTIFIER else 0
+
+    def get_binding(self) -> Binding | None:
+        return self.binding
+
+    def set_binding(self, binding: Binding):
+        self.binding = binding
 
     def deduce_early_type(self) -> DataType:
-        return self.data_type
+        return self.early_type
 
     def get_op_arity(self) -> OpArity:
         return OpArity.NOTHING
@@ -132,6 +194,8 @@ class Literal(Expr):
         return visitor.visit_literal(self)
 
 class Unary(Expr):
+    __slots__ = ('inner', 'op')
+
     def __init__(self, inner: Expr, op: OpType):
         super().__init__()
         self.inner = inner
@@ -141,7 +205,10 @@ class Unary(Expr):
         return self.inner
 
     def deduce_early_type(self) -> DataType:
-        return self.inner.deduce_early_type()
+        if self.early_type is None:
+            annotate_early_types(self)
+
+        return self.early_type
 
     def get_op_arity(self) -> OpArity:
         return OpArity.UNARY
@@ -153,6 +220,8 @@ class Unary(Expr):
         return visitor.visit_unary(self)
 
 class Binary(Expr):
+    __slots__ = ('lhs', 'rhs', 'op')
+
     def __init__(self, lhs: Expr, rhs: Expr, op: OpType):
         super().__init__()
         self.lhs = lhs
@@ -166,10 +235,10 @@ class Binary(Expr):
         return self.rhs
 
     def deduce_early_type(self) -> DataType:
-        if self.lhs.deduce_early_type() == self.rhs.deduce_early_type():
-            return self.lhs.deduce_early_type()
+        if self.early_type is None:
+            annotate_early_types(self)
 
-        return DataType.UNKNOWN
+        return self.early_type
 
     def get_op_arity(self) -> OpArity:
         return OpArity.BINARY
@@ -183,23 +252,37 @@ class Binary(Expr):
 class Call(Expr):
     ArgList = list[Expr]
 
-    def __init__(self, name: str, args: ArgList):
+    __slots__ = ('name', 'symbol', 'args', 'binding')
+
+    def __init__(self, name: str, args: ArgList, symbol: int = 0):
         super().__init__()
         self.name = name
+        self.symbol = symbol
         self.args = args
+        self.binding: Binding | None = None
+        self.early_type = DataType.UNKNOWN
 
     def get_name(self) -> str:
         return self.name
 
+    def get_symbol(self) -> int:
+        return self.symbol
+
     def get_args(self) -> ArgList:
         return self.args
 
+    def get_binding(self) -> Binding | None:
+        return self.binding
+
+    def set_binding(self, binding: Binding):
+        self.binding = binding
+
     def deduce_early_type(self) -> DataType:
         """
             NOTE Requires external symbol lookup instead to deduce the result type.\n
             EXAMPLE: `int foo(int a, int b);` gives `int`.
         """
-        return DataType.UNKNOWN
+        return self.early_type
 
     def get_op_arity(self) -> OpArity:
         return OpArity.NOTHING
@@ -210,25 +293,72 @@ class Call(Expr):
     def accept_visitor(self, visitor: TreeVisitor) -> "any":
         return visitor.visit_call(self)
 
+def annotate_early_types(root: Expr):
+    """
+        Stores the early type of every untyped node under `root` in one bottom-up pass on an explicit stack: a unary takes its operand's type, and a binary takes its operands' type if they agree, else `UNKNOWN`.\n
+        NOTE typed subtrees are never revisited, so each node is typed exactly once.
+    """
+    pending: list[Expr] = [root]
+
+    while len(pending) != 0:
+        node = pending[-1]
+
+        if node.early_type is not None:
+            pending.pop()
+        elif type(node) is Binary:
+            lhs_type = node.lhs.early_type
+            rhs_type = node.rhs.early_type
+
+            if lhs_type is None or rhs_type is None:
+                if lhs_type is None:
+                    pending.append(node.lhs)
+
+                if rhs_type is None:
+                    pending.append(node.rhs)
+            else:
+                node.early_type = lhs_type if lhs_type == rhs_type else DataType.UNKNOWN
+                pending.pop()
+        else:
+            inner_type = node.inner.early_type
+
+            if inner_type is None:
+                pending.append(node.inner)
+            else:
+                node.early_type = inner_type
+                pending.pop()
+
 ## Statements ##
 
 class Variable(Stmt):
     # TODO add type qualifier support??
-    def __init__(self, name: str, var_type: DataType, rhs: Expr):
+    __slots__ = ('name', 'symbol', 'var_type', 'rhs', 'binding')
+
+    def __init__(self, name: str, var_type: DataType, rhs: Expr, symbol: int = 0):
         super().__init__()
         self.name = name
+        self.symbol = symbol
         self.var_type = var_type
         self.rhs = rhs
+        self.binding: Binding | None = None
 
     def get_name(self) -> str:
         return self.name
 
+    def get_symbol(self) -> int:
+        return self.symbol
+
     def get_type(self) -> DataType:
         return self.var_type
 
     def get_rhs(self) -> Expr:
         return self.rhs
 
+    def get_binding(self) -> Binding | None:
+        return self.binding
+
+    def set_binding(self, binding: Binding):
+        self.binding = binding
+
     def is_expr_stmt(self) -> bool:
         return False
 
@@ -245,6 +375,8 @@ class Block(Stmt):
     """
         NOTE This only represents a block of executable statements.
     """
+    __slots__ = ('stmts',)
+
     def __init__(self, stmts: list[Stmt]):
         super().__init__()
         self.stmts = stmts
@@ -265,16 +397,23 @@ class Block(Stmt):
         return visitor.visit_block(self)
 
 class FunctionDecl(Stmt):
-    def __init__(self, name: str, result_type: DataType, params: ParamList, body: list[Stmt]):
+    __slots__ = ('name', 'symbol', 'result_type', 'params', 'body', 'binding')
+
+    def __init__(self, name: str, result_type: DataType, params: ParamList, body: list[Stmt], symbol: int = 0):
         super().__init__()
         self.name = name
+        self.symbol = symbol
         self.result_type = result_type
         self.params = params
         self.body = body
+        self.binding: Binding | None = None
 
     def get_name(self) -> str:
         return self.name
 
+    def get_symbol(self) -> int:
+        return self.symbol
+
     def get_type(self) -> DataType:
         return self.result_type
 
@@ -284,6 +423,12 @@ class FunctionDecl(Stmt):
     def get_arity(self) -> int:
         return len(self.params)
 
+    def get_binding(self) -> Binding | None:
+        return self.binding
+
+    def set_binding(self, binding: Binding):
+        self.binding = binding
+
     def get_body(self) -> Stmt:
         return self.body
 
@@ -300,6 +445,8 @@ class FunctionDecl(Stmt):
         return visitor.visit_function_decl(self)
 
 class ExprStmt(Stmt):
+    __slots__ = ('inner', 'outer_op')
+
     def __init__(self, inner: Expr, op: OpType):
         super().__init__()
         self.inner = inner
@@ -328,6 +475,8 @@ class ExprStmt(Stmt):
         return visitor.visit_expr_stmt(self)
 
 class If(Stmt):
+    __slots__ = ('conditional', 'body', 'other_body')
+
     def __init__(self, conditional: Expr, body: Stmt, other_body: Stmt | None):
         super().__init__()
         self.conditional = conditional
@@ -356,6 +505,8 @@ class If(Stmt):
         return visitor.visit_if(self)
 
 class Return(Stmt):
+    __slots__ = ('result',)
+
     def __init__(self, result: Expr):
         super().__init__()
         self.result = result
@@ -374,3 +525,136 @@ class Return(Stmt):
 
     def accept_visitor(self, visitor: TreeVisitor) -> "any":
         return visitor.visit_return(self)
+
+## Node Factories ##
+
+class NodeFactory:
+    """
+        Builds the expression nodes of a parse, one fresh node per call.
+    """
+    def reset(self):
+        pass
+
+    def get_shared_count(self) -> int:
+        return 0
+
+    def open_scope(self):
+        pass
+
+    def close_scope(self):
+        pass
+
+    def drop_interned(self):
+        pass
+
+    def declare(self, symbol: int):
+        """
+            NOTE called by the parser right where a name's declaration takes effect.
+        """
+        pass
+
+    def literal(self, token: LiteralToken, data_type: DataType) -> Literal:
+        return Literal((token, None), data_type)
+
+    def unary(self, inner: Expr, op: OpType) -> Unary:
+        return Unary(inner, op)
+
+    def binary(self, lhs: Expr, rhs: Expr, op: OpType) -> Binary:
+        return Binary(lhs, rhs, op)
+
+    def call(self, name: str, args: Call.ArgList, symbol: int = 0) -> Call:
+        return Call(name, args, symbol)
+
+class HashConsFactory(NodeFactory):
+    """
+        Interns structurally identical expression nodes, so a repeated subexpression becomes one shared node and the expression forest a DAG.\n
+        NOTE children are always interned before their parent, so a parent's key can hold its children's identities. Shared nodes must be treated as immutable.\n
+        NOTE a name is also keyed by the generation of its symbol, which moves on at each declaration and scope exit, so only uses bound to the same declaration share a node and binding.
+    """
+    def __init__(self):
+        self.interned: dict[tuple, Expr] = {}
+        self.shared_count = 0
+        self.generations: dict[int, int] = {}
+        self.generation_count = 0
+        self.scope_symbols: list[list[int]] = []
+
+    def reset(self):
+        self.interned = {}
+        self.shared_count = 0
+        self.generations = {}
+        self.generation_count = 0
+        self.scope_symbols = []
+
+    def open_scope(self):
+        self.scope_symbols.append([])
+
+    def drop_interned(self):
+        """
+            NOTE lets finished declarations be freed, e.g between top-level declarations of a streamed parse... symbol generations are kept, so later names still key correctly.
+        """
+        self.interned = {}
+
+    def close_scope(self):
+        # NOTE names of this scope must not share nodes with later uses out of it.
+        for symbol in self.scope_symbols.pop():
+            self.declare(symbol)
+
+    def declare(self, symbol: int):
+        self.generation_count += 1
+        self.generations[symbol] = self.generation_count
+
+        if len(self.scope_symbols) != 0:
+            self.scope_symbols[-1].append(symbol)
+
+    def get_shared_count(self) -> int:
+        """
+            NOTE counts node requests answered by an already interned node.
+        """
+        return self.shared_count
+
+    def get_unique_count(self) -> int:
+        return len(self.interned)
+
+    def literal(self, token: LiteralToken, data_type: DataType) -> Literal:
+        key = (token, data_type, self.generations.get(token[1], 0) if token[0] == TokenType.IDENTIFIER else 0)
+        node = self.interned.get(key)
+
+        if node is None:
+            node = self.interned[key] = Literal((token, None), data_type)
+        else:
+            self.shared_count += 1
+
+        return node
+
+    def unary(self, inner: Expr, op: OpType) -> Unary:
+        key = (OpArity.UNARY, id(inner), op)
+        node = self.interned.get(key)
+
+        if node is None:
+            node = self.interned[key] = Unary(inner, op)
+        else:
+            self.shared_count += 1
+
+        return node
+
+    def binary(self, lhs: Expr, rhs: Expr, op: OpType) -> Binary:
+        key = (OpArity.BINARY, id(lhs), id(rhs), op)
+        node = self.interned.get(key)
+
+        if node is None:
+            node = self.interned[key] = Binary(lhs, rhs, op)
+        else:
+            self.shared_count += 1
+
+        return node
+
+    def call(self, name: str, args: Call.ArgList, symbol: int = 0) -> Call:
+        key = (OpType.OP_CALL, symbol or name, tuple(id(arg) for arg in args))
+        node = self.interned.get(key)
+
+        if node is None:
+            node = self.interned[key] = Call(name, args, symbol)
+        else:
+            self.shared_count += 1
+
+        return node
@@ -3,7 +3,40 @@
     TODO implement base class to deal with various AST types...
 """
 
+from types import GeneratorType
+
 class ASTVisitor:
+    """
+        Base of AST passes. A `visit_*` method may return its result directly, or be a generator that yields child nodes and receives each child's result back, e.g `lhs_info = yield node.get_lhs()`.\n
+        NOTE generator visits must be driven by `visit_tree`, which keeps them on an explicit stack instead of the interpreter's.
+    """
+    def visit_tree(self, node) -> "any":
+        result = node.accept_visitor(self)
+
+        if type(result) is not GeneratorType:
+            return result
+
+        pending = [result]
+        child_result = None
+
+        while len(pending) != 0:
+            try:
+                child = pending[-1].send(child_result)
+            except StopIteration as done:
+                pending.pop()
+                child_result = done.value
+                continue
+
+            result = child.accept_visitor(self)
+
+            if type(result) is GeneratorType:
+                pending.append(result)
+                child_result = None
+            else:
+                child_result = result
+
+        return child_result
+
     def visit_literal(self, node) -> "any":
         pass
 
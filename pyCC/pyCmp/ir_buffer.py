@@ -0,0 +1,248 @@
+"""
+    ir_buffer.py\n
+    Added by DrkWithT\n
+    Defines compact struct-of-arrays storage of IR steps and its binary file format.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+import pyCC.pyCmp.ir_types as ir_types
+import pyCC.pyCmp.ir_gen as irgen
+
+## Aliases and Constants ##
+
+# NOTE marks an unused register / name column of a step.
+NO_SLOT = -1
+
+# NOTE represents an IR file header: magic, step count, names byte length, and padding so the columns after it stay 8-byte aligned.
+IR_FILE_HEADER = struct.Struct('<8sQQQ')
+IR_FILE_MAGIC = b'PYCCIR' + (b'1L' if sys.byteorder == 'little' else b'1B')
+
+# NOTE represents one step's columns: type, op, dest, arg0, arg1, and immediate.
+StepRow = tuple[ir_types.IRType, ir_types.IROp | None, int, int, int, int]
+
+IR_TYPES_BY_CODE: list[ir_types.IRType | None] = [None] + list(ir_types.IRType)
+IR_OPS_BY_CODE: list[ir_types.IROp | None] = [None] + list(ir_types.IROp)
+
+## IR Storage ##
+
+class IRBuffer:
+    """
+        A struct-of-arrays IR stream: parallel columns of step type, op, dest register, 2 argument registers, and immediate per step. Function labels and callees are ids into the `names` side table.\n
+        Columns per step type, where unused slots hold NO_SLOT or 0:\n
+        * LABEL: imm = jump label, or arg0 = name id of a function label.
+        * JUMP: imm = target label.
+        * JUMP_IF: op, arg0, arg1, imm = target label.
+        * ARGV_PUSH: arg0.
+        * FUNC_CALL: arg0 = name id of the callee, dest if the result is kept.
+        * ADDR_ASSIGN: dest, op, arg0, and arg1 for binary ops.
+        * LOAD_CONSTANT: dest, imm = value.
+        NOTE steps are only materialized as `ir_gen` objects when a caller asks for one, see get_step.
+    """
+    def __init__(self):
+        self.types = array('B')
+        self.ops = array('B')
+        self.dests = array('i')
+        self.arg0s = array('i')
+        self.arg1s = array('i')
+        self.imms = array('q')
+        self.names: list[str] = []
+        self.name_ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def intern_name(self, name: str) -> int:
+        name_id = self.name_ids.get(name)
+
+        if name_id is None:
+            name_id = len(self.names)
+            self.name_ids[name] = name_id
+            self.names.append(name)
+
+        return name_id
+
+    def push(self, ir_type: ir_types.IRType, op: ir_types.IROp | None = None, dest: int = NO_SLOT, arg0: int = NO_SLOT, arg1: int = NO_SLOT, imm: int = 0):
+        self.types.append(ir_type.value)
+        self.ops.append(0 if op is None else op.value)
+        self.dests.append(dest)
+        self.arg0s.append(arg0)
+        self.arg1s.append(arg1)
+        self.imms.append(imm)
+
+    def encode_step(self, step: ir_types.IRStep) -> StepRow:
+        step_type = step.get_ir_type()
+
+        if step_type == ir_types.IRType.LABEL:
+            if type(step.title) is str:
+                return (step_type, None, NO_SLOT, self.intern_name(step.title), NO_SLOT, 0)
+
+            return (step_type, None, NO_SLOT, NO_SLOT, NO_SLOT, step.title)
+        elif step_type == ir_types.IRType.RETURN:
+            return (step_type, None, NO_SLOT, NO_SLOT, NO_SLOT, 0)
+        elif step_type == ir_types.IRType.JUMP:
+            return (step_type, None, NO_SLOT, NO_SLOT, NO_SLOT, step.target)
+        elif step_type == ir_types.IRType.JUMP_IF:
+            return (step_type, step.op, NO_SLOT, step.arg0, step.arg1, step.target)
+        elif step_type == ir_types.IRType.ARGV_PUSH:
+            return (step_type, None, NO_SLOT, step.arg, NO_SLOT, 0)
+        elif step_type == ir_types.IRType.FUNC_CALL:
+            return (step_type, None, NO_SLOT if step.dest is None else step.dest, self.intern_name(step.callee), NO_SLOT, 0)
+        elif step_type == ir_types.IRType.ADDR_ASSIGN:
+            operands = step.operands
+            return (step_type, step.op, step.dest, operands[0], operands[1] if len(operands) > 1 else NO_SLOT, 0)
+        elif step_type == ir_types.IRType.LOAD_CONSTANT:
+            return (step_type, None, step.addr, NO_SLOT, NO_SLOT, step.value)
+
+        raise ValueError(f'Cannot store IR step of type {step_type}!')
+
+    def push_step(self, step: ir_types.IRStep):
+        self.push(*self.encode_step(step))
+
+    def set_step(self, step_i: int, step: ir_types.IRStep):
+        """
+            Overwrites the step at `step_i` in place, e.g when a pass rewrites one instruction.
+        """
+        step_type, op, dest, arg0, arg1, imm = self.encode_step(step)
+        self.types[step_i] = step_type.value
+        self.ops[step_i] = 0 if op is None else op.value
+        self.dests[step_i] = dest
+        self.arg0s[step_i] = arg0
+        self.arg1s[step_i] = arg1
+        self.imms[step_i] = imm
+
+    def extend(self, steps: ir_types.StepList):
+        for step in steps:
+            self.push_step(step)
+
+    def get_ir_type(self, step_i: int) -> ir_types.IRType:
+        return IR_TYPES_BY_CODE[self.types[step_i]]
+
+    def get_op(self, step_i: int) -> ir_types.IROp | None:
+        return IR_OPS_BY_CODE[self.ops[step_i]]
+
+    def get_name(self, step_i: int) -> str:
+        return self.names[self.arg0s[step_i]]
+
+    def get_step(self, step_i: int) -> ir_types.IRStep:
+        step_type = self.get_ir_type(step_i)
+        dest = self.dests[step_i]
+        arg0 = self.arg0s[step_i]
+        arg1 = self.arg1s[step_i]
+        imm = self.imms[step_i]
+
+        if step_type == ir_types.IRType.LABEL:
+            return irgen.IRLabel(self.names[arg0] if arg0 != NO_SLOT else imm)
+        elif step_type == ir_types.IRType.RETURN:
+            return irgen.IRReturn()
+        elif step_type == ir_types.IRType.JUMP:
+            return irgen.IRJump(imm)
+        elif step_type == ir_types.IRType.JUMP_IF:
+            return irgen.IRJumpIf(imm, self.get_op(step_i), arg0, arg1)
+        elif step_type == ir_types.IRType.ARGV_PUSH:
+            return irgen.IRPushArg(arg0)
+        elif step_type == ir_types.IRType.FUNC_CALL:
+            return irgen.IRCallFunc(self.names[arg0], dest if dest != NO_SLOT else None)
+        elif step_type == ir_types.IRType.ADDR_ASSIGN:
+            return irgen.IRAssign(dest, self.get_op(step_i), [arg0] if arg1 == NO_SLOT else [arg0, arg1])
+
+        return irgen.IRLoadConst(dest, imm)
+
+    def get_steps(self) -> ir_types.StepList:
+        return [self.get_step(step_i) for step_i in range(len(self))]
+
+    def find_labels(self) -> dict[ir_types.JumpLabel | str, int]:
+        """
+            Maps each label to the index of its step, jump labels by number and function labels by name.
+        """
+        label_code = ir_types.IRType.LABEL.value
+        labels = {}
+
+        for step_i, type_code in enumerate(self.types):
+            if type_code == label_code:
+                arg0 = self.arg0s[step_i]
+                labels[self.names[arg0] if arg0 != NO_SLOT else self.imms[step_i]] = step_i
+
+        return labels
+
+    def shift_jump_labels(self, offset: int):
+        """
+            Renumbers jump labels and targets by `offset` in place, like `ir_gen.shift_jump_labels` does for step objects.
+        """
+        if offset == 0:
+            return
+
+        label_code = ir_types.IRType.LABEL.value
+        jump_codes = (ir_types.IRType.JUMP.value, ir_types.IRType.JUMP_IF.value)
+        imms = self.imms
+
+        for step_i, type_code in enumerate(self.types):
+            if type_code in jump_codes or (type_code == label_code and self.arg0s[step_i] == NO_SLOT):
+                imms[step_i] += offset
+
+    def get_byte_size(self) -> int:
+        column_bytes = sum(column.itemsize * len(column) for column in (self.types, self.ops, self.dests, self.arg0s, self.arg1s, self.imms))
+        return column_bytes + len(encode_names(self.names))
+
+    def get_bytes_per_step(self) -> float:
+        return self.get_byte_size() / len(self) if len(self) != 0 else 0.0
+
+## Serialization ##
+
+def encode_names(names: list[str]) -> bytes:
+    # NOTE names are identifiers, so a NUL never occurs inside one.
+    return '\0'.join(names).encode()
+
+def build_ir_buffer(steps: ir_types.StepList) -> IRBuffer:
+    buffer = IRBuffer()
+    buffer.extend(steps)
+
+    return buffer
+
+def save_ir_buffer(buffer: IRBuffer, path: str):
+    """
+        Writes the header, then each column's raw bytes widest first so every column starts aligned, then the NUL separated names.\n
+        NOTE columns are in native byte order, which the magic records.
+    """
+    names_data = encode_names(buffer.names)
+
+    with open(path, 'wb') as ir_file:
+        ir_file.write(IR_FILE_HEADER.pack(IR_FILE_MAGIC, len(buffer), len(names_data), 0))
+
+        for column in (buffer.imms, buffer.dests, buffer.arg0s, buffer.arg1s, buffer.types, buffer.ops):
+            ir_file.write(column.tobytes())
+
+        ir_file.write(names_data)
+
+def load_ir_buffer(path: str) -> IRBuffer:
+    """
+        Maps an IR file saved by `save_ir_buffer` back as an IRBuffer whose columns view the mapping directly, so no step is decoded until read.\n
+        NOTE the mapping is copy-on-write: steps can be rewritten in place without touching the file, but the columns are fixed-length so nothing can be pushed.
+    """
+    with open(path, 'rb') as ir_file:
+        mapping = mmap.mmap(ir_file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    magic, step_count, names_length, _ = IR_FILE_HEADER.unpack_from(mapping)
+
+    if magic != IR_FILE_MAGIC:
+        raise ValueError(f'{path} is not an IR file of this platform\'s byte order!')
+
+    view = memoryview(mapping)
+    buffer = IRBuffer()
+    offset = IR_FILE_HEADER.size
+    columns = []
+
+    for column in (buffer.imms, buffer.dests, buffer.arg0s, buffer.arg1s, buffer.types, buffer.ops):
+        column_end = offset + column.itemsize * step_count
+        columns.append(view[offset: column_end].cast(column.typecode))
+        offset = column_end
+
+    buffer.imms, buffer.dests, buffer.arg0s, buffer.arg1s, buffer.types, buffer.ops = columns
+
+    if names_length != 0:
+        for name in bytes(view[offset: offset + names_length]).decode().split('\0'):
+            buffer.intern_name(name)
+
+    return buffer
@@ -0,0 +1,408 @@
+"""
+    ir_cfg.py\n
+    Added by DrkWithT\n
+    Defines basic blocks and control flow graphs of IR functions, plus dominator and loop analyses over them.
+"""
+
+import dataclasses
+from typing import Callable
+import pyCC.pyCmp.ir_types as ir_types
+
+## CFG Types ##
+
+@dataclasses.dataclass
+class BasicBlock:
+    """
+        A run of steps entered only at its first and left only after its last. A leading IRLabel stays in `steps`, so flattening the blocks gives back the function's IR.
+    """
+    steps: ir_types.StepList
+    succs: list[int] = dataclasses.field(default_factory=list)
+    preds: list[int] = dataclasses.field(default_factory=list)
+
+    def get_label(self) -> ir_types.JumpLabel | str | None:
+        if len(self.steps) != 0 and self.steps[0].get_ir_type() == ir_types.IRType.LABEL:
+            return self.steps[0].title
+
+        return None
+
+    def get_terminator(self) -> ir_types.IRStep | None:
+        return self.steps[-1] if len(self.steps) != 0 else None
+
+@dataclasses.dataclass
+class LoopForest:
+    """
+        Natural loops of a CFG by header block. `innermost` maps each block to the header of the innermost loop holding it or None, and `parents` maps each header to its enclosing loop's header or None.\n
+        NOTE headers are listed outer loops first.
+    """
+    headers: list[int]
+    parents: dict[int, int | None]
+    innermost: list[int | None]
+
+    def get_depth(self, block_i: int) -> int:
+        depth = 0
+        header = self.innermost[block_i]
+
+        while header is not None:
+            depth += 1
+            header = self.parents[header]
+
+        return depth
+
+# NOTE represents a block's edges as its successor list, compared to tell if an IR change touched control flow.
+EdgeList = list[list[int]]
+
+## Block Splitting ##
+
+BRANCH_TYPES = (ir_types.IRType.JUMP, ir_types.IRType.JUMP_IF, ir_types.IRType.RETURN)
+
+def split_functions(steps: ir_types.StepList) -> list[ir_types.StepList]:
+    """
+        Slices a program's IR into chunks of one function each, from its label through its return, and chunks of global initializers, which come before the first function or between two functions.\n
+        NOTE a function only ends at its own return, so an unlabeled step right after a return starts a global's initializer. Initializers never start with a label.
+    """
+    chunks: list[ir_types.StepList] = []
+    chunk_start = 0
+    after_return = False
+
+    for step_i, step in enumerate(steps):
+        step_type = step.get_ir_type()
+        starts_chunk = (step_type == ir_types.IRType.LABEL and type(step.title) is str) or (after_return and step_type != ir_types.IRType.LABEL)
+
+        if starts_chunk and step_i != chunk_start:
+            chunks.append(steps[chunk_start: step_i])
+            chunk_start = step_i
+
+        after_return = step_type == ir_types.IRType.RETURN
+
+    if chunk_start < len(steps):
+        chunks.append(steps[chunk_start:])
+
+    return chunks
+
+def split_blocks(steps: ir_types.StepList) -> list[BasicBlock]:
+    # NOTE a block starts at a label or right after a branch, in one pass.
+    blocks: list[BasicBlock] = []
+    block_start = 0
+
+    for step_i, step in enumerate(steps):
+        step_type = step.get_ir_type()
+
+        if step_type == ir_types.IRType.LABEL and step_i != block_start:
+            blocks.append(BasicBlock(steps[block_start: step_i]))
+            block_start = step_i
+        elif step_type in BRANCH_TYPES:
+            blocks.append(BasicBlock(steps[block_start: step_i + 1]))
+            block_start = step_i + 1
+
+    if block_start < len(steps):
+        blocks.append(BasicBlock(steps[block_start:]))
+
+    return blocks
+
+## Control Flow Graph ##
+
+class ControlFlowGraph:
+    """
+        Basic blocks of one function's IR with edges from their last steps, where block 0 is the entry. Analyses are computed on demand and cached, see get_analysis.\n
+        NOTE passes may rewrite `blocks[i].steps` in place, but must call `mark_changed` after.
+    """
+    def __init__(self, steps: ir_types.StepList):
+        self.blocks: list[BasicBlock] = split_blocks(steps)
+        self.version = 0
+        # NOTE analyses only depending on edges survive changes that keep them, while all others are dropped on any change.
+        self.edge_analyses: dict[str, "any"] = {}
+        self.step_analyses: dict[str, "any"] = {}
+        self.link_blocks()
+
+    def link_blocks(self) -> EdgeList:
+        label_blocks = {block.get_label(): block_i for block_i, block in enumerate(self.blocks)}
+        label_blocks.pop(None, None)
+
+        for block in self.blocks:
+            block.succs = []
+            block.preds = []
+
+        for block_i, block in enumerate(self.blocks):
+            last_step = block.get_terminator()
+            last_type = last_step.get_ir_type() if last_step is not None else None
+
+            if last_type == ir_types.IRType.JUMP or last_type == ir_types.IRType.JUMP_IF:
+                target_i = label_blocks.get(last_step.target)
+
+                if target_i is None:
+                    raise ValueError(f'Jump to missing label {ir_types.format_label(last_step.target)}!')
+
+                block.succs.append(target_i)
+
+            falls_through = last_type != ir_types.IRType.JUMP and last_type != ir_types.IRType.RETURN
+
+            if falls_through and block_i + 1 < len(self.blocks) and (len(block.succs) == 0 or block.succs[0] != block_i + 1):
+                block.succs.append(block_i + 1)
+
+            for succ_i in block.succs:
+                self.blocks[succ_i].preds.append(block_i)
+
+        return [block.succs for block in self.blocks]
+
+    def mark_changed(self):
+        """
+            Notes that some blocks' steps changed: edges are rebuilt from their last steps, and cached analyses are dropped if they could be stale.
+        """
+        old_edges = [block.succs for block in self.blocks]
+        self.version += 1
+        self.step_analyses.clear()
+
+        if self.link_blocks() != old_edges:
+            self.edge_analyses.clear()
+
+    def get_version(self) -> int:
+        return self.version
+
+    def get_steps(self) -> ir_types.StepList:
+        return [step for block in self.blocks for step in block.steps]
+
+    def get_analysis(self, name: str, compute: Callable[["ControlFlowGraph"], "any"], edges_only: bool = False) -> "any":
+        """
+            Gives the cached result of an analysis by name, computing it first if there is none for this version of the IR.
+        """
+        cache = self.edge_analyses if edges_only else self.step_analyses
+        result = cache.get(name)
+
+        if result is None:
+            result = compute(self)
+            cache[name] = result
+
+        return result
+
+    def get_rpo(self) -> list[int]:
+        return self.get_analysis('rpo', compute_rpo, True)
+
+    def get_idoms(self) -> list[int | None]:
+        return self.get_analysis('idoms', compute_idoms, True)
+
+    def get_dom_tree(self) -> "DomTree":
+        return self.get_analysis('dom_tree', compute_dom_tree, True)
+
+    def get_frontiers(self) -> list[list[int]]:
+        return self.get_analysis('frontiers', compute_frontiers, True)
+
+    def get_loops(self) -> LoopForest:
+        return self.get_analysis('loops', compute_loops, True)
+
+    def is_reachable(self, block_i: int) -> bool:
+        return block_i == 0 or self.get_idoms()[block_i] is not None
+
+    def dominates(self, dominator_i: int, block_i: int) -> bool:
+        children, starts, ends = self.get_dom_tree()
+
+        if starts[dominator_i] < 0 or starts[block_i] < 0:
+            return False
+
+        return starts[dominator_i] <= starts[block_i] and ends[block_i] <= ends[dominator_i]
+
+def build_cfgs(steps: ir_types.StepList) -> list[ControlFlowGraph]:
+    return [ControlFlowGraph(function_steps) for function_steps in split_functions(steps)]
+
+## Dominators ##
+
+# NOTE represents a dominator tree as children per block, then each block's preorder entry and exit numbers, or -1 if unreachable, for O(1) dominance checks.
+DomTree = tuple[list[list[int]], list[int], list[int]]
+
+def compute_rpo(cfg: ControlFlowGraph) -> list[int]:
+    blocks = cfg.blocks
+
+    if len(blocks) == 0:
+        return []
+
+    postorder: list[int] = []
+    visited = [False] * len(blocks)
+    visited[0] = True
+    pending = [(0, 0)]
+
+    while len(pending) != 0:
+        block_i, succ_i = pending[-1]
+        succs = blocks[block_i].succs
+
+        if succ_i < len(succs):
+            pending[-1] = (block_i, succ_i + 1)
+            next_i = succs[succ_i]
+
+            if not visited[next_i]:
+                visited[next_i] = True
+                pending.append((next_i, 0))
+        else:
+            pending.pop()
+            postorder.append(block_i)
+
+    postorder.reverse()
+
+    return postorder
+
+def compute_idoms(cfg: ControlFlowGraph) -> list[int | None]:
+    """
+        Finds each block's immediate dominator by Cooper, Harvey, and Kennedy's iterative algorithm over reverse postorder.\n
+        NOTE the entry is its own immediate dominator, and unreachable blocks have None.
+    """
+    rpo = cfg.get_rpo()
+    blocks = cfg.blocks
+    idoms: list[int | None] = [None] * len(blocks)
+    post_numbers = [-1] * len(blocks)
+
+    for rpo_i, block_i in enumerate(rpo):
+        post_numbers[block_i] = len(rpo) - 1 - rpo_i
+
+    if len(rpo) == 0:
+        return idoms
+
+    idoms[rpo[0]] = rpo[0]
+    changed = True
+
+    while changed:
+        changed = False
+
+        for block_i in rpo[1:]:
+            new_idom = None
+
+            for pred_i in blocks[block_i].preds:
+                if idoms[pred_i] is None:
+                    continue
+
+                if new_idom is None:
+                    new_idom = pred_i
+                    continue
+
+                # NOTE walks both fingers up the tree until they meet, lower postorder numbers being deeper.
+                finger = pred_i
+
+                while finger != new_idom:
+                    while post_numbers[finger] < post_numbers[new_idom]:
+                        finger = idoms[finger]
+
+                    while post_numbers[new_idom] < post_numbers[finger]:
+                        new_idom = idoms[new_idom]
+
+            if idoms[block_i] != new_idom:
+                idoms[block_i] = new_idom
+                changed = True
+
+    return idoms
+
+def compute_dom_tree(cfg: ControlFlowGraph) -> DomTree:
+    idoms = cfg.get_idoms()
+    block_count = len(cfg.blocks)
+    children: list[list[int]] = [[] for _ in range(block_count)]
+    starts = [-1] * block_count
+    ends = [-1] * block_count
+
+    for block_i, idom in enumerate(idoms):
+        if idom is not None and idom != block_i:
+            children[idom].append(block_i)
+
+    if block_count == 0:
+        return (children, starts, ends)
+
+    counter = 0
+    starts[0] = counter
+    pending = [(0, 0)]
+
+    while len(pending) != 0:
+        block_i, child_i = pending[-1]
+
+        if child_i < len(children[block_i]):
+            pending[-1] = (block_i, child_i + 1)
+            counter += 1
+            next_i = children[block_i][child_i]
+            starts[next_i] = counter
+            pending.append((next_i, 0))
+        else:
+            pending.pop()
+            counter += 1
+            ends[block_i] = counter
+
+    return (children, starts, ends)
+
+def compute_frontiers(cfg: ControlFlowGraph) -> list[list[int]]:
+    """
+        Finds each block's dominance frontier by walking up from the preds of every join block to its immediate dominator, as Cooper, Harvey, and Kennedy do.
+    """
+    idoms = cfg.get_idoms()
+    frontiers: list[list[int]] = [[] for _ in cfg.blocks]
+    # NOTE the join block a block's frontier last got, so no block is listed twice.
+    last_joins = [-1] * len(cfg.blocks)
+
+    for block_i, block in enumerate(cfg.blocks):
+        if len(block.preds) < 2 or idoms[block_i] is None:
+            continue
+
+        for pred_i in block.preds:
+            runner = pred_i
+
+            while idoms[runner] is not None and runner != idoms[block_i] and last_joins[runner] != block_i:
+                frontiers[runner].append(block_i)
+                last_joins[runner] = block_i
+
+                if runner == idoms[runner]:
+                    break
+
+                runner = idoms[runner]
+
+    return frontiers
+
+## Loops ##
+
+def compute_loops(cfg: ControlFlowGraph) -> LoopForest:
+    """
+        Builds the loop-nesting forest from back edges, i.e edges to a dominating block. Inner headers come later in reverse postorder, so headers are done backwards and a finished inner loop is collapsed into its header with union-find.\n
+        NOTE only natural loops are found, so a cycle entered at more than one block is not a loop here... C sources of this subset have no goto to make one.
+    """
+    rpo = cfg.get_rpo()
+    blocks = cfg.blocks
+    innermost: list[int | None] = [None] * len(blocks)
+    parents: dict[int, int | None] = {}
+    headers: list[int] = []
+    # NOTE union-find links from a block to the outermost finished loop header holding it.
+    outer_links = list(range(len(blocks)))
+
+    def find_outer(block_i: int) -> int:
+        root = block_i
+
+        while outer_links[root] != root:
+            root = outer_links[root]
+
+        while outer_links[block_i] != root:
+            outer_links[block_i], block_i = root, outer_links[block_i]
+
+        return root
+
+    for header_i in reversed(rpo):
+        pending = [find_outer(pred_i) for pred_i in blocks[header_i].preds if cfg.dominates(header_i, pred_i)]
+
+        if len(pending) == 0:
+            continue
+
+        headers.append(header_i)
+        parents[header_i] = None
+        innermost[header_i] = header_i
+
+        while len(pending) != 0:
+            member_i = pending.pop()
+
+            if member_i == header_i or outer_links[member_i] != member_i:
+                continue
+
+            outer_links[member_i] = header_i
+
+            if innermost[member_i] is None:
+                innermost[member_i] = header_i
+            else:
+                parents[member_i] = header_i
+
+            for pred_i in blocks[member_i].preds:
+                outer_i = find_outer(pred_i)
+
+                if outer_i != header_i and cfg.is_reachable(pred_i):
+                    pending.append(outer_i)
+
+    headers.reverse()
+
+    return LoopForest(headers, parents, innermost)
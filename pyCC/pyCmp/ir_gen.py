@@ -16,7 +16,7 @@ import pyCC.pyCmp.ir_types as ir_types
 
 @dataclasses.dataclass
 class IRLabel(ir_types.IRStep):
-    title: str
+    title: ir_types.JumpLabel | str
 
     def get_ir_type(self) -> ir_types.IRType:
         return ir_types.IRType.LABEL
@@ -28,24 +28,24 @@ class IRReturn(ir_types.IRStep):
 
 @dataclasses.dataclass
 class IRJump(ir_types.IRStep):
-    target: str
+    target: ir_types.JumpLabel
 
     def get_ir_type(self) -> ir_types.IRType:
         return ir_types.IRType.JUMP
 
 @dataclasses.dataclass
 class IRJumpIf(ir_types.IRStep):
-    target: str
+    target: ir_types.JumpLabel
     op: ir_types.IROp
-    arg0: str | int
-    arg1: str | int
+    arg0: ir_types.VReg
+    arg1: ir_types.VReg
 
     def get_ir_type(self) -> ir_types.IRType:
         return ir_types.IRType.JUMP_IF
 
 @dataclasses.dataclass
 class IRPushArg(ir_types.IRStep):
-    arg: str | int
+    arg: ir_types.VReg
 
     def get_ir_type(self) -> ir_types.IRType:
         return ir_types.IRType.ARGV_PUSH
@@ -53,196 +53,248 @@ class IRPushArg(ir_types.IRStep):
 @dataclasses.dataclass
 class IRCallFunc(ir_types.IRStep):
     callee: str
+    dest: ir_types.VReg | None = None # NOTE only calls of non-void functions keep their result.
 
     def get_ir_type(self) -> ir_types.IRType:
         return ir_types.IRType.FUNC_CALL
 
 @dataclasses.dataclass
 class IRAssign(ir_types.IRStep):
-    dest: str
+    dest: ir_types.VReg
     op: ir_types.IROp
-    operands: list[str | int]
+    operands: list[ir_types.VReg]
 
     def get_ir_type(self) -> ir_types.IRType:
         return ir_types.IRType.ADDR_ASSIGN
 
 @dataclasses.dataclass
 class IRLoadConst(ir_types.IRStep):
-    addr: str
-    value: int
+    addr: ir_types.VReg
+    value: int # NOTE the only immediate of the IR, every other operand is a register.
 
     def get_ir_type(self) -> ir_types.IRType:
         return ir_types.IRType.LOAD_CONSTANT
 
-## IR Generator ##
+@dataclasses.dataclass
+class IRPhi(ir_types.IRStep):
+    dest: ir_types.VReg
+    operands: list[ir_types.VReg] # NOTE one per pred of the phi's block, in the CFG's pred order.
 
-class IREmitter(ASTVisitor):
-    AddrUsageTable = dict[str, bool] # NOTE format is "a{num}": bool.
+    def get_ir_type(self) -> ir_types.IRType:
+        return ir_types.IRType.PHI
+
+@dataclasses.dataclass
+class IRParallelCopy(ir_types.IRStep):
+    dests: list[ir_types.VReg]
+    srcs: list[ir_types.VReg] # NOTE all sources are read before any dest is written.
+
+    def get_ir_type(self) -> ir_types.IRType:
+        return ir_types.IRType.PARALLEL_COPY
+
+## IR Op Tables ##
+
+# NOTE the string-keyed AST op tables of ir_types, re-indexed by OpType value for lookups without building name strings.
+IR_OP_MATCHES: list[ir_types.IROp | None] = [None] + [ir_types.AST_OP_IR_MATCHES.get(op.name) for op in ast.OpType]
+IR_OP_INVERSES: list[ir_types.IROp | None] = [None] + [ir_types.AST_OP_IR_INVERSES.get(op.name) for op in ast.OpType]
+
+def shift_jump_labels(steps: ir_types.StepList, offset: int):
+    """
+        Renumbers the jump labels of `steps` by `offset` in place, e.g when merging IR made by separate emitters.\n
+        NOTE a function's own label is its name and stays as is.
+    """
+    if offset == 0:
+        return
+
+    for step in steps:
+        step_type = step.get_ir_type()
 
-    addr_table: AddrUsageTable = None
-    name_to_addr_table: dict = None
-    jump_label_i: int = None
-    temp_labels: list[str] = []
-    frame_sizes: list[int] = None
-    results: ir_types.StepList = None
+        if step_type == ir_types.IRType.JUMP or step_type == ir_types.IRType.JUMP_IF:
+            step.target += offset
+        elif step_type == ir_types.IRType.LABEL and type(step.title) is int:
+            step.title += offset
 
+## IR Generator ##
+
+class IREmitter(ASTVisitor):
     def __init__(self, sem_info: sem.SemanticsTable):
+        self.reset(sem_info)
+
+    def reset(self, sem_info: sem.SemanticsTable):
+        """
+            NOTE gives this emitter a clean slate for another compilation... all of its state lives on the instance, so separate emitters never share anything.
+        """
         self.sem_table = sem_info
-        self.addr_table = {
-            "A": False, # NOTE True => used!
-            "B": False,
-            "C": False
-        }
-        self.name_to_addr_table = {
-            "A": None,
-            "B": None,
-            "C": None
-        }
-        self.jump_label_i = 0
-        self.temp_labels = []
-        self.frame_sizes = []
-        self.results = []
+        # NOTE released registers are reused last-in first-out before new ones are counted up from next_reg, so both allocating and releasing are O(1).
+        self.free_regs: list[ir_types.VReg] = []
+        self.next_reg: ir_types.VReg = 0
+        # NOTE one past the highest register bound to a global, where each function's registers start.
+        self.global_reg_end: ir_types.VReg = 0
+        # NOTE one past the highest register any finished function used, where globals declared after it start.
+        self.local_reg_end: ir_types.VReg = 0
+        # NOTE registers of resolved names by scope depth then slot, see sem.Resolver... globals first, then the current function's.
+        self.scope_addrs: list[list[ir_types.VReg | None]] = [[]]
+        self.jump_label_i: ir_types.JumpLabel = 0
+        self.temp_labels: list[ir_types.JumpLabel] = []
+        self.frame_sizes: list[int] = []
+        self.results: ir_types.StepList = []
+
+    def allocate(self) -> ir_types.VReg:
+        """
+            Gives a register for an intermediate value, preferring the last one released.
+        """
+        if len(self.free_regs) != 0:
+            return self.free_regs.pop()
 
-    def toggle_addr_usage(self, id: str):
-        # NOTE an IR address is "used" during initialization or operations.
-        if self.addr_table.get(id) is not None:
-            # NOTE handles A,B,C addresses...
-            temp = not self.addr_table.get(id)
-            self.addr_table[id] = temp
-        else:
-            # NOTE handles new temp addresses of a<n> form... "initialize" it here!
-            self.addr_table[id] = False
+        reg = self.next_reg
+        self.next_reg += 1
+
+        return reg
 
-    def get_available_addrs(self):
+    def release(self, reg: ir_types.VReg | None):
         """
-            NOTE Gets available (unused) IR address list excluding temps.\n
+            Marks a register as dead so `allocate` can hand it out again.\n
+            NOTE void calls give no register, so None is ignored.
         """
-        availables = filter(lambda a: not self.addr_table.get(a), self.addr_table.keys())
-        return [usable_addr for usable_addr in availables]
+        if reg is not None:
+            self.free_regs.append(reg)
 
-    def allocate_addr(self):
+    def bind_addr(self, binding: ast.Binding, reg: ir_types.VReg):
+        depth, slot, _ = binding
+        addrs = self.scope_addrs[depth]
+
+        if slot >= len(addrs):
+            addrs.extend([None] * (slot + 1 - len(addrs)))
+
+        addrs[slot] = reg
+
+        if depth == 0 and reg >= self.global_reg_end:
+            self.global_reg_end = reg + 1
+
+    def lookup_addr(self, binding: ast.Binding) -> ir_types.VReg | None:
+        depth, slot, _ = binding
+
+        if depth == sem.BOGUS_SCOPE_ID or slot < 0 or slot >= len(self.scope_addrs[depth]):
+            return None
+
+        return self.scope_addrs[depth][slot]
+
+    def release_locals(self):
         """
-            Generates the next usable IR address to store an intermediate value if no candidates exist... but a used address can become unused after use for other operations. This logic basically uses memoization of all unoccupied IR addresses. \n
-            * If a reserved register is available, use the next one.
-            * If not, use an existing temporary register if available.
-            * Finally, use a new temporary register if no existing ones are available.
+            NOTE nothing but globals outlives a function, so its params, locals, and leftover temps are free for the next one... registers restart past the globals, so every function gets the same ones wherever it is.
         """
-        # pool of at least 1 guaranteed free address...
-        candidates = self.get_available_addrs()
-
-        for addr in candidates:
-            if self.addr_table.get(addr) != True:
-                self.toggle_addr_usage(addr)
-                return addr
-
-        # empty pool case:
-        new_temp_id = len(self.addr_table) - 3
-        new_addr = f'a{new_temp_id}'
-        self.toggle_addr_usage(new_addr)
-        self.toggle_addr_usage(new_addr)
-        return new_addr
-
-    def generate_next_label(self):
+        self.local_reg_end = max(self.local_reg_end, self.next_reg)
+        self.free_regs.clear()
+        self.next_reg = self.global_reg_end
+
+    def generate_next_label(self) -> ir_types.JumpLabel:
         temp_label_i = self.jump_label_i
         self.jump_label_i += 1
 
-        return f'L{temp_label_i}'
+        return temp_label_i
 
     def gen_ir_from_ast(self, ast: list[ast.Stmt]):
         for stmt in ast:
-            stmt.accept_visitor(self)
+            self.visit_tree(stmt)
+
+        return self.results
+
+    def gen_ir_from_decl(self, stmt: ast.Stmt) -> ir_types.StepList:
+        """
+            Gives the IR of one more top-level declaration in a fresh list, so steps of earlier declarations can be dropped. Labels and global registers carry over.
+        """
+        self.results = []
+        self.visit_tree(stmt)
 
         return self.results
 
-    def generate_normal_jump(self, target_label: str, op: ast.OpType, lhs: ast.Expr, rhs: ast.Expr):
+    def load_constant(self, value: int) -> ir_types.VReg:
+        reg = self.allocate()
+        self.results.append(IRLoadConst(reg, value))
+
+        return reg
+
+    def generate_zero_jump(self, target_label: ir_types.JumpLabel, op: ir_types.IROp, reg: ir_types.VReg):
+        # NOTE compares against a loaded 0 since jumps only take registers.
+        zero_reg = self.load_constant(0)
+        self.results.append(IRJumpIf(target_label, op, zero_reg, reg))
+        self.release(zero_reg)
+
+    def generate_normal_jump(self, target_label: ir_types.JumpLabel, op: ast.OpType, lhs: ast.Expr, rhs: ast.Expr):
         # NOTE the 3 NOPs for ASSIGN, AND, OR will be handled by caller code instead...
-        op = ir_types.AST_OP_IR_MATCHES.get(op.name)
-        temp = self.allocate_addr() # a2
-        lhs_temp = lhs.accept_visitor(self)
-        rhs_temp = rhs.accept_visitor(self)
+        op = IR_OP_MATCHES[op.value]
+        temp = self.allocate()
+        lhs_temp = yield lhs
+        rhs_temp = yield rhs
 
         self.results.append(IRAssign(temp, op, [lhs_temp, rhs_temp]))
-        self.results.append(IRJumpIf(target_label, ir_types.IROp.COMPARE_NEQ, 0, temp))
+        self.generate_zero_jump(target_label, ir_types.IROp.COMPARE_NEQ, temp)
 
-        self.toggle_addr_usage(temp)
-        self.toggle_addr_usage(rhs_temp)
-        self.toggle_addr_usage(lhs_temp)
+        self.release(temp)
+        self.release(rhs_temp)
+        self.release(lhs_temp)
 
-    def generate_inverse_jump(self, target_label: str, expr: ast.Expr):
+    def generate_inverse_jump(self, target_label: ir_types.JumpLabel, expr: ast.Expr):
         op = expr.get_op_type()
-        inverse_op = ir_types.AST_OP_IR_INVERSES.get(op.name) or ir_types.IROp.NOP
+        inverse_op = IR_OP_INVERSES[op.value] or ir_types.IROp.NOP
         op_arity = expr.get_op_arity()
 
         if inverse_op != ir_types.IROp.NOP:
-            lhs_temp = expr.get_lhs().accept_visitor(self)
-            rhs_temp = expr.get_rhs().accept_visitor(self)
+            lhs_temp = yield expr.get_lhs()
+            rhs_temp = yield expr.get_rhs()
 
             self.results.append(IRJumpIf(target_label, inverse_op, lhs_temp, rhs_temp))
-            self.toggle_addr_usage(rhs_temp)
-            self.toggle_addr_usage(lhs_temp)
+            self.release(rhs_temp)
+            self.release(lhs_temp)
         elif op_arity == ast.OpArity.BINARY:
-            temp = self.allocate_addr()
-            lhs_temp = expr.get_lhs().accept_visitor(self)
-            rhs_temp = expr.get_rhs().accept_visitor(self)
-
-            self.results.append(IRAssign(temp, op, [lhs_temp, rhs_temp]))
-            self.results.append(IRJumpIf(target_label, ir_types.IROp.COMPARE_EQ, 0, temp))
-            self.toggle_addr_usage(temp)
-            self.toggle_addr_usage(rhs_temp)
-            self.toggle_addr_usage(lhs_temp)
+            temp = self.allocate()
+            lhs_temp = yield expr.get_lhs()
+            rhs_temp = yield expr.get_rhs()
+
+            self.results.append(IRAssign(temp, IR_OP_MATCHES[op.value], [lhs_temp, rhs_temp]))
+            self.generate_zero_jump(target_label, ir_types.IROp.COMPARE_EQ, temp)
+            self.release(temp)
+            self.release(rhs_temp)
+            self.release(lhs_temp)
         elif op_arity == ast.OpArity.UNARY:
-            inner_temp = expr.get_inner().accept_visitor(self)
-            temp = self.allocate_addr()
-            self.results.append(IRAssign(temp, op, [inner_temp]))
-            self.results.append(IRJumpIf(target_label, ir_types.IROp.COMPARE_EQ, 0, inner_temp))
-            self.toggle_addr_usage(temp)
-            self.toggle_addr_usage(inner_temp)
+            inner_temp = yield expr.get_inner()
+            temp = self.allocate()
+            self.results.append(IRAssign(temp, IR_OP_MATCHES[op.value], [inner_temp]))
+            self.generate_zero_jump(target_label, ir_types.IROp.COMPARE_EQ, inner_temp)
+            self.release(temp)
+            self.release(inner_temp)
         elif op_arity == ast.OpArity.NOTHING:
-            temp = expr.accept_visitor(self)
-            self.results.append(IRJumpIf(target_label, ir_types.IROp.COMPARE_EQ, 0, temp))
-            self.toggle_addr_usage(temp)
-
-    def visit_literal(self, node: ast.Expr) -> tuple[bool, "any"]:
-        # NOTE literal_token: Literal.LiteralData & literal_arrtype: Literal.ArrayType
-        literal_token, literal_arrtype = node.get_data()
-
-        if literal_token is not None:
-            # TODO use allocation of IR address...
-            lexeme: str = literal_token[0]
-            # raw_value: int = int(lexeme) if literal_token[2] == TokenType.LITERAL_INT else ord(lexeme[0])
-            raw_value = 0
-            value_addr = self.allocate_addr()
-
-            if literal_token[2] == TokenType.LITERAL_INT:
-                raw_value = int(lexeme)
-                self.results.append(
-                    IRLoadConst(value_addr, raw_value)
-                )
-            elif literal_token[2] == TokenType.LITERAL_CHAR:
-                raw_value = ord(lexeme[0])
-                self.results.append(
-                    IRLoadConst(value_addr, raw_value)
-                )
-            elif literal_token[2] == TokenType.IDENTIFIER:
-                temp = self.name_to_addr_table.get(lexeme)
-                raw_value = temp or 'aX'
-                self.results.append(
-                    IRLoadConst(value_addr, raw_value)
-                )
-            return value_addr
-        elif literal_arrtype is not None:
-            # TODO implement array handling... allocate N addresses where N = arr.length!
+            temp = yield expr
+            self.generate_zero_jump(target_label, ir_types.IROp.COMPARE_EQ, temp)
+            self.release(temp)
+
+    def visit_literal(self, node: ast.Expr) -> ir_types.VReg | None:
+        token_kind = node.get_token_kind()
+
+        if token_kind == TokenType.LITERAL_INT or token_kind == TokenType.LITERAL_CHAR:
+            return self.load_constant(node.get_value())
+        elif token_kind == TokenType.IDENTIFIER:
+            # NOTE names are copied into a temp, so consumers may release whatever they get.
+            var_reg = self.lookup_addr(node.get_binding())
+
+            if var_reg is None:
+                return self.load_constant(0)
+
+            value_reg = self.allocate()
+            self.results.append(IRAssign(value_reg, ir_types.IROp.NOP, [var_reg]))
+            return value_reg
+        elif node.is_array():
+            # TODO implement array handling... allocate N registers where N = arr.length!
             pass
 
     def visit_unary(self, node: ast.Expr):
-        src_addr = node.get_inner().accept_visitor(self)
+        src_reg = yield node.get_inner()
         op = node.get_op_type()
-        dest_addr = self.allocate_addr()
+        dest_reg = self.allocate()
 
         if op == ast.OpType.OP_NEG:
-            self.results.append(IRAssign(dest_addr, ir_types.IROp.NEGATE, [src_addr]))
-            self.toggle_addr_usage(src_addr)
-            return dest_addr
+            self.results.append(IRAssign(dest_reg, ir_types.IROp.NEGATE, [src_reg]))
+            self.release(src_reg)
+            return dest_reg
 
         return None
 
@@ -250,131 +302,139 @@ class IREmitter(ASTVisitor):
         expr_lhs: ast.Expr = node.get_lhs()
         expr_rhs: ast.Expr = node.get_rhs()
         op = node.get_op_type()
-        dest_addr = self.allocate_addr()
+        dest_reg = self.allocate()
 
         if op == ast.OpType.OP_LOGIC_AND:
             falsy_label = self.generate_next_label()
             truthy_label = self.generate_next_label()
 
-            self.generate_inverse_jump(falsy_label, expr_lhs)
-            self.generate_inverse_jump(falsy_label, expr_rhs)
-            self.results.append(IRAssign(dest_addr, ir_types.IROp.NOP, [1]))
+            yield from self.generate_inverse_jump(falsy_label, expr_lhs)
+            yield from self.generate_inverse_jump(falsy_label, expr_rhs)
+            self.results.append(IRLoadConst(dest_reg, 1))
             self.results.append(IRJump(truthy_label))
 
             self.results.append(IRLabel(falsy_label))
-            self.results.append(IRAssign(dest_addr, ir_types.IROp.NOP, [0]))
+            self.results.append(IRLoadConst(dest_reg, 0))
             self.results.append(IRLabel(truthy_label))
         elif op == ast.OpType.OP_LOGIC_OR:
             falsy_label = self.generate_next_label()
             truthy_label = self.generate_next_label()
             skippy_label = self.generate_next_label()
 
-            self.generate_normal_jump(truthy_label, expr_lhs.get_op_type(), expr_lhs, expr_rhs)
-            self.generate_normal_jump(truthy_label, expr_rhs.get_op_type(), expr_lhs, expr_rhs)
+            yield from self.generate_normal_jump(truthy_label, expr_lhs.get_op_type(), expr_lhs, expr_rhs)
+            yield from self.generate_normal_jump(truthy_label, expr_rhs.get_op_type(), expr_lhs, expr_rhs)
 
             self.results.append(IRLabel(truthy_label))
-            self.results.append(IRAssign(dest_addr, ir_types.IROp.NOP, [1]))
+            self.results.append(IRLoadConst(dest_reg, 1))
             self.results.append(IRJump(skippy_label))
 
             self.results.append(IRLabel(falsy_label))
-            self.results.append(IRAssign(dest_addr, ir_types.IROp.NOP, [0]))
+            self.results.append(IRLoadConst(dest_reg, 0))
             self.results.append(IRLabel(skippy_label))
         elif op != ast.OpType.OP_ASSIGN:
-            arg0_addr = expr_lhs.accept_visitor(self)
-            arg1_addr = expr_rhs.accept_visitor(self)
-            self.results.append(IRAssign(dest_addr, ir_types.IROp(op.value), [arg0_addr, arg1_addr]))
+            arg0_reg = yield expr_lhs
+            arg1_reg = yield expr_rhs
+            self.results.append(IRAssign(dest_reg, ir_types.IROp(op.value), [arg0_reg, arg1_reg]))
 
-            self.toggle_addr_usage(arg1_addr)
-            self.toggle_addr_usage(arg0_addr)
+            self.release(arg1_reg)
+            self.release(arg0_reg)
         else:
-            value_addr = expr_rhs.accept_visitor(self)
-            self.results.append(IRAssign(dest_addr, ir_types.IROp.NOP, [value_addr]))
-            self.toggle_addr_usage(value_addr)
+            value_reg = yield expr_rhs
+            self.results.append(IRAssign(dest_reg, ir_types.IROp.NOP, [value_reg]))
+            self.release(value_reg)
 
-        return dest_addr
+        return dest_reg
 
     def visit_call(self, node: ast.Expr):
         func_name: str = node.get_name()
-        func_retype: ast.DataType = self.sem_table.get('.global').get(func_name).data_type
+        func_retype: ast.DataType = node.get_resolved_type()
+
+        # NOTE calls nested in args are never typed by the checker, so look those up.
+        if func_retype is None:
+            func_retype = node.get_binding()[2].data_type
         func_argv: ast.Call.ArgList = node.get_args()
 
         for arg in func_argv:
-            if arg.get_op_type() == ast.OpType.OP_NONE:
-                # NOTE either check lexeme of literal for its value...
-                temp_lexeme: str = arg.get_data()[0][0]
-                temp_value = int(temp_lexeme) if temp_lexeme[0] != '\'' else ord(temp_lexeme[1])
-                self.results.append(IRPushArg(temp_value))
-            else:
-                # ... or just process a temporary value from an arg. expr.
-                temp_arg_addr: str = arg.accept_visitor(self)
-                self.results.append(IRPushArg(temp_arg_addr))
+            arg_reg: ir_types.VReg = yield arg
+            self.results.append(IRPushArg(arg_reg))
+            self.release(arg_reg)
 
         if func_retype == ast.DataType.VOID:
             self.results.append(IRCallFunc(func_name))
         elif func_retype != ast.DataType.UNKNOWN:
-            dest_addr = self.allocate_addr()
-            self.results.append(IRAssign(dest_addr, ir_types.IROp.CALL, [func_name]))
-            return dest_addr
+            dest_reg = self.allocate()
+            self.results.append(IRCallFunc(func_name, dest_reg))
+            return dest_reg
 
     def visit_variable_decl(self, node: ast.Stmt):
-        var_addr = self.allocate_addr()
-        self.name_to_addr_table[node.get_name()] = var_addr
-        rhs_addr: str = node.get_rhs().accept_visitor(self)
-        self.results.append(IRAssign(var_addr, ir_types.IROp.NOP, [rhs_addr]))
-        return var_addr
+        if node.get_binding()[0] == 0:
+            # NOTE a global declared after a function must not get one of its registers, or calling it would clobber the global.
+            self.next_reg = max(self.next_reg, self.local_reg_end)
+
+        var_reg = self.allocate()
+        self.bind_addr(node.get_binding(), var_reg)
+        rhs_reg: ir_types.VReg = yield node.get_rhs()
+        self.results.append(IRAssign(var_reg, ir_types.IROp.NOP, [rhs_reg]))
+        self.release(rhs_reg)
+        return var_reg
 
     def visit_block(self, node: ast.Stmt):
         for stmt in node.get_stmts():
-            stmt.accept_visitor(self)
+            yield stmt
 
     def visit_function_decl(self, node: ast.Stmt):
         func_name: str = node.get_name()
         func_param_v: ast.ParamList = node.get_params()
 
+        # NOTE temps left by global initializers are dead too, so every function starts from the same registers.
+        self.release_locals()
         self.results.append(IRLabel(func_name))
 
+        # NOTE params take the first slots of the function's scope, in order.
+        self.scope_addrs.append([])
+
         for param in func_param_v:
-            param_addr = self.allocate_addr()
-            self.name_to_addr_table[param[1]] = param_addr
-            self.results.append(IRLoadConst(param_addr, 0))
+            self.scope_addrs[-1].append(self.load_constant(0))
 
         ret_label = self.generate_next_label()
         self.temp_labels.append(ret_label)
 
-        node.get_body().accept_visitor(self)
+        yield node.get_body()
 
         self.results.append(IRLabel(ret_label))
         self.results.append(IRReturn())
         self.temp_labels.clear()
-        self.name_to_addr_table.clear()
+
+        self.scope_addrs.pop()
+        self.release_locals()
 
     def visit_expr_stmt(self, node: ast.Stmt):
         op = node.get_inner().get_op_type()
 
         if op == ast.OpType.OP_CALL or op == ast.OpType.OP_ASSIGN:
-            node.get_inner().accept_visitor(self)
+            unused_reg = yield node.get_inner()
+            self.release(unused_reg)
 
     def visit_if(self, node: ast.Stmt):
         truthy_body: ast.Stmt = node.get_if_body()
         falsy_body: ast.Stmt = node.get_alt_body()
         falsy_label = self.generate_next_label()
 
-        cond_addr = node.get_conditions().accept_visitor(self)
-        self.results.append(IRJumpIf(falsy_label, ir_types.IROp.COMPARE_EQ, 0, cond_addr))
+        cond_reg = yield node.get_conditions()
+        self.generate_zero_jump(falsy_label, ir_types.IROp.COMPARE_EQ, cond_reg)
+        self.release(cond_reg)
 
-        truthy_body.accept_visitor(self)
+        yield truthy_body
 
         if falsy_body is not None:
             truthy_label = self.generate_next_label()
 
             self.results.append(IRJump(truthy_label))
             self.results.append(IRLabel(falsy_label))
-            falsy_body.accept_visitor(self)
+            yield falsy_body
             self.results.append(IRLabel(truthy_label))
         else:
             self.results.append(IRLabel(falsy_label))
 
-        self.toggle_addr_usage(cond_addr)
-
     def visit_return(self, node: ast.Stmt):
         self.results.append(IRJump(self.temp_labels[0]))
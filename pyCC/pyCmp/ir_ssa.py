@@ -0,0 +1,391 @@
+"""
+    ir_ssa.py\n
+    Added by DrkWithT\n
+    Defines conversion of function CFGs into SSA form with def-use chains, and back out of it with parallel copies.
+"""
+
+from typing import Callable
+import pyCC.pyCmp.ir_types as ir_types
+import pyCC.pyCmp.ir_gen as irgen
+import pyCC.pyCmp.ir_cfg as ircfg
+
+## Aliases ##
+
+# NOTE represents def-use chains as the defining step of each register, then the steps using each register.
+DefUse = tuple[dict[ir_types.VReg, ir_types.IRStep], dict[ir_types.VReg, list[ir_types.IRStep]]]
+
+# NOTE represents the phis placed in a block as (original register, phi) pairs.
+PhiList = list[tuple[ir_types.VReg, irgen.IRPhi]]
+
+## Step Operands ##
+
+def get_step_def(step: ir_types.IRStep) -> ir_types.VReg | None:
+    step_type = step.get_ir_type()
+
+    if step_type == ir_types.IRType.ADDR_ASSIGN or step_type == ir_types.IRType.PHI:
+        return step.dest
+    elif step_type == ir_types.IRType.LOAD_CONSTANT:
+        return step.addr
+    elif step_type == ir_types.IRType.FUNC_CALL:
+        return step.dest
+
+    return None
+
+def get_step_uses(step: ir_types.IRStep) -> list[ir_types.VReg]:
+    step_type = step.get_ir_type()
+
+    if step_type == ir_types.IRType.ADDR_ASSIGN or step_type == ir_types.IRType.PHI:
+        return step.operands
+    elif step_type == ir_types.IRType.JUMP_IF:
+        return [step.arg0, step.arg1]
+    elif step_type == ir_types.IRType.ARGV_PUSH:
+        return [step.arg]
+    elif step_type == ir_types.IRType.PARALLEL_COPY:
+        return step.srcs
+
+    return []
+
+def set_step_def(step: ir_types.IRStep, reg: ir_types.VReg):
+    if step.get_ir_type() == ir_types.IRType.LOAD_CONSTANT:
+        step.addr = reg
+    else:
+        step.dest = reg
+
+def map_step_uses(step: ir_types.IRStep, rename: Callable[[ir_types.VReg], ir_types.VReg]):
+    """
+        Replaces each register a non-phi step reads by `rename` of it, in place.
+    """
+    step_type = step.get_ir_type()
+
+    if step_type == ir_types.IRType.ADDR_ASSIGN:
+        step.operands = [rename(operand) for operand in step.operands]
+    elif step_type == ir_types.IRType.JUMP_IF:
+        step.arg0 = rename(step.arg0)
+        step.arg1 = rename(step.arg1)
+    elif step_type == ir_types.IRType.ARGV_PUSH:
+        step.arg = rename(step.arg)
+
+def find_reg_end(cfg: ircfg.ControlFlowGraph) -> ir_types.VReg:
+    """
+        Gives one past the highest register a function's steps mention, the first one free for new values.
+    """
+    reg_end = 0
+
+    for block in cfg.blocks:
+        for step in block.steps:
+            step_def = get_step_def(step)
+
+            if step_def is not None and step_def >= reg_end:
+                reg_end = step_def + 1
+
+            for use in get_step_uses(step):
+                if use >= reg_end:
+                    reg_end = use + 1
+
+    return reg_end
+
+## SSA Construction ##
+
+def drop_unreachable(cfg: ircfg.ControlFlowGraph):
+    # NOTE renaming only walks the dominator tree, so dead blocks e.g after a return's jump would keep their old registers.
+    if all(cfg.is_reachable(block_i) for block_i in range(len(cfg.blocks))):
+        return
+
+    cfg.blocks = [block for block_i, block in enumerate(cfg.blocks) if cfg.is_reachable(block_i)]
+    cfg.mark_changed()
+
+def place_phis(cfg: ircfg.ControlFlowGraph) -> list[PhiList]:
+    """
+        Places semi-pruned phis: only registers read in some block before any write there can be live across blocks, so only those get phis, at the iterated dominance frontier of their defining blocks.
+    """
+    blocks = cfg.blocks
+    frontiers = cfg.get_frontiers()
+    live_across: set[ir_types.VReg] = set()
+    def_blocks: dict[ir_types.VReg, list[int]] = {}
+
+    for block_i, block in enumerate(blocks):
+        block_defs: set[ir_types.VReg] = set()
+
+        for step in block.steps:
+            for use in get_step_uses(step):
+                if use not in block_defs:
+                    live_across.add(use)
+
+            step_def = get_step_def(step)
+
+            if step_def is not None and step_def not in block_defs:
+                block_defs.add(step_def)
+                def_blocks.setdefault(step_def, []).append(block_i)
+
+    block_phis: list[PhiList] = [[] for _ in blocks]
+    # NOTE the register each block last got a phi for or was queued for, so marks needn't be reset per register.
+    phi_marks: list[ir_types.VReg | None] = [None] * len(blocks)
+    queued_marks: list[ir_types.VReg | None] = [None] * len(blocks)
+
+    for reg in sorted(live_across):
+        pending = def_blocks.get(reg, [])[:]
+
+        for block_i in pending:
+            queued_marks[block_i] = reg
+
+        while len(pending) != 0:
+            block_i = pending.pop()
+
+            for frontier_i in frontiers[block_i]:
+                if phi_marks[frontier_i] == reg:
+                    continue
+
+                phi_marks[frontier_i] = reg
+                block_phis[frontier_i].append((reg, irgen.IRPhi(reg, [reg] * len(blocks[frontier_i].preds))))
+
+                if queued_marks[frontier_i] != reg:
+                    queued_marks[frontier_i] = reg
+                    pending.append(frontier_i)
+
+    for block, phis in zip(blocks, block_phis):
+        if len(phis) != 0:
+            # NOTE a block with phis is a join, so it's jumped to and starts with its label.
+            block.steps[1:1] = [phi for _, phi in phis]
+
+    return block_phis
+
+def rename_regs(cfg: ircfg.ControlFlowGraph, block_phis: list[PhiList], reg_start: ir_types.VReg = 0):
+    """
+        Gives every write a fresh register past the function's own and `reg_start`, then points each read at the write reaching it by a preorder walk of the dominator tree.\n
+        NOTE a read reached by no write e.g of a global keeps its register.
+    """
+    blocks = cfg.blocks
+    children = cfg.get_dom_tree()[0]
+    next_reg = max(find_reg_end(cfg), reg_start)
+    reaching: dict[ir_types.VReg, list[ir_types.VReg]] = {}
+    block_pushes: list[list[ir_types.VReg]] = [[] for _ in blocks]
+
+    def rename_use(reg: ir_types.VReg) -> ir_types.VReg:
+        versions = reaching.get(reg)
+        return versions[-1] if versions else reg
+
+    pending: list[tuple[int, bool]] = [(0, False)]
+
+    while len(pending) != 0:
+        block_i, leaving = pending.pop()
+
+        if leaving:
+            for reg in block_pushes[block_i]:
+                reaching[reg].pop()
+
+            continue
+
+        pushes = block_pushes[block_i]
+
+        for step in blocks[block_i].steps:
+            # NOTE a phi still writes its original register here, and its reads are set from the preds.
+            if step.get_ir_type() != ir_types.IRType.PHI:
+                map_step_uses(step, rename_use)
+
+            step_def = get_step_def(step)
+
+            if step_def is not None:
+                set_step_def(step, next_reg)
+                reaching.setdefault(step_def, []).append(next_reg)
+                pushes.append(step_def)
+                next_reg += 1
+
+        for succ_i in blocks[block_i].succs:
+            pred_pos = blocks[succ_i].preds.index(block_i)
+
+            for reg, phi in block_phis[succ_i]:
+                phi.operands[pred_pos] = rename_use(reg)
+
+        pending.append((block_i, True))
+        pending.extend((child_i, False) for child_i in reversed(children[block_i]))
+
+def construct_ssa(cfg: ircfg.ControlFlowGraph, reg_start: ir_types.VReg = 0):
+    """
+        Puts a function's CFG into SSA form in place: unreachable blocks are dropped, semi-pruned phis are placed by dominance frontiers, and registers are renamed so each has one write. New registers start past both the function's own and `reg_start`, so they can be kept clear of registers outside it e.g of globals declared later. See get_def_use for the chains after.\n
+        NOTE only for graphs of functions, since registers written by globals' initializers are read by the functions.
+    """
+    if len(cfg.blocks) == 0:
+        return
+
+    drop_unreachable(cfg)
+    block_phis = place_phis(cfg)
+    rename_regs(cfg, block_phis, reg_start)
+    cfg.mark_changed()
+
+def compute_def_use(cfg: ircfg.ControlFlowGraph) -> DefUse:
+    defs: dict[ir_types.VReg, ir_types.IRStep] = {}
+    uses: dict[ir_types.VReg, list[ir_types.IRStep]] = {}
+
+    for block in cfg.blocks:
+        for step in block.steps:
+            step_def = get_step_def(step)
+
+            if step_def is not None:
+                defs[step_def] = step
+
+            for use in get_step_uses(step):
+                uses.setdefault(use, []).append(step)
+
+    return (defs, uses)
+
+def get_def_use(cfg: ircfg.ControlFlowGraph) -> DefUse:
+    """
+        Gives the def-use chains of an SSA form CFG, cached until its IR changes.
+    """
+    return cfg.get_analysis('def_use', compute_def_use)
+
+## SSA Destruction ##
+
+def sequentialize_copy(dests: list[ir_types.VReg], srcs: list[ir_types.VReg], scratch: ir_types.VReg) -> ir_types.StepList:
+    """
+        Orders a parallel copy into plain copies: a dest no pending copy still reads is written first, and what's left then is only cycles, each broken once by saving a value in `scratch`.
+    """
+    moves: ir_types.StepList = []
+    wanted_srcs: dict[ir_types.VReg, ir_types.VReg] = {}
+    read_counts: dict[ir_types.VReg, int] = {}
+    # NOTE where a source's value is if it had to be saved before its register was written.
+    saved_homes: dict[ir_types.VReg, ir_types.VReg] = {}
+
+    for dest, src in zip(dests, srcs):
+        if dest != src:
+            wanted_srcs[dest] = src
+            read_counts[src] = read_counts.get(src, 0) + 1
+
+    ready = [dest for dest in wanted_srcs if read_counts.get(dest, 0) == 0]
+
+    while len(wanted_srcs) != 0:
+        while len(ready) != 0:
+            dest = ready.pop()
+            src = wanted_srcs.pop(dest)
+            moves.append(irgen.IRAssign(dest, ir_types.IROp.NOP, [saved_homes.get(src, src)]))
+            read_counts[src] -= 1
+
+            if read_counts[src] == 0 and src in wanted_srcs:
+                ready.append(src)
+
+        if len(wanted_srcs) != 0:
+            cycle_dest = next(iter(wanted_srcs))
+            moves.append(irgen.IRAssign(scratch, ir_types.IROp.NOP, [cycle_dest]))
+            saved_homes[cycle_dest] = scratch
+            read_counts[cycle_dest] = 0
+            ready.append(cycle_dest)
+
+    return moves
+
+def find_label_end(steps: ir_types.StepList) -> ir_types.JumpLabel:
+    """
+        Gives one past the highest jump label of a program's IR, the first one free for new blocks.
+    """
+    label_end = 0
+
+    for step in steps:
+        if step.get_ir_type() == ir_types.IRType.LABEL and type(step.title) is int and step.title >= label_end:
+            label_end = step.title + 1
+
+    return label_end
+
+def destruct_ssa(cfg: ircfg.ControlFlowGraph, next_label: ir_types.JumpLabel, sequentialize: bool = True, reg_start: ir_types.VReg = 0) -> ir_types.JumpLabel:
+    """
+        Takes a function's CFG out of SSA form in place, replacing each block's phis by a parallel copy on every edge into it, then by plain copies if `sequentialize` is set. Copy cycles are broken through a scratch register past the function's own and `reg_start`. Gives the next free jump label after the ones used here.\n
+        NOTE copies on an edge from a conditional jump go in a new block of their own, so they can't clobber a value the jump or its other edge still needs. Such blocks of taken jumps go just before the function's final return block, so the function still ends at its return, see ir_cfg.split_functions.
+    """
+    blocks = cfg.blocks
+    scratch = max(find_reg_end(cfg), reg_start)
+    edge_copies: list[tuple[int, int, irgen.IRParallelCopy]] = []
+
+    for block_i, block in enumerate(blocks):
+        phis = [step for step in block.steps if step.get_ir_type() == ir_types.IRType.PHI]
+
+        if len(phis) == 0:
+            continue
+
+        block.steps = [step for step in block.steps if step.get_ir_type() != ir_types.IRType.PHI]
+
+        for pred_pos, pred_i in enumerate(block.preds):
+            copy = irgen.IRParallelCopy([phi.dest for phi in phis], [phi.operands[pred_pos] for phi in phis])
+            edge_copies.append((pred_i, block_i, copy))
+
+    if len(edge_copies) == 0:
+        return next_label
+
+    after_blocks: list[list[ircfg.BasicBlock]] = [[] for _ in blocks]
+    tail_blocks: list[ircfg.BasicBlock] = []
+
+    for pred_i, succ_i, copy in edge_copies:
+        pred = blocks[pred_i]
+        copy_steps: ir_types.StepList = [copy] if not sequentialize else sequentialize_copy(copy.dests, copy.srcs, scratch)
+
+        last_step = pred.get_terminator()
+        last_type = last_step.get_ir_type()
+
+        if last_type != ir_types.IRType.JUMP_IF:
+            insert_i = len(pred.steps) - 1 if last_type == ir_types.IRType.JUMP else len(pred.steps)
+            pred.steps[insert_i:insert_i] = copy_steps
+            continue
+
+        succ_label = blocks[succ_i].get_label()
+        split_block = ircfg.BasicBlock([irgen.IRLabel(next_label)] + copy_steps + [irgen.IRJump(succ_label)])
+
+        # NOTE the jump and the fall-through may both lead here, so each is sent through the new block.
+        if last_step.target == succ_label:
+            last_step.target = next_label
+
+        if pred_i + 1 == succ_i:
+            after_blocks[pred_i].append(split_block)
+        else:
+            tail_blocks.append(split_block)
+
+        next_label += 1
+
+    placed_blocks = [placed for block, extras in zip(blocks, after_blocks) for placed in [block] + extras]
+    final_block = placed_blocks[-1]
+
+    if len(tail_blocks) != 0 and final_block.get_terminator().get_ir_type() == ir_types.IRType.RETURN:
+        if final_block.get_label() is None:
+            final_block.steps.insert(0, irgen.IRLabel(next_label))
+            next_label += 1
+
+        # NOTE a block falling into the return now needs a jump over the moved blocks, in a block of its own since it may end in a conditional jump.
+        if placed_blocks[-2].get_terminator().get_ir_type() not in (ir_types.IRType.JUMP, ir_types.IRType.RETURN):
+            tail_blocks.insert(0, ircfg.BasicBlock([irgen.IRJump(final_block.get_label())]))
+
+        placed_blocks[-1:-1] = tail_blocks
+    else:
+        placed_blocks.extend(tail_blocks)
+
+    cfg.blocks = placed_blocks
+    cfg.mark_changed()
+
+    return next_label
+
+## Whole Programs ##
+
+def is_function_cfg(cfg: ircfg.ControlFlowGraph) -> bool:
+    # NOTE see ir_cfg.split_functions... only a function's graph starts with its name.
+    return len(cfg.blocks) != 0 and type(cfg.blocks[0].get_label()) is str
+
+def construct_program_ssa(steps: ir_types.StepList) -> list[ircfg.ControlFlowGraph]:
+    """
+        Splits a program's IR into CFGs and puts each function's into SSA form. Graphs of globals' initializers, wherever they are declared, are left as they are, since their code runs outside any function and would look dead.
+    """
+    cfgs = ircfg.build_cfgs(steps)
+    reg_end = max((find_reg_end(cfg) for cfg in cfgs), default=0)
+
+    for cfg in cfgs:
+        if is_function_cfg(cfg):
+            construct_ssa(cfg, reg_end)
+
+    return cfgs
+
+def destruct_program_ssa(cfgs: list[ircfg.ControlFlowGraph]) -> ir_types.StepList:
+    next_label = max((find_label_end(cfg.get_steps()) for cfg in cfgs), default=0)
+    reg_end = max((find_reg_end(cfg) for cfg in cfgs), default=0)
+    steps: ir_types.StepList = []
+
+    for cfg in cfgs:
+        if is_function_cfg(cfg):
+            next_label = destruct_ssa(cfg, next_label, reg_start=reg_end)
+
+        steps.extend(cfg.get_steps())
+
+    return steps
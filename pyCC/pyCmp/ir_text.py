@@ -0,0 +1,150 @@
+"""
+    ir_text.py\n
+    Added by DrkWithT\n
+    Defines the line-oriented text form of IR, its printer, and its streaming reader.
+"""
+
+from typing import Iterable, Iterator, TextIO
+import pyCC.pyCmp.ir_types as ir_types
+import pyCC.pyCmp.ir_gen as irgen
+
+## Text Form ##
+
+# NOTE one step per line, e.g:
+# @main:
+#     v0 = const 42
+#     v2 = ADD v0 v1
+#     jumpif L1 COMPARE_EQ v3 v2
+#     push v2
+#     v4 = call @twice
+# L1:
+#     v5 = phi v2 v4
+#     pcopy v6 v7 = v7 v6
+#     return
+# Ops are IROp names, registers are `v<n>`, and lines starting with ';' are comments. Phi operands follow the order of their block's preds, see ir_cfg.
+
+IR_TEXT_HEADER = '; pyCC IR 1'
+
+def format_step(step: ir_types.IRStep) -> str:
+    step_type = step.get_ir_type()
+
+    if step_type == ir_types.IRType.LABEL:
+        return f'{ir_types.format_label(step.title)}:'
+    elif step_type == ir_types.IRType.RETURN:
+        return '    return'
+    elif step_type == ir_types.IRType.JUMP:
+        return f'    jump {ir_types.format_label(step.target)}'
+    elif step_type == ir_types.IRType.JUMP_IF:
+        return f'    jumpif {ir_types.format_label(step.target)} {step.op.name} {ir_types.format_vreg(step.arg0)} {ir_types.format_vreg(step.arg1)}'
+    elif step_type == ir_types.IRType.ARGV_PUSH:
+        return f'    push {ir_types.format_vreg(step.arg)}'
+    elif step_type == ir_types.IRType.FUNC_CALL:
+        if step.dest is None:
+            return f'    call {ir_types.format_label(step.callee)}'
+
+        return f'    {ir_types.format_vreg(step.dest)} = call {ir_types.format_label(step.callee)}'
+    elif step_type == ir_types.IRType.ADDR_ASSIGN:
+        operands = ' '.join(ir_types.format_vreg(operand) for operand in step.operands)
+        return f'    {ir_types.format_vreg(step.dest)} = {step.op.name} {operands}'
+    elif step_type == ir_types.IRType.LOAD_CONSTANT:
+        return f'    {ir_types.format_vreg(step.addr)} = const {step.value}'
+    elif step_type == ir_types.IRType.PHI:
+        operands = ' '.join(ir_types.format_vreg(operand) for operand in step.operands)
+        return f'    {ir_types.format_vreg(step.dest)} = phi {operands}'
+    elif step_type == ir_types.IRType.PARALLEL_COPY:
+        dests = ' '.join(ir_types.format_vreg(dest) for dest in step.dests)
+        srcs = ' '.join(ir_types.format_vreg(src) for src in step.srcs)
+        return f'    pcopy {dests} = {srcs}'
+
+    raise ValueError(f'Cannot print IR step of type {step_type}!')
+
+def write_ir(steps: Iterable[ir_types.IRStep], out: TextIO):
+    out.write(IR_TEXT_HEADER)
+    out.write('\n')
+
+    for step in steps:
+        out.write(format_step(step))
+        out.write('\n')
+
+## Reader ##
+
+def parse_label(text: str) -> ir_types.JumpLabel | str:
+    if text[0] == '@':
+        return text[1:]
+    elif text[0] == 'L':
+        return int(text[1:])
+
+    raise ValueError(f'Invalid label {text}')
+
+def parse_vreg(text: str) -> ir_types.VReg:
+    if text[0] != 'v':
+        raise ValueError(f'Invalid register {text}')
+
+    return int(text[1:])
+
+def parse_op(text: str) -> ir_types.IROp:
+    op = ir_types.IROp.__members__.get(text)
+
+    if op is None:
+        raise ValueError(f'Invalid op {text}')
+
+    return op
+
+def parse_ir_line(line: str) -> ir_types.IRStep | None:
+    """
+        Turns one line of IR text back into its step, or None for a blank or comment line.
+    """
+    words = line.split()
+
+    if len(words) == 0 or words[0][0] == ';':
+        return None
+
+    head = words[0]
+
+    if len(words) == 1 and head[-1] == ':':
+        return irgen.IRLabel(parse_label(head[:-1]))
+    elif head == 'return' and len(words) == 1:
+        return irgen.IRReturn()
+    elif head == 'jump' and len(words) == 2:
+        return irgen.IRJump(parse_label(words[1]))
+    elif head == 'jumpif' and len(words) == 5:
+        return irgen.IRJumpIf(parse_label(words[1]), parse_op(words[2]), parse_vreg(words[3]), parse_vreg(words[4]))
+    elif head == 'push' and len(words) == 2:
+        return irgen.IRPushArg(parse_vreg(words[1]))
+    elif head == 'call' and len(words) == 2:
+        return irgen.IRCallFunc(parse_label(words[1]))
+    elif head == 'pcopy' and '=' in words:
+        split_i = words.index('=')
+        dests = [parse_vreg(word) for word in words[1: split_i]]
+        srcs = [parse_vreg(word) for word in words[split_i + 1:]]
+
+        if len(dests) == len(srcs):
+            return irgen.IRParallelCopy(dests, srcs)
+    elif len(words) >= 4 and words[1] == '=':
+        dest = parse_vreg(head)
+        rhs_head = words[2]
+
+        if rhs_head == 'const' and len(words) == 4:
+            return irgen.IRLoadConst(dest, int(words[3]))
+        elif rhs_head == 'call' and len(words) == 4:
+            return irgen.IRCallFunc(parse_label(words[3]), dest)
+        elif rhs_head == 'phi':
+            return irgen.IRPhi(dest, [parse_vreg(word) for word in words[3:]])
+        elif len(words) <= 5:
+            return irgen.IRAssign(dest, parse_op(rhs_head), [parse_vreg(word) for word in words[3:]])
+
+    raise ValueError('Invalid IR step')
+
+def read_ir(lines: Iterable[str]) -> Iterator[ir_types.IRStep]:
+    """
+        Lazily reads IR steps from lines of IR text, e.g an open file, without holding the whole text.\n
+        NOTE raises ValueError naming the line of the first malformed step.
+    """
+    for line_no, line in enumerate(lines, 1):
+        try:
+            step = parse_ir_line(line)
+        except (ValueError, IndexError) as error:
+            raise ValueError(f'Bad IR at line {line_no}: {line.strip()} ({error})') from None
+
+        if step is not None:
+            yield step
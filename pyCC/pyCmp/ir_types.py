@@ -18,6 +18,8 @@ class IRType(Enum):
     ADDR_DECLARE = auto()  # <addr> = <expr>
     ADDR_ASSIGN = auto()   # <addr> = <addr> <op> <addr>
     LOAD_CONSTANT = auto() # $<integral>
+    PHI = auto()           # <addr> = phi <addr>... (SSA form only)
+    PARALLEL_COPY = auto() # <addr>... = <addr>... (SSA destruction only)
 
 class IROp(Enum):
     CALL = auto()
@@ -75,3 +77,13 @@ class IRStep:
         pass
 
 StepList = list[IRStep]
+
+VReg = int # NOTE represents a virtual register... it only gets a name like `v3` when printed.
+JumpLabel = int # NOTE represents a generated jump target, printed as `L<n>`, while a function's label is its name printed as `@<name>`.
+
+def format_vreg(reg: VReg) -> str:
+    return f'v{reg}'
+
+def format_label(label: JumpLabel | str) -> str:
+    return f'@{label}' if type(label) is str else f'L{label}'
+
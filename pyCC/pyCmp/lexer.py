@@ -3,12 +3,26 @@
     Refactor lexer to recognize more tokens flexibly.
 """
 
+import re
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from bisect import bisect_left, bisect_right
 from enum import Enum, auto
 
+try:
+    import numpy as np
+except ImportError:
+    np = None # NOTE only LexerEngine.VECTOR needs numpy.
+
 ## Types & Aliases ##
 
 OPERATOR_SYMBOLS = '+-*/!=&|<>'
 
+class LexerEngine(Enum):
+    CLASSIC = auto() # NOTE char-by-char scanning with the lex_* helpers
+    REGEX = auto()   # NOTE one compiled master pattern walked by re.match
+    VECTOR = auto()  # NOTE bulk numpy classification of the whole source, see vector_tokenize
+
 class TokenType(Enum):
     SPACING = auto()
     LINE_COMMENT = auto()
@@ -43,12 +57,15 @@ class TokenType(Enum):
 # NOTE represents a hashmap of reserved words in C to lexical type.
 LexemeTable = dict[str, TokenType]
 
-# NOTE represents a line,col pair.
-TokenPos = tuple[int, int]
+# NOTE represents a source offset of a token's first char... see Lexer.resolve_position for a line, col pair.
+TokenPos = int
 
 # NOTE represents a token containing a lexeme, type, and position... None means EOF!
 TokenObj = tuple[str, TokenPos, TokenType] | None
 
+# NOTE represents what the AST keeps of a literal token: type, decoded value or symbol id, and spelling only for names.
+LiteralToken = tuple[TokenType, int, str | None]
+
 ## Constants ##
 
 PYCC_KEYWORDS = {
@@ -96,46 +113,568 @@ def match_numeric(symbol: str) -> bool:
 def match_op_symbol(symbol: str) -> bool:
     return OPERATOR_SYMBOLS.find(symbol[0]) != -1
 
+def build_line_starts(source: str) -> list[int]:
+    """
+        Gives the offset of each line's first char, built once per source for lazy position lookups.
+    """
+    line_starts = [0]
+    newline_at = source.find('\n')
+
+    while newline_at != -1:
+        line_starts.append(newline_at + 1)
+        newline_at = source.find('\n', newline_at + 1)
+
+    return line_starts
+
+def build_master_pattern(keywords: LexemeTable, typenames: LexemeTable, operators: LexemeTable) -> re.Pattern:
+    """
+        Combines every lexical rule into one alternation whose branch order mirrors `Lexer.lex_next`.\n
+        NOTE reserved words must not be followed by a word character, and known operators must not be followed by another operator symbol since the classic engine lexes maximal runs.
+    """
+    word_end = r'(?![^\W\d])'
+    op_class = f'[{re.escape(OPERATOR_SYMBOLS)}]'
+    by_length = lambda lexeme: (-len(lexeme), lexeme)
+
+    reserved_words = '|'.join(re.escape(word) for word in sorted(keywords, key=by_length))
+    type_words = '|'.join(re.escape(word) for word in sorted(typenames, key=by_length))
+    op_symbols = '|'.join(re.escape(op) for op in sorted(operators, key=by_length))
+
+    rules = [
+        r'(?P<SINGLE>[,;(){}])',
+        r'(?P<COMMENT>//[^\n]*)',
+        r"(?P<CHAR>'[\s\S][\s\S])",
+        r'(?P<SPACING>\s+)',
+        f'(?P<KEYWORD>(?:{reserved_words}){word_end})' if reserved_words else None,
+        f'(?P<TYPENAME>(?:{type_words}){word_end})' if type_words else None,
+        r'(?P<IDENTIFIER>[^\W\d]+)',
+        r'(?P<NUMBER>\d+)',
+        f'(?P<OPERATOR>(?:{op_symbols})(?!{op_class}))' if op_symbols else None,
+        f'(?P<BAD_OPERATOR>{op_class}+)',
+        r'(?P<UNKNOWN>[\s\S])'
+    ]
+
+    return re.compile('|'.join(rule for rule in rules if rule is not None))
+
+SINGLE_SYMBOL_TYPES = {
+    ",": TokenType.COMMA,
+    ";": TokenType.SEMICOLON,
+    "(": TokenType.PAREN_OPEN,
+    ")": TokenType.PAREN_CLOSE,
+    "{": TokenType.BRACE_OPEN,
+    "}": TokenType.BRACE_CLOSE
+}
+
+# NOTE master pattern rules whose lexeme alone decides the token kind, see Lexer.lexeme_codes.
+FIXED_SPELLING_RULES = frozenset(['SINGLE', 'OPERATOR', 'KEYWORD', 'TYPENAME'])
+
+# NOTE matches whole spans that can't hold a brace token in one go: only comments, char literals, and operator runs (which may swallow a '//') need care, since nothing else can hide a brace.
+BRACE_SKIP_PATTERN = re.compile(
+    r'(?P<BRACE>[{}])'
+    r'|//[^\n]*'
+    r"|'[\s\S][\s\S]"
+    f'|[{re.escape(OPERATOR_SYMBOLS)}]+'
+    f"|[^{{}}'{re.escape(OPERATOR_SYMBOLS)}]+"
+    r'|[\s\S]'
+)
+
+# NOTE like BRACE_SKIP_PATTERN, but a ';' is split out too, since any top-level ';' or '}' ends a declaration.
+SHARD_SCAN_PATTERN = re.compile(
+    r'(?P<BRACE>[{}])'
+    r'|(?P<END>;)'
+    r'|//[^\n]*'
+    r"|'[\s\S][\s\S]"
+    f'|[{re.escape(OPERATOR_SYMBOLS)}]+'
+    f"|[^{{}};'{re.escape(OPERATOR_SYMBOLS)}]+"
+    r'|[\s\S]'
+)
+
+## Vectorized Scanning ##
+
+# NOTE char classes for the vectorized scanner... runs of SPACE, ALPHA, DIGIT, and OP chars merge into 1 token each.
+CLASS_OTHER = 0
+CLASS_SPACE = 1
+CLASS_ALPHA = 2
+CLASS_DIGIT = 3
+CLASS_OP = 4
+CLASS_SINGLE = 5
+CLASS_QUOTE = 6
+
+def build_class_table() -> list[int]:
+    """
+        Builds the 256-entry byte class table with the same predicates as `match_*`. NOTE bytes >= 0x80 stay CLASS_OTHER, so the vectorized engine only agrees with the classic one on ASCII sources.
+    """
+    table = [CLASS_OTHER] * 256
+
+    for code in range(128):
+        symbol = chr(code)
+
+        if match_spacing(symbol):
+            table[code] = CLASS_SPACE
+        elif match_alphabetic(symbol):
+            table[code] = CLASS_ALPHA
+        elif match_numeric(symbol):
+            table[code] = CLASS_DIGIT
+        elif match_op_symbol(symbol):
+            table[code] = CLASS_OP
+        elif symbol in SINGLE_SYMBOL_TYPES:
+            table[code] = CLASS_SINGLE
+        elif symbol == '\'':
+            table[code] = CLASS_QUOTE
+
+    return table
+
+BYTE_CLASSES = build_class_table()
+
+TOKEN_TYPES_BY_CODE = [None] + [token_type for token_type in TokenType]
+
+def build_kind_table() -> list[int]:
+    """
+        Maps a token's first byte to its `TokenType` code. NOTE words and operator runs get a placeholder code which is resolved by lookups later.
+    """
+    class_kinds = {
+        CLASS_OTHER: TokenType.UNKNOWN,
+        CLASS_SPACE: TokenType.SPACING,
+        CLASS_ALPHA: TokenType.IDENTIFIER,
+        CLASS_DIGIT: TokenType.LITERAL_INT,
+        CLASS_OP: TokenType.OP_ASSIGN,
+        CLASS_QUOTE: TokenType.UNKNOWN
+    }
+    table = []
+
+    for code in range(256):
+        byte_class = BYTE_CLASSES[code]
+
+        if byte_class == CLASS_SINGLE:
+            table.append(SINGLE_SYMBOL_TYPES[chr(code)].value)
+        else:
+            table.append(class_kinds[byte_class].value)
+
+    return table
+
+BYTE_KINDS = build_kind_table()
+
+def vector_scan(codes, source: str, keywords: LexemeTable, typenames: LexemeTable, operators: LexemeTable) -> tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+        Finds all token spans of a source at once, giving arrays of `TokenType` codes, start offsets, and end offsets. Spans of comments and char literals include their '//' and quotes.\n
+        `codes` is a uint8 array of the source and `source` is its 1 char per byte text. Token boundaries are found with numpy over the whole buffer, so Python code only runs per word / operator or per comment / char literal:\n
+        1. Split the buffer into runs of equal byte class. SINGLE, QUOTE, and OTHER bytes always start a run.
+        2. Walk only quotes and '//' run starts to place comments and char literals, which may swallow several runs.
+        3. Resolve reserved words and operators in one batched lookup.
+    """
+    limit = len(codes)
+
+    if limit == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return (empty.astype(np.int32), empty, empty)
+
+    classes = np.asarray(BYTE_CLASSES, dtype=np.uint8)[codes]
+    token_flags = np.empty(limit, dtype=bool)
+    token_flags[0] = True
+    np.not_equal(classes[1:], classes[:-1], out=token_flags[1:])
+    token_flags |= classes >= CLASS_SINGLE
+    token_flags |= classes == CLASS_OTHER
+
+    ## Pass 1: comments & char literals ##
+    slash_pairs = np.flatnonzero((codes[:-1] == 47) & (codes[1:] == 47) & token_flags[:-1])
+    quotes = np.flatnonzero(codes == 39)
+    candidates = np.concatenate((slash_pairs, quotes))
+    candidates.sort()
+
+    special_starts: list[int] = []
+    special_ends: list[int] = []
+    covered_until = 0
+
+    for pos in candidates.tolist():
+        if pos < covered_until:
+            continue
+
+        while pos < limit:
+            if source[pos] == '\'':
+                if pos + 3 > limit:
+                    break
+
+                end = pos + 3
+            else:
+                end = source.find('\n', pos)
+                end = limit if end == -1 else end
+
+            special_starts.append(pos)
+            special_ends.append(end)
+            covered_until = end
+
+            # NOTE a char literal may end inside an operator run which then starts a comment.
+            if end < limit and not token_flags[end] and source.startswith('//', end):
+                pos = end
+                continue
+
+            break
+
+    if special_starts:
+        nesting = np.zeros(limit + 1, dtype=np.int32)
+        np.add.at(nesting, np.asarray(special_starts) + 1, 1)
+        np.add.at(nesting, np.asarray(special_ends), -1)
+        token_flags &= np.cumsum(nesting[:-1]) == 0
+        token_flags[special_starts] = True
+        token_flags[[end for end in special_ends if end < limit]] = True
+
+    starts = np.flatnonzero(token_flags)
+    ends = np.append(starts[1:], limit)
+    kinds = np.asarray(BYTE_KINDS, dtype=np.int32)[codes[starts]]
+
+    ## Pass 2: batched word & operator resolution ##
+    starts_list = starts.tolist()
+    ends_list = ends.tolist()
+
+    for token_i in np.flatnonzero(kinds == TokenType.IDENTIFIER.value).tolist():
+        lexeme = source[starts_list[token_i]: ends_list[token_i]]
+        reserved_type = keywords.get(lexeme) or typenames.get(lexeme)
+
+        if reserved_type is not None:
+            kinds[token_i] = reserved_type.value
+
+    for token_i in np.flatnonzero(kinds == TokenType.OP_ASSIGN.value).tolist():
+        known_op = operators.get(source[starts_list[token_i]: ends_list[token_i]])
+        kinds[token_i] = TokenType.UNKNOWN.value if known_op is None else known_op.value
+
+    for token_i in np.searchsorted(starts, special_starts).tolist():
+        token_start = starts_list[token_i]
+
+        if source[token_start] == '/':
+            kinds[token_i] = TokenType.LINE_COMMENT.value
+        elif source[token_start + 2] == '\'':
+            kinds[token_i] = TokenType.LITERAL_CHAR.value
+
+    return (kinds, starts, ends)
+
+def vector_tokenize(codes, source: str, keywords: LexemeTable, typenames: LexemeTable, operators: LexemeTable) -> tuple[list[TokenObj], list[int]]:
+    """
+        Tokenizes a whole source at once with `vector_scan`, giving the tokens and their end offsets.
+    """
+    kinds, starts, ends = vector_scan(codes, source, keywords, typenames, operators)
+    starts_list = starts.tolist()
+    ends_list = ends.tolist()
+    lexemes = [source[start: end] for start, end in zip(starts_list, ends_list)]
+
+    for token_i in np.flatnonzero(kinds == TokenType.LINE_COMMENT.value).tolist():
+        lexemes[token_i] = lexemes[token_i][2:]
+
+    for token_i in np.flatnonzero((kinds == TokenType.LITERAL_CHAR.value) | (kinds == TokenType.UNKNOWN.value)).tolist():
+        lexeme = lexemes[token_i]
+
+        if lexeme[0] == '\'' and len(lexeme) == 3:
+            lexemes[token_i] = lexeme[1] if lexeme[2] == '\'' else '\0'
+
+    token_types = [TOKEN_TYPES_BY_CODE[code] for code in kinds.tolist()]
+
+    return (list(zip(lexemes, starts_list, token_types)), ends_list)
+
+## Symbol Interning ##
+
+class SymbolInterner:
+    """
+        Hands out a small integer id per distinct identifier spelling of one compilation, so later passes can key their tables by ints instead of fresh string slices.\n
+        NOTE ids start at 1 since 0 means "no symbol" in token value columns and AST nodes.
+    """
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.names: list[str] = [None]
+
+    def __len__(self) -> int:
+        return len(self.names) - 1
+
+    def intern(self, name: str) -> int:
+        symbol_id = self.ids.get(name)
+
+        if symbol_id is None:
+            symbol_id = len(self.names)
+            self.ids[name] = symbol_id
+            self.names.append(name)
+
+        return symbol_id
+
+    def get_name(self, symbol_id: int) -> str | None:
+        return self.names[symbol_id]
+
+    def clear(self):
+        """
+            NOTE forgets all names in place, so ids start at 1 again for the next compilation without a new interner.
+        """
+        self.ids.clear()
+        del self.names[1:]
+
+## Token Storage ##
+
+# NOTE code 0 marks the EOF sentinel at the end of a TokenBuffer.
+EOF_CODE = 0
+
+# NOTE marks a literal value too wide for the int64 values column, kept in the `big_values` side table instead. Literal values are never negative, so the marker can't clash with one.
+BIG_VALUE = -1
+
+def decode_token_value(token_type: TokenType, lexeme: str) -> int:
+    if token_type == TokenType.LITERAL_INT:
+        return int(lexeme)
+    elif token_type == TokenType.LITERAL_CHAR:
+        return ord(lexeme[0])
+
+    return 0
+
+class TokenBuffer:
+    """
+        A struct-of-arrays token stream over one source: parallel columns of kind code, start offset, length, and decoded literal value per token.\n
+        NOTE lexemes are only sliced from the source when a caller asks for them, and the buffer always ends with an EOF sentinel.
+    """
+    def __init__(self):
+        self.source: str = ''
+        self.kinds = array('i')
+        self.starts = array('i')
+        self.lengths = array('i')
+        self.values = array('q')
+        # NOTE values of integer literals past int64 by token index, see BIG_VALUE.
+        self.big_values: dict[int, int] = {}
+
+    def reset(self, source: str):
+        self.source = source
+        self.kinds = array('i')
+        self.starts = array('i')
+        self.lengths = array('i')
+        self.values = array('q')
+        self.big_values = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def push(self, kind: int, start: int, length: int, value: int):
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.lengths.append(length)
+
+        try:
+            self.values.append(value)
+        except OverflowError:
+            self.big_values[len(self.values)] = value
+            self.values.append(BIG_VALUE)
+
+    def extend(self, kinds: list[int], starts: list[int], lengths: list[int], values: list[int]):
+        self.kinds.extend(kinds)
+        self.starts.extend(starts)
+        self.lengths.extend(lengths)
+        values_start = len(self.values)
+
+        try:
+            self.values.extend(values)
+        except OverflowError:
+            # NOTE a failed extend may have kept some values, so the batch is redone one value at a time.
+            del self.values[values_start:]
+
+            for value in values:
+                try:
+                    self.values.append(value)
+                except OverflowError:
+                    self.big_values[len(self.values)] = value
+                    self.values.append(BIG_VALUE)
+
+    def push_eof(self):
+        self.push(EOF_CODE, len(self.source), 0, 0)
+
+    def get_kind(self, token_i: int) -> TokenType | None:
+        return TOKEN_TYPES_BY_CODE[self.kinds[token_i]]
+
+    def get_lexeme(self, token_i: int) -> str:
+        token_start = self.starts[token_i]
+        return self.source[token_start: token_start + self.lengths[token_i]]
+
+    def get_value(self, token_i: int) -> int:
+        value = self.values[token_i]
+        return value if value != BIG_VALUE else self.big_values[token_i]
+
+    def get_offset(self, token_i: int) -> TokenPos:
+        return self.starts[token_i]
+
+    def get_token(self, token_i: int) -> TokenObj:
+        if self.kinds[token_i] == EOF_CODE:
+            return None
+
+        return (self.get_lexeme(token_i), self.starts[token_i], self.get_kind(token_i))
+
+    def get_literal_token(self, token_i: int) -> LiteralToken:
+        token_type = self.get_kind(token_i)
+        token_name = self.get_lexeme(token_i) if token_type == TokenType.IDENTIFIER else None
+
+        return (token_type, self.get_value(token_i), token_name)
+
+class TokenRing:
+    """
+        A fixed-size struct-of-arrays window over a token stream, refilled from a `Lexer` in batches as the parser moves on. Its columns match `TokenBuffer`'s, but token indexes are absolute and wrap onto `capacity` slots.\n
+        NOTE slots are reused once the reader moves past them, so memory stays constant no matter the source length.
+    """
+    def __init__(self, capacity: int = 32):
+        if capacity < 4 or capacity & (capacity - 1) != 0:
+            raise ValueError('TokenRing capacity must be a power of 2, at least 4!')
+
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.source: str = ''
+        self.lexer: Lexer = None
+        self.kinds = array('i', [EOF_CODE]) * capacity
+        self.starts = array('i', [0]) * capacity
+        self.lengths = array('i', [0]) * capacity
+        self.values = array('q', [0]) * capacity
+        # NOTE values of integer literals past int64 by slot, see BIG_VALUE... a slot's entry is only read while its value is the marker.
+        self.big_values: dict[int, int] = {}
+        # NOTE count of tokens lexed so far, so tokens [count - capacity, count) are readable.
+        self.count: int = 0
+        self.done: bool = False
+
+    def reset(self, source: str, lexer):
+        self.source = source
+        self.lexer = lexer
+        self.count = 0
+        self.done = False
+
+    def __len__(self) -> int:
+        return self.count
+
+    def push(self, kind: int, start: int, length: int, value: int):
+        slot = self.count & self.mask
+        self.kinds[slot] = kind
+        self.starts[slot] = start
+        self.lengths[slot] = length
+
+        try:
+            self.values[slot] = value
+        except OverflowError:
+            self.big_values[slot] = value
+            self.values[slot] = BIG_VALUE
+
+        self.count += 1
+
+    def extend(self, kinds: list[int], starts: list[int], lengths: list[int], values: list[int]):
+        for token_i in range(len(kinds)):
+            self.push(kinds[token_i], starts[token_i], lengths[token_i], values[token_i])
+
+    def push_eof(self):
+        self.push(EOF_CODE, len(self.source), 0, 0)
+        self.done = True
+
+    def fill(self, token_i: int, keep_from: int) -> int:
+        """
+            Lexes ahead until `token_i` is buffered, never overwriting tokens from `keep_from` on. Gives the slot of `token_i`, or of the EOF sentinel if the stream ends first.
+        """
+        if token_i - keep_from >= self.capacity:
+            raise ValueError(f'Lookahead of {token_i - keep_from} tokens exceeds the ring capacity of {self.capacity}!')
+
+        while self.count <= token_i:
+            if self.done:
+                return (self.count - 1) & self.mask
+
+            self.lexer.lex_into(self, keep_from + self.capacity - self.count)
+
+        return token_i & self.mask
+
+    def get_kind(self, token_i: int) -> TokenType | None:
+        return TOKEN_TYPES_BY_CODE[self.kinds[token_i & self.mask]]
+
+    def get_lexeme(self, token_i: int) -> str:
+        slot = token_i & self.mask
+        token_start = self.starts[slot]
+        return self.source[token_start: token_start + self.lengths[slot]]
+
+    def get_value(self, token_i: int) -> int:
+        slot = token_i & self.mask
+        value = self.values[slot]
+        return value if value != BIG_VALUE else self.big_values[slot]
+
+    def get_offset(self, token_i: int) -> TokenPos:
+        return self.starts[token_i & self.mask]
+
+    def get_literal_token(self, token_i: int) -> LiteralToken:
+        token_type = self.get_kind(token_i)
+        token_value = self.get_value(token_i)
+        # NOTE names come back as the interner's one shared string, not a new slice per use.
+        token_name = self.lexer.symbols.get_name(token_value) if token_type == TokenType.IDENTIFIER else None
+
+        return (token_type, token_value, token_name)
+
 class Lexer:
     """
         A tokenizer for a tiny part of C99?? O_O
     """
-    def __init__(self, keywords: LexemeTable = PYCC_KEYWORDS, typenames: LexemeTable = PYCC_TYPENAMES, operators: LexemeTable = PYCC_OPERATORS) -> None:
-        self.keyword_table = keywords
-        self.types_table = typenames
-        self.operator_table = operators
+    def __init__(self, keywords: LexemeTable = None, typenames: LexemeTable = None, operators: LexemeTable = None, engine: LexerEngine = LexerEngine.CLASSIC, symbols: SymbolInterner = None) -> None:
+        # NOTE each lexer copies its tables, so no caller can change another lexer's tables through a shared dict.
+        self.keyword_table = dict(keywords if keywords is not None else PYCC_KEYWORDS)
+        self.types_table = dict(typenames if typenames is not None else PYCC_TYPENAMES)
+        self.operator_table = dict(operators if operators is not None else PYCC_OPERATORS)
+        # NOTE kind codes of every fixed spelling by lexeme, so the regex engine skips Enum lookups per token.
+        self.lexeme_codes: dict[str, int] = {lexeme: token_type.value for table in (SINGLE_SYMBOL_TYPES, self.keyword_table, self.types_table, self.operator_table) for lexeme, token_type in table.items()}
+        self.engine = engine
+        self.master_pattern: re.Pattern = None
+        # NOTE identifier tokens carry their id from this interner as their value.
+        self.symbols = symbols if symbols is not None else SymbolInterner()
+
+        # NOTE LexerEngine.VECTOR state: source bytes, then tokens with their end offsets plus a start offset to token index map once lex_next needs them.
+        self.source_codes = None
+        self.bulk_tokens: list[TokenObj] = None
+        self.bulk_ends: list[int] = []
+        self.bulk_index: dict[int, int] = {}
+        self.bulk_columns: tuple[list[int], list[int], list[int], list[int], list[int]] = None
+        self.bulk_cursor: int = 0
+
+        if engine == LexerEngine.REGEX:
+            self.master_pattern = build_master_pattern(self.keyword_table, self.types_table, self.operator_table)
+        elif engine == LexerEngine.VECTOR and np is None:
+            raise ImportError('LexerEngine.VECTOR requires numpy!')
+
         self.source_view: str = None
-        self.token_hops: list[int] = []
+        self.line_starts: list[int] = None
         self.pos: int = 0
         self.limit: int = 0
-        self.line: int = 1;
-        self.column: int = 1;
 
     def use_source(self, source: str):
         self.source_view = source
+        self.source_codes = None
+        self.line_starts = None
         self.pos = 0
         self.limit = len(source)
-        self.line = 1
-        self.column = 1
 
-    def record_hop(self, hop_span: int):
-        self.token_hops.append(hop_span)
+        if self.engine == LexerEngine.VECTOR:
+            # NOTE latin-1 with replacement keeps exactly 1 byte per char, so offsets stay aligned with the text.
+            self.source_codes = np.frombuffer(source.encode('latin-1', errors='replace'), dtype=np.uint8)
+            self.bulk_tokens = None
+            self.bulk_columns = None
+
+    def use_buffer(self, buffer):
+        """
+            Loads source bytes from any buffer e.g `bytes` or an `mmap.mmap` of a file. The vectorized engine classifies them in place without a copy.
+        """
+        if self.engine != LexerEngine.VECTOR:
+            self.use_source(str(buffer, 'latin-1'))
+            return
+
+        self.source_codes = np.frombuffer(buffer, dtype=np.uint8)
+        self.source_view = str(buffer, 'latin-1')
+        self.line_starts = None
+        self.pos = 0
+        self.limit = len(self.source_codes)
+        self.bulk_tokens = None
+        self.bulk_columns = None
 
-    def unwind_hop(self):
-        hop_n = len(self.token_hops)
+    def load_bulk_tokens(self):
+        self.bulk_tokens, self.bulk_ends = vector_tokenize(self.source_codes, self.source_view, self.keyword_table, self.types_table, self.operator_table)
+        self.bulk_index = {token[1]: token_i for token_i, token in enumerate(self.bulk_tokens)}
 
-        if hop_n == 0:
-            return
+    def resolve_position(self, offset: TokenPos) -> tuple[int, int]:
+        """
+            Gives the 1-based (line, column) of a source offset. NOTE the line start table is only built on the first call per source.
+        """
+        if self.line_starts is None:
+            if self.source_codes is not None:
+                self.line_starts = [0] + (np.flatnonzero(self.source_codes == 10) + 1).tolist()
+            else:
+                self.line_starts = build_line_starts(self.source_view)
 
-        self.pos -= self.token_hops[hop_n - 1]
-        self.token_hops.pop()
+        line_i = bisect_right(self.line_starts, offset) - 1
 
-    def update_tracked_loc(self, symbol: str) -> None:
-        if symbol[0] == '\n':
-            self.line += 1
-            self.column = 0
-        else:
-            self.column += 1
+        return (line_i + 1, offset - self.line_starts[line_i] + 1)
 
     def at_end(self) -> bool:
         return self.pos >= self.limit
@@ -150,21 +689,18 @@ class Lexer:
             if not match_spacing(c):
                 break
 
-            self.update_tracked_loc(c)
             self.pos += 1
             token_length += 1
 
-        self.record_hop(token_length)
-
         return (
             self.source_view[token_start: token_start + token_length],
-            (self.line, self.column),
+            token_start,
             TokenType.SPACING
         )
 
     def lex_comment(self) -> TokenObj:
-        self.pos += 2 # skip '//'
         token_start = self.pos
+        self.pos += 2 # skip '//'
         token_length = 0
 
         while not self.at_end():
@@ -173,51 +709,36 @@ class Lexer:
             if c == '\n':
                 break
 
-            self.update_tracked_loc(c)
             self.pos += 1
             token_length += 1
 
-        self.record_hop(token_length + 2)
-
         return (
-            self.source_view[token_start: token_start + token_length],
-            (self.line, self.column - token_length),
+            self.source_view[token_start + 2: token_start + 2 + token_length],
+            token_start,
             TokenType.LINE_COMMENT
         )
 
     def lex_single(self, token_type: TokenType) -> TokenObj:
         token_start = self.pos
         self.pos += 1
-        self.update_tracked_loc(self.source_view[self.pos - 1])
-
-        self.record_hop(1)
 
         return (
             self.source_view[token_start: token_start + 1],
-            (self.line, self.column - 1),
+            token_start,
             token_type
         )
 
     def lex_char(self) -> TokenObj:
-        self.update_tracked_loc(self.source_view[self.pos])
-        self.pos += 1
-
         token_start = self.pos
-        self.update_tracked_loc(self.source_view[self.pos])
-        self.pos += 1
-
-        maybe_closing_quote = self.source_view[self.pos]
-        self.update_tracked_loc(maybe_closing_quote)
-        self.pos += 1
-
-        self.record_hop(3)
+        maybe_closing_quote = self.source_view[self.pos + 2]
+        self.pos += 3
 
         if maybe_closing_quote != '\'':
-            return ('\0', (self.line, self.column - 3), TokenType.UNKNOWN)
+            return ('\0', token_start, TokenType.UNKNOWN)
 
         return (
-            self.source_view[token_start: token_start + 1],
-            (self.line, self.column - 3),
+            self.source_view[token_start + 1: token_start + 2],
+            token_start,
             TokenType.LITERAL_CHAR
         )
 
@@ -231,12 +752,9 @@ class Lexer:
             if not match_alphabetic(c):
                 break
 
-            self.update_tracked_loc(c)
             self.pos += 1
             token_length += 1
 
-        self.record_hop(token_length)
-
         lexeme = self.source_view[token_start: token_start + token_length]
         token_type = TokenType.UNKNOWN
 
@@ -249,14 +767,13 @@ class Lexer:
 
         return (
             lexeme,
-            (self.line, self.column - token_length),
+            token_start,
             token_type
         )
     
     def lex_number(self) -> TokenObj:
         token_start = self.pos
         token_length = 0
-        dots = 0
 
         while not self.at_end():
             c = self.source_view[self.pos]
@@ -264,19 +781,12 @@ class Lexer:
             if not match_numeric(c):
                 break
 
-            self.update_tracked_loc(c)
-
-            if c == '.':
-                dots += 1
-
             self.pos += 1
             token_length += 1
 
-        self.record_hop(token_length)
-
         return (
             self.source_view[token_start: token_start + token_length],
-            (self.line, self.column - token_length),
+            token_start,
             TokenType.LITERAL_INT
         )
 
@@ -290,31 +800,224 @@ class Lexer:
             if not match_op_symbol(c):
                 break
 
-            self.update_tracked_loc(c)
             self.pos += 1
             token_length += 1
 
-        self.record_hop(token_length)
-
         lexeme = self.source_view[token_start: token_start + token_length]
 
-        if self.operator_table.get(lexeme) is None:
-            return (
-                lexeme,
-                (self.line, self.column - token_length),
-                TokenType.UNKNOWN
-            )
-
         return (
             lexeme,
-            (self.line, self.column),
-            self.operator_table.get(lexeme)
+            token_start,
+            self.operator_table.get(lexeme) or TokenType.UNKNOWN
         )
 
+    def lex_regex(self) -> TokenObj:
+        """
+            Scans the next token with the master pattern, giving the same tokens as the classic `lex_*` helpers.
+        """
+        token_start = self.pos
+        match = self.master_pattern.match(self.source_view, token_start)
+        rule = match.lastgroup
+        lexeme = match.group()
+
+        self.pos = match.end()
+
+        if rule == 'SPACING':
+            return (lexeme, token_start, TokenType.SPACING)
+        elif rule == 'IDENTIFIER':
+            return (lexeme, token_start, TokenType.IDENTIFIER)
+        elif rule == 'SINGLE':
+            return (lexeme, token_start, SINGLE_SYMBOL_TYPES[lexeme])
+        elif rule == 'NUMBER':
+            return (lexeme, token_start, TokenType.LITERAL_INT)
+        elif rule == 'OPERATOR':
+            return (lexeme, token_start, self.operator_table[lexeme])
+        elif rule == 'KEYWORD':
+            return (lexeme, token_start, self.keyword_table[lexeme])
+        elif rule == 'TYPENAME':
+            return (lexeme, token_start, self.types_table[lexeme])
+        elif rule == 'COMMENT':
+            return (lexeme[2:], token_start, TokenType.LINE_COMMENT)
+        elif rule == 'CHAR':
+            if lexeme[2] != '\'':
+                return ('\0', token_start, TokenType.UNKNOWN)
+
+            return (lexeme[1], token_start, TokenType.LITERAL_CHAR)
+
+        return (lexeme, token_start, TokenType.UNKNOWN)
+
+    def lex_into(self, tokens: TokenBuffer | TokenRing, max_count: int = -1):
+        """
+            Lexes up to `max_count` more tokens of the source into `tokens`, skipping spacing and comments, or the whole rest if `max_count` is negative. The EOF sentinel is appended once the source runs out. Only the regex & vector engines skip building a `TokenObj` per token.
+        """
+        pushed_count = 0
+
+        if self.engine == LexerEngine.REGEX:
+            pushed_count = self.lex_regex_into(tokens, max_count)
+        elif self.engine == LexerEngine.VECTOR:
+            pushed_count = self.lex_vector_into(tokens, max_count)
+        else:
+            while pushed_count != max_count:
+                temp = self.lex_next()
+
+                if temp is None:
+                    break
+
+                lexeme, token_start, token_type = temp
+
+                if token_type == TokenType.SPACING or token_type == TokenType.LINE_COMMENT:
+                    continue
+
+                # NOTE a char literal's lexeme sits between its quotes, and a bad one spans all 3 chars.
+                if token_type == TokenType.LITERAL_CHAR:
+                    tokens.push(token_type.value, token_start + 1, 1, ord(lexeme))
+                elif token_type == TokenType.UNKNOWN and lexeme == '\0':
+                    tokens.push(token_type.value, token_start, 3, 0)
+                elif token_type == TokenType.IDENTIFIER:
+                    tokens.push(token_type.value, token_start, len(lexeme), self.symbols.intern(lexeme))
+                else:
+                    tokens.push(token_type.value, token_start, len(lexeme), decode_token_value(token_type, lexeme))
+
+                pushed_count += 1
+
+        # NOTE a full batch leaves the sentinel for the next call.
+        if self.at_end() and pushed_count != max_count:
+            tokens.push_eof()
+
+    def lex_regex_into(self, tokens: TokenBuffer | TokenRing, max_count: int) -> int:
+        source = self.source_view
+        limit = self.limit
+        pos = self.pos
+        match_at = self.master_pattern.match
+        push = tokens.push
+        lexeme_codes = self.lexeme_codes
+        identifier_code = TokenType.IDENTIFIER.value
+        intern = self.symbols.intern
+        int_code = TokenType.LITERAL_INT.value
+        char_code = TokenType.LITERAL_CHAR.value
+        unknown_code = TokenType.UNKNOWN.value
+        pushed_count = 0
+
+        while pos < limit and pushed_count != max_count:
+            match = match_at(source, pos)
+            rule = match.lastgroup
+            token_start = pos
+            pos = match.end()
+
+            if rule == 'SPACING' or rule == 'COMMENT':
+                continue
+            elif rule == 'IDENTIFIER':
+                push(identifier_code, token_start, pos - token_start, intern(source[token_start: pos]))
+            elif rule in FIXED_SPELLING_RULES:
+                push(lexeme_codes[source[token_start: pos]], token_start, pos - token_start, 0)
+            elif rule == 'NUMBER':
+                push(int_code, token_start, pos - token_start, int(source[token_start: pos]))
+            elif rule == 'CHAR' and source[token_start + 2] == '\'':
+                push(char_code, token_start + 1, 1, ord(source[token_start + 1]))
+            else:
+                push(unknown_code, token_start, pos - token_start, 0)
+
+            pushed_count += 1
+
+        self.pos = pos
+
+        return pushed_count
+
+    def load_bulk_columns(self):
+        """
+            Scans the whole source with `vector_scan` once, keeping the kind, start, length, and value columns of non-spacing tokens plus each token's raw start for resuming. Identifier values are their interned ids.
+        """
+        codes = self.source_codes
+        kinds, starts, ends = vector_scan(codes, self.source_view, self.keyword_table, self.types_table, self.operator_table)
+
+        kept = (kinds != TokenType.SPACING.value) & (kinds != TokenType.LINE_COMMENT.value)
+        kinds = kinds[kept]
+        raw_starts = starts[kept]
+        starts = raw_starts.copy()
+        lengths = ends[kept] - starts
+        values = np.zeros(len(kinds), dtype=np.int64)
+
+        char_ids = np.flatnonzero(kinds == TokenType.LITERAL_CHAR.value)
+        starts[char_ids] += 1
+        lengths[char_ids] = 1
+        values[char_ids] = codes[starts[char_ids]]
+
+        starts_list = starts.tolist()
+        lengths_list = lengths.tolist()
+        # NOTE a list, since integer literals may not fit int64... see BIG_VALUE.
+        values_list = values.tolist()
+        source = self.source_view
+
+        for token_i in np.flatnonzero(kinds == TokenType.LITERAL_INT.value).tolist():
+            token_start = starts_list[token_i]
+            values_list[token_i] = int(source[token_start: token_start + lengths_list[token_i]])
+
+        intern = self.symbols.intern
+
+        for token_i in np.flatnonzero(kinds == TokenType.IDENTIFIER.value).tolist():
+            token_start = starts_list[token_i]
+            values_list[token_i] = intern(source[token_start: token_start + lengths_list[token_i]])
+
+        self.bulk_columns = (kinds.tolist(), starts_list, lengths_list, values_list, raw_starts.tolist())
+        self.bulk_cursor = 0
+
+    def lex_vector_into(self, tokens: TokenBuffer | TokenRing, max_count: int) -> int:
+        # NOTE tokens.source must be the same text as self.source_view, and the whole source is scanned in bulk before the first batch.
+        if self.bulk_columns is None:
+            self.load_bulk_columns()
+
+        kinds, starts, lengths, values, raw_starts = self.bulk_columns
+        cursor = self.bulk_cursor
+        stop = len(kinds) if max_count < 0 else min(len(kinds), cursor + max_count)
+
+        tokens.extend(kinds[cursor: stop], starts[cursor: stop], lengths[cursor: stop], values[cursor: stop])
+
+        self.bulk_cursor = stop
+        self.pos = self.limit if stop == len(kinds) else raw_starts[stop]
+
+        return stop - cursor
+
+    def skip_braces(self, depth: int) -> int:
+        """
+            Skips source text until `depth` open braces are closed, without making tokens or interning names, e.g to pass over function bodies. Gives the depth still open if the source runs out first.\n
+            NOTE braces are found just as the token engines would find them, so the next token lexed is the one after the closing brace.
+        """
+        source = self.source_view
+        limit = self.limit
+        pos = self.pos
+        match_at = BRACE_SKIP_PATTERN.match
+
+        while depth != 0 and pos < limit:
+            match = match_at(source, pos)
+            pos = match.end()
+
+            if match.lastgroup == 'BRACE':
+                depth += 1 if source[pos - 1] == '{' else -1
+
+        self.pos = pos
+
+        if self.engine == LexerEngine.VECTOR:
+            if self.bulk_columns is None:
+                self.load_bulk_columns()
+
+            self.bulk_cursor = bisect_left(self.bulk_columns[4], pos)
+
+        return depth
+
     def lex_next(self) -> TokenObj:
         if self.at_end():
             return None
 
+        if self.engine == LexerEngine.REGEX:
+            return self.lex_regex()
+        elif self.engine == LexerEngine.VECTOR:
+            if self.bulk_tokens is None:
+                self.load_bulk_tokens()
+
+            token_i = self.bulk_index[self.pos]
+            self.pos = self.bulk_ends[token_i]
+            return self.bulk_tokens[token_i]
+
         peeked_c = self.source_view[self.pos]
 
         if peeked_c == ',':
@@ -344,11 +1047,126 @@ class Lexer:
             return self.lex_operator()
 
         self.pos += 1
-        self.record_hop(1)
-        self.update_tracked_loc(peeked_c)
 
         return (
             peeked_c,
-            (self.line, self.column - 1),
+            self.pos - 1,
             TokenType.UNKNOWN
         )
+
+## Sharded Lexing ##
+
+# NOTE kind, start, length, and value columns of 1 shard without its EOF sentinel, then the shard's interned names by local id and the indexes of its identifier tokens. Values are a list when some literal is past int64.
+ShardColumns = tuple[array, array, array, array | list[int], list[str], list[int]]
+
+# NOTE smaller shards cost more in process round trips than lexing them saves.
+SHARD_MIN_LENGTH = 1 << 16
+
+def find_shard_bounds(source: str, shard_count: int) -> list[int]:
+    """
+        Picks up to `shard_count - 1` split offsets near even fractions of `source`, each just past a ';' or '}' at brace depth 0. Gives them between 0 and `len(source)`.\n
+        NOTE no token can span such an offset: comments, char literals, and operator runs are matched whole just as the lexer would, so their ';' or braces never count.
+    """
+    limit = len(source)
+    bounds = [0]
+
+    if shard_count < 2:
+        bounds.append(limit)
+        return bounds
+
+    shard_length = limit // shard_count
+    next_split = shard_length
+    depth = 0
+    pos = 0
+    match_at = SHARD_SCAN_PATTERN.match
+
+    while pos < limit and len(bounds) < shard_count:
+        match = match_at(source, pos)
+        pos = match.end()
+        rule = match.lastgroup
+
+        if rule == 'BRACE':
+            depth += 1 if source[pos - 1] == '{' else -1
+        elif rule != 'END':
+            continue
+
+        if depth == 0 and pos >= next_split and pos < limit:
+            bounds.append(pos)
+            next_split = pos + shard_length
+
+    bounds.append(limit)
+
+    return bounds
+
+def lex_shard(shard: str, base: int, engine: LexerEngine) -> ShardColumns:
+    """
+        Tokenizes one shard as `lex_sharded` workers do, with offsets shifted by the shard's `base` offset in the whole source. Identifier values are ids of a shard-local interner.
+    """
+    symbols = SymbolInterner()
+    tokenizer = Lexer(engine=engine, symbols=symbols)
+    tokens = TokenBuffer()
+
+    tokenizer.use_source(shard)
+    tokens.reset(shard)
+    tokenizer.lex_into(tokens)
+
+    token_count = len(tokens) - 1
+    starts = tokens.starts[:token_count]
+
+    if base != 0:
+        starts = array('i', [token_start + base for token_start in starts])
+
+    identifier_code = TokenType.IDENTIFIER.value
+    name_slots = [token_i for token_i, kind in enumerate(tokens.kinds[:token_count]) if kind == identifier_code]
+
+    values = tokens.values[:token_count]
+
+    if len(tokens.big_values) != 0:
+        # NOTE wide literals go back into the values as plain ints, since the side table would not follow the slice.
+        values = values.tolist()
+
+        for token_i, value in tokens.big_values.items():
+            if token_i < token_count:
+                values[token_i] = value
+
+    return (tokens.kinds[:token_count], starts, tokens.lengths[:token_count], values, symbols.names[1:], name_slots)
+
+def lex_sharded(source: str, shard_count: int, engine: LexerEngine = LexerEngine.REGEX, symbols: SymbolInterner = None, executor: Executor = None, min_shard_length: int = SHARD_MIN_LENGTH) -> TokenBuffer:
+    """
+        Lexes `source` into a `TokenBuffer` by splitting it at `find_shard_bounds` and tokenizing the shards in parallel, by default on a fresh `ProcessPoolExecutor`. The result matches a sequential `Lexer.lex_into` run over the whole source token for token, including the interned ids put into `symbols`.\n
+        NOTE shards are merged in source order and each shard's names get interned in their first-use order, so ids come out as a sequential run would assign them. Lines & columns are still resolved from offsets with `Lexer.resolve_position` over the whole source.
+    """
+    symbols = symbols if symbols is not None else SymbolInterner()
+    shard_count = max(1, min(shard_count, len(source) // max(1, min_shard_length)))
+    bounds = find_shard_bounds(source, shard_count)
+    tokens = TokenBuffer()
+    tokens.reset(source)
+
+    if len(bounds) == 2:
+        tokenizer = Lexer(engine=engine, symbols=symbols)
+        tokenizer.use_source(source)
+        tokenizer.lex_into(tokens)
+        return tokens
+
+    shards = [source[shard_start: shard_end] for shard_start, shard_end in zip(bounds, bounds[1:])]
+    pool = executor if executor is not None else ProcessPoolExecutor(max_workers=len(shards))
+
+    try:
+        shard_results = list(pool.map(lex_shard, shards, bounds[:-1], [engine] * len(shards)))
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+    intern = symbols.intern
+
+    for kinds, starts, lengths, values, names, name_slots in shard_results:
+        global_ids = [0] + [intern(name) for name in names]
+
+        for token_i in name_slots:
+            values[token_i] = global_ids[values[token_i]]
+
+        tokens.extend(kinds, starts, lengths, values)
+
+    tokens.push_eof()
+
+    return tokens
@@ -5,12 +5,20 @@
 """
 
 from enum import Enum, auto
+from typing import Iterator
 import pyCC.pyCmp.lexer as lex
 import pyCC.pyCmp.ast_nodes as ast
+import pyCC.pyCmp.semantics as sem
 
 ## Aliases & Types & Constants ##
 
 ParseResult = tuple[bool, list[ast.Stmt]]
+
+# NOTE represents a syntax error as ((line, column), culprit lexeme, message).
+ParseDiagnostic = tuple[tuple[int, int], str, str]
+
+# NOTE represents a skimmed top-level declaration as (start offset, symbol id, global note), with a 0 id and no note if it had a syntax error.
+SkimEntry = tuple[int, int, sem.SymbolNote | None]
 TokenTag = lex.TokenType
 TokenTags = list[TokenTag]
 
@@ -19,246 +27,311 @@ class TokenChoice(Enum):
     current = auto()
 
 TYPENAME_TABLE = {
-    "void": ast.DataType.VOID,
-    "char": ast.DataType.CHAR,
-    "int": ast.DataType.INT
+    TokenTag.TYPENAME_VOID: ast.DataType.VOID,
+    TokenTag.TYPENAME_CHAR: ast.DataType.CHAR,
+    TokenTag.TYPENAME_INT: ast.DataType.INT
 }
 
+# NOTE token kind codes where recovery after a syntax error may stop, see Parser.synchronize.
+SYNC_SEMICOLON_CODE = TokenTag.SEMICOLON.value
+SYNC_BRACE_OPEN_CODE = TokenTag.BRACE_OPEN.value
+SYNC_BRACE_CLOSE_CODE = TokenTag.BRACE_CLOSE.value
+SYNC_TYPENAME_CODES = frozenset(tag.value for tag in TYPENAME_TABLE)
+
+# NOTE Pratt parser table entries: binding power and AST operator per binary operator... higher powers bind tighter.
+BINARY_OP_ENTRIES = {
+    TokenTag.OP_LOGIC_OR: (1, ast.OpType.OP_LOGIC_OR),
+    TokenTag.OP_LOGIC_AND: (2, ast.OpType.OP_LOGIC_AND),
+    TokenTag.OP_TWO_EQU: (3, ast.OpType.OP_EQUALITY),
+    TokenTag.OP_BANG_EQU: (3, ast.OpType.OP_INEQUALITY),
+    TokenTag.OP_LT_SIGN: (4, ast.OpType.OP_LT),
+    TokenTag.OP_LTE_SIGN: (4, ast.OpType.OP_LTE),
+    TokenTag.OP_GT_SIGN: (4, ast.OpType.OP_GT),
+    TokenTag.OP_GTE_SIGN: (4, ast.OpType.OP_GTE),
+    TokenTag.OP_PLUS: (5, ast.OpType.OP_ADD),
+    TokenTag.OP_MINUS: (5, ast.OpType.OP_SUB),
+    TokenTag.OP_TIMES: (6, ast.OpType.OP_MULT),
+    TokenTag.OP_SLASH: (6, ast.OpType.OP_DIV)
+}
+
+def build_binary_op_table() -> list[tuple[int, ast.OpType] | None]:
+    """
+        Spreads `BINARY_OP_ENTRIES` over a list indexed by token kind code, so the expression loop does one index per token. None marks a token that ends an expression.
+    """
+    table = [None] * len(lex.TOKEN_TYPES_BY_CODE)
+
+    for tag, entry in BINARY_OP_ENTRIES.items():
+        table[tag.value] = entry
+
+    return table
+
+BINARY_OP_TABLE = build_binary_op_table()
+
+class ExprFrame(Enum):
+    """
+        Tags pending work on the explicit stack of `Parser.parse_expr`, whose frames are `(tag, a, b)` tuples.
+    """
+    BINARY = auto()  # (BINARY, (binding power, AST op), lhs)
+    NEGATE = auto()  # (NEGATE, None, None) applies to the next primary
+    GROUP = auto()   # (GROUP, None, None) waits for ')'
+    CALL = auto()    # (CALL, name token, args) waits for ',' or ')'
+    ASSIGN = auto()  # (ASSIGN, name literal, None) takes a whole expression
+
+class BlockFrame:
+    """
+        An open block on the explicit stack of `Parser.parse_block`, plus the `if` owning it if any.
+    """
+    def __init__(self, if_cond: ast.Expr | None, if_main_body: ast.Stmt | None):
+        self.stmts: list[ast.Stmt] = []
+        self.if_cond = if_cond
+        self.if_main_body = if_main_body
+
 class Parser:
-    def __init__(self):
-        self.lexer = lex.Lexer()
-        self.curr: lex.TokenObj = None
-        self.prev: lex.TokenObj = None
+    def __init__(self, engine: lex.LexerEngine = lex.LexerEngine.REGEX, lookahead: int = 32, hash_cons: bool = False, symbols: lex.SymbolInterner = None):
+        # NOTE names are interned into symbols, which callers may share across parses of one compilation.
+        self.lexer = lex.Lexer(engine=engine, symbols=symbols)
+        self.tokens = lex.TokenRing(lookahead)
+        # NOTE with hash_cons, identical subexpressions of a source share one node.
+        self.nodes = ast.HashConsFactory() if hash_cons else ast.NodeFactory()
+        # NOTE curr and prev are absolute token indexes into the self.tokens ring... the EOF sentinel's kind is None.
+        self.curr: int = 0
+        self.prev: int = -1
         self.error_count = 0
-        self.passed_space = False
+        self.diagnostics: list[ParseDiagnostic] = []
+        # NOTE count of diagnostics before the declaration `parse_each` gave last, so the ones before it came from declarations that failed to parse.
+        self.decl_diagnostic_start = 0
 
     def at_end(self) -> bool:
-        return self.curr is None
+        return self.tokens.kinds[self.curr & self.tokens.mask] == lex.EOF_CODE
 
-    def peek_curr(self) -> lex.TokenObj:
+    def peek_curr(self) -> int:
         return self.curr
 
-    def peek_prev(self) -> lex.TokenObj:
+    def peek_prev(self) -> int:
         return self.prev
 
-    def advance(self) -> lex.TokenObj:
-        self.passed_space = False
-        temp = None
+    def peek(self, k: int) -> TokenTag | None:
+        """
+            Gives the kind of the token `k` places after the current one without consuming anything. NOTE `k` is bounded by the ring's capacity.
+        """
+        return lex.TOKEN_TYPES_BY_CODE[self.tokens.kinds[self.tokens.fill(self.curr + k, self.prev)]]
 
-        while True:
-            temp = self.lexer.lex_next()
+    def curr_kind(self) -> TokenTag | None:
+        return self.tokens.get_kind(self.curr)
 
-            # NOTE handle the EOF!
-            if temp is None:
-                break
+    def curr_lexeme(self) -> str:
+        return self.tokens.get_lexeme(self.curr)
 
-            if temp[2] == lex.TokenType.SPACING or temp[2] == lex.TokenType.LINE_COMMENT:
-                if temp[2] == lex.TokenType.SPACING:
-                    self.passed_space = True
-                continue
+    def curr_symbol(self) -> tuple[str | None, int]:
+        """
+            Gives the interned spelling and symbol id of the current token if it's a name, else `(None, 0)`.
+        """
+        token_type, token_value, token_name = self.tokens.get_literal_token(self.curr)
+
+        if token_type != TokenTag.IDENTIFIER:
+            return (None, 0)
+
+        return (token_name, token_value)
 
-            break
+    def prev_kind(self) -> TokenTag | None:
+        return self.tokens.get_kind(self.prev)
 
-        return temp
+    def prev_lexeme(self) -> str:
+        return self.tokens.get_lexeme(self.prev)
 
     def match_token(self, choice: TokenChoice, matches: TokenTags) -> bool:
         if len(matches) == 0:
             return True
 
         if choice == TokenChoice.current:
-            for m in matches:
-                if self.curr[2] == m:
-                    return True
+            return lex.TOKEN_TYPES_BY_CODE[self.tokens.kinds[self.curr & self.tokens.mask]] in matches
 
-            return False
-        else:
-            for m in matches:
-                if self.curr[2] == m:
-                    return True
-
-            return False
+        return lex.TOKEN_TYPES_BY_CODE[self.tokens.kinds[self.prev & self.tokens.mask]] in matches
 
     def consume_token(self, matches: TokenTags):
         if self.match_token(TokenChoice.current, matches):
             self.prev = self.curr
-            self.curr = self.advance()
+
+            # NOTE stay on the EOF sentinel once reached.
+            if self.tokens.kinds[self.curr & self.tokens.mask] != lex.EOF_CODE:
+                self.curr += 1
+
+                if self.curr >= self.tokens.count:
+                    self.tokens.fill(self.curr, self.prev)
+
             return
         elif self.match_token(TokenChoice.current, [lex.TokenType.UNKNOWN]):
             raise SyntaxError('Invalid token!')
 
         raise SyntaxError('Unexpected token!')
 
-    def use_source(self, source: str):
-        self.lexer.use_source(source)
-        self.curr: lex.TokenObj = None
-        self.prev: lex.TokenObj = None
-        self.error_count = 0
-
-    def parse_literal(self) -> ast.Expr:
-        if self.match_token(TokenChoice.current, [TokenTag.LITERAL_CHAR]):
-            temp = self.peek_curr()
-            self.consume_token([])
-            return ast.Literal((temp, None), ast.DataType.CHAR)
-        elif self.match_token(TokenChoice.current, [TokenTag.LITERAL_INT]):
-            temp = self.peek_curr()
-            self.consume_token([])
-            return ast.Literal((temp, None), ast.DataType.INT)
-        elif self.match_token(TokenChoice.current, [TokenTag.PAREN_OPEN]):
-            self.consume_token([])
-            temp = self.parse_expr()
-            self.consume_token([TokenTag.PAREN_CLOSE])
-            return temp
-        elif self.match_token(TokenChoice.current, [TokenTag.IDENTIFIER]):
-            return self.parse_call_or_name()
-
-        raise SyntaxError('Invalid token for literal!')
-
-    def parse_call_or_name(self):
-        self.consume_token([])
-        temp_name_token = self.peek_prev()
-
-        if self.match_token(TokenChoice.current, [TokenTag.PAREN_OPEN]):
-            return ast.Call(temp_name_token[0], self.parse_args())
-
-        return ast.Literal((temp_name_token, None), ast.DataType.UNKNOWN)
-
-    def parse_unary(self) -> ast.Expr:
-        if self.match_token(TokenChoice.current, [TokenTag.OP_MINUS]):
-            self.consume_token([])
-            return ast.Unary(self.parse_literal(), ast.OpType.OP_NEG)
-
-        return self.parse_literal()
-
-    def parse_factor(self) -> ast.Expr:
-        lhs = self.parse_unary()
-
-        while not self.at_end():
-            if not self.match_token(TokenChoice.current, [TokenTag.OP_TIMES, TokenTag.OP_SLASH]):
-                break
-
-            temp_op = ast.OpType.OP_DIV
-
-            if self.peek_curr()[2] == TokenTag.OP_TIMES:
-                temp_op = ast.OpType.OP_MULT
-
-            self.consume_token([])
-
-            lhs = ast.Binary(lhs, self.parse_unary(), temp_op)
-
-        return lhs
-
-    def parse_term(self) -> ast.Expr:
-        lhs = self.parse_factor()
-
-        while not self.at_end():
-            if not self.match_token(TokenChoice.current, [TokenTag.OP_PLUS, TokenTag.OP_MINUS]):
-                break
-
-            temp_op = ast.OpType.OP_SUB
-
-            if self.peek_curr()[2] == TokenTag.OP_PLUS:
-                temp_op = ast.OpType.OP_ADD
-
-            self.consume_token([])
-
-            lhs = ast.Binary(lhs, self.parse_factor(), temp_op)
-
-        return lhs
-
-    def parse_comparison(self) -> ast.Expr:
-        lhs = self.parse_term()
-
-        while not self.at_end():
-            if not self.match_token(TokenChoice.current, [TokenTag.OP_LT_SIGN, TokenTag.OP_LTE_SIGN, TokenTag.OP_GT_SIGN, TokenTag.OP_GTE_SIGN]):
-                break
-
-            temp_op = ast.OpType.OP_NONE
-            temp_tag = self.peek_curr()[2]
-
-            if temp_tag == TokenTag.OP_LT_SIGN:
-                temp_op = ast.OpType.OP_LT
-            elif temp_tag == TokenTag.OP_LTE_SIGN:
-                temp_op = ast.OpType.OP_LTE
-            elif temp_tag == TokenTag.OP_GT_SIGN:
-                temp_op = ast.OpType.OP_GT
-            elif temp_tag == TokenTag.OP_GTE_SIGN:
-                temp_op = ast.OpType.OP_GTE
-
-            self.consume_token([])
-
-            lhs = ast.Binary(lhs, self.parse_term(), temp_op)
-
-        return lhs
-
-    def parse_equality(self) -> ast.Expr:
-        lhs = self.parse_comparison()
+    def get_diagnostics(self) -> list[ParseDiagnostic]:
+        return self.diagnostics
+
+    def record_error(self, error: SyntaxError):
+        self.error_count += 1
+        self.diagnostics.append((
+            self.lexer.resolve_position(self.tokens.get_offset(self.curr)),
+            self.curr_lexeme(),
+            str(error)
+        ))
+
+    def synchronize(self, top_level: bool):
+        """
+            Panic-mode recovery after a syntax error: skips tokens past the next `;` or balanced `{...}`, or up to a `}` closing the enclosing block or a typename starting the next declaration.\n
+            NOTE at least one token is skipped before stopping at a typename, and a stray `}` at top level is skipped, so recovery always makes progress.
+        """
+        kinds = self.tokens.kinds
+        mask = self.tokens.mask
+        start = self.curr
+        depth = 0
 
         while not self.at_end():
-            if not self.match_token(TokenChoice.current, [TokenTag.OP_TWO_EQU, TokenTag.OP_BANG_EQU]):
-                break
-
-            temp_op = ast.OpType.OP_INEQUALITY
-
-            if self.peek_curr()[2] == TokenTag.OP_TWO_EQU:
-                temp_op = ast.OpType.OP_EQUALITY
+            kind = kinds[self.curr & mask]
+
+            if kind == SYNC_BRACE_OPEN_CODE:
+                depth += 1
+            elif kind == SYNC_BRACE_CLOSE_CODE:
+                if depth == 0 and not top_level:
+                    return
+
+                depth -= 1
+
+                if depth <= 0:
+                    self.consume_token([])
+                    return
+            elif depth == 0:
+                if kind == SYNC_SEMICOLON_CODE:
+                    self.consume_token([])
+                    return
+                elif kind in SYNC_TYPENAME_CODES and self.curr != start:
+                    return
 
             self.consume_token([])
 
-            lhs = ast.Binary(lhs, self.parse_comparison(), temp_op)
-
-        return lhs
-
-    def parse_and(self) -> ast.Expr:
-        lhs = self.parse_equality()
+    def use_source(self, source: str):
+        self.lexer.use_source(source)
+        self.tokens.reset(source, self.lexer)
+        self.nodes.reset()
+        self.curr = 0
+        self.prev = -1
+        self.error_count = 0
+        self.diagnostics = []
+        self.decl_diagnostic_start = 0
+        self.tokens.fill(self.curr, self.prev)
 
-        while not self.at_end():
-            if not self.match_token(TokenChoice.current, [TokenTag.OP_LOGIC_AND]):
-                break
+    def parse_expr(self) -> ast.Expr:
+        """
+            Parses an expression with an explicit stack of `ExprFrame` work instead of recursion, so nesting depth is only bounded by memory. Binary operators climb by `BINARY_OP_TABLE` binding powers, as in a Pratt parser.
+        """
+        frames: list[tuple[ExprFrame, "any", "any"]] = []
+        kinds = self.tokens.kinds
+        mask = self.tokens.mask
+        expr_start = True
+        operand: ast.Expr = None
 
-            self.consume_token([])
+        while True:
+            ## 1. prefix: parse a primary... ##
+            temp_tag = self.curr_kind()
 
-            lhs = ast.Binary(lhs, self.parse_equality(), ast.OpType.OP_LOGIC_AND)
+            # NOTE my workaround: peek past a name for an '=', so an assignment is told apart from the equivalent <or> rule without backtracking.
+            if expr_start and temp_tag == TokenTag.IDENTIFIER and self.peek(1) == TokenTag.OP_ASSIGN:
+                frames.append((ExprFrame.ASSIGN, self.nodes.literal(self.tokens.get_literal_token(self.curr), ast.OpType.OP_NONE), None))
+                self.consume_token([])
+                self.consume_token([])
+                continue
 
-        return lhs
+            if temp_tag == TokenTag.OP_MINUS:
+                frames.append((ExprFrame.NEGATE, None, None))
+                self.consume_token([])
+                temp_tag = self.curr_kind()
 
-    def parse_or(self) -> ast.Expr:
-        lhs = self.parse_and()
+            expr_start = False
 
-        while not self.at_end():
-            if not self.match_token(TokenChoice.current, [TokenTag.OP_LOGIC_OR]):
-                break
+            if temp_tag == TokenTag.IDENTIFIER:
+                temp_name_token = self.tokens.get_literal_token(self.curr)
+                self.consume_token([])
 
-            self.consume_token([])
+                if self.curr_kind() == TokenTag.PAREN_OPEN:
+                    self.consume_token([])
 
-            lhs = ast.Binary(lhs, self.parse_and(), ast.OpType.OP_LOGIC_OR)
+                    if self.at_end():
+                        raise SyntaxError('Missing closing parenthesis for argument list!')
 
-        return lhs
-    
-    def parse_expr(self) -> ast.Expr:
-        if self.match_token(TokenChoice.current, [TokenTag.IDENTIFIER]):
-            self.consume_token([])
-            prev_name_token = self.prev
+                    if self.curr_kind() != TokenTag.PAREN_CLOSE:
+                        frames.append((ExprFrame.CALL, temp_name_token, []))
+                        expr_start = True
+                        continue
 
-            # NOTE my workaround: now check an operator... if '=', we're at assign, but otherwise the equivalent <or> rule applies.
-            if self.match_token(TokenChoice.current, [TokenTag.OP_ASSIGN]):
+                    self.consume_token([])
+                    operand = self.nodes.call(temp_name_token[2], [], temp_name_token[1])
+                else:
+                    operand = self.nodes.literal(temp_name_token, ast.DataType.UNKNOWN)
+            elif temp_tag == TokenTag.LITERAL_INT:
+                operand = self.nodes.literal(self.tokens.get_literal_token(self.curr), ast.DataType.INT)
                 self.consume_token([])
-                return ast.Binary(ast.Literal((prev_name_token, None), ast.OpType.OP_NONE), self.parse_expr(), ast.OpType.OP_ASSIGN)
-
-            # NOTE Weird fix: backtrack to prepare for parsing a name-started expression!
-            self.lexer.unwind_hop()
-            self.lexer.unwind_hop()
-            self.lexer.unwind_hop()
-            self.consume_token([])
-
-            return self.parse_or()
-
-        return self.parse_or()
+            elif temp_tag == TokenTag.LITERAL_CHAR:
+                operand = self.nodes.literal(self.tokens.get_literal_token(self.curr), ast.DataType.CHAR)
+                self.consume_token([])
+            elif temp_tag == TokenTag.PAREN_OPEN:
+                frames.append((ExprFrame.GROUP, None, None))
+                self.consume_token([])
+                expr_start = True
+                continue
+            else:
+                raise SyntaxError('Invalid token for literal!')
+
+            ## 2. infix: fold finished operands into pending frames... ##
+            while True:
+                if len(frames) != 0 and frames[-1][0] == ExprFrame.NEGATE:
+                    frames.pop()
+                    operand = self.nodes.unary(operand, ast.OpType.OP_NEG)
+
+                temp_entry = BINARY_OP_TABLE[kinds[self.curr & mask]]
+
+                # NOTE operators of equal or looser power take the finished lhs first, keeping chains left-associative.
+                while len(frames) != 0 and frames[-1][0] == ExprFrame.BINARY and (temp_entry is None or frames[-1][1][0] >= temp_entry[0]):
+                    _, temp_op_entry, temp_lhs = frames.pop()
+                    operand = self.nodes.binary(temp_lhs, operand, temp_op_entry[1])
+
+                if temp_entry is not None:
+                    frames.append((ExprFrame.BINARY, temp_entry, operand))
+                    self.consume_token([])
+                    break
+
+                if len(frames) == 0:
+                    return operand
+
+                temp_frame_tag, temp_a, temp_b = frames[-1]
+
+                if temp_frame_tag == ExprFrame.ASSIGN:
+                    frames.pop()
+                    operand = self.nodes.binary(temp_a, operand, ast.OpType.OP_ASSIGN)
+                elif temp_frame_tag == ExprFrame.GROUP:
+                    frames.pop()
+                    self.consume_token([TokenTag.PAREN_CLOSE])
+                else:
+                    temp_b.append(operand)
+
+                    if self.curr_kind() == TokenTag.PAREN_CLOSE:
+                        frames.pop()
+                        self.consume_token([])
+                        operand = self.nodes.call(temp_a[2], temp_b, temp_a[1])
+                        continue
+                    elif self.curr_kind() == TokenTag.COMMA:
+                        self.consume_token([])
+
+                    if self.at_end():
+                        raise SyntaxError('Missing closing parenthesis for argument list!')
+
+                    expr_start = True
+                    break
 
     def parse_declaration(self) -> ast.Stmt:
         self.consume_token([TokenTag.TYPENAME_VOID, TokenTag.TYPENAME_CHAR, TokenTag.TYPENAME_INT])
 
-        temp_typename = TYPENAME_TABLE.get(self.peek_prev()[0])
-        temp_name = self.peek_curr()[0]
+        temp_typename = TYPENAME_TABLE.get(self.prev_kind())
+        temp_name, temp_symbol = self.curr_symbol()
 
         self.consume_token([TokenTag.IDENTIFIER])
 
@@ -266,53 +339,89 @@ class Parser:
             self.consume_token([])
             temp_rhs = self.parse_expr()
             self.consume_token([TokenTag.SEMICOLON])
+            self.nodes.declare(temp_symbol)
 
-            return ast.Variable(temp_name, temp_typename, temp_rhs)
+            return ast.Variable(temp_name, temp_typename, temp_rhs, temp_symbol)
         elif self.match_token(TokenChoice.current, [TokenTag.PAREN_OPEN]):
-            temp_func_params = self.parse_params()
-            temp_func_body = self.parse_block()
+            # NOTE a function is declared before its params & body, so it may call itself.
+            self.nodes.declare(temp_symbol)
+            self.nodes.open_scope()
 
-            return ast.FunctionDecl(temp_name, temp_typename, temp_func_params, temp_func_body)
+            try:
+                temp_func_params = self.parse_params()
+                temp_func_body = self.parse_block()
+            finally:
+                self.nodes.close_scope()
+
+            return ast.FunctionDecl(temp_name, temp_typename, temp_func_params, temp_func_body, temp_symbol)
         
         raise SyntaxError('Invalid token for declaration!')
 
     def parse_variable(self) -> ast.Stmt:
         self.consume_token([TokenTag.TYPENAME_VOID, TokenTag.TYPENAME_CHAR, TokenTag.TYPENAME_INT])
 
-        temp_typename = TYPENAME_TABLE.get(self.peek_prev()[0]) or ast.DataType.UNKNOWN
-        temp_name = self.peek_curr()[0]
+        temp_typename = TYPENAME_TABLE.get(self.prev_kind()) or ast.DataType.UNKNOWN
+        temp_name, temp_symbol = self.curr_symbol()
 
         self.consume_token([TokenTag.IDENTIFIER])
         self.consume_token([TokenTag.OP_ASSIGN])
 
         temp_rhs = self.parse_expr()
         self.consume_token([TokenTag.SEMICOLON])
+        self.nodes.declare(temp_symbol)
 
-        return ast.Variable(temp_name, temp_typename, temp_rhs)
+        return ast.Variable(temp_name, temp_typename, temp_rhs, temp_symbol)
 
     def parse_block(self) -> ast.Stmt:
+        """
+            Parses a block with an explicit stack of open `BlockFrame`s, so nested `if` / `else` blocks don't recurse.
+        """
         self.consume_token([TokenTag.BRACE_OPEN])
 
-        temp_stmts = []
+        frames = [BlockFrame(None, None)]
 
-        while not self.at_end():
-            if self.peek_curr() is None:
-                raise SyntaxError('Missing closing brace for block.')
+        while True:
+            frame = frames[-1]
+
+            if not self.at_end() and not self.match_token(TokenChoice.current, [TokenTag.BRACE_CLOSE]):
+                # NOTE a bad statement is dropped, then parsing resumes at the next safe token.
+                try:
+                    if self.match_token(TokenChoice.current, [TokenTag.KEYWORD]) and self.curr_lexeme() == 'if':
+                        frames.append(BlockFrame(self.parse_if(), None))
+                    else:
+                        frame.stmts.append(self.parse_nested_stmt())
+                except SyntaxError as e:
+                    self.record_error(e)
+                    self.synchronize(False)
+
+                continue
 
-            if self.match_token(TokenChoice.current, [TokenTag.BRACE_CLOSE]):
+            # NOTE a block left open at EOF just ends there.
+            if not self.at_end():
                 self.consume_token([])
-                break
 
-            temp_stmts.append(self.parse_nested_stmt())
+            temp_block = ast.Block(frame.stmts)
+            frames.pop()
+
+            if len(frames) == 0:
+                return temp_block
 
-        return ast.Block(temp_stmts)
+            if frame.if_main_body is not None:
+                frames[-1].stmts.append(ast.If(frame.if_cond, frame.if_main_body, temp_block))
+            elif self.match_token(TokenChoice.current, [TokenTag.KEYWORD]) and self.curr_lexeme() == 'else':
+                self.consume_token([]) # NOTE skip 'else' since I only care about its block!
+                self.consume_token([TokenTag.BRACE_OPEN])
+                frames.append(BlockFrame(frame.if_cond, temp_block))
+            else:
+                frames[-1].stmts.append(ast.If(frame.if_cond, temp_block, None))
 
     def parse_nested_stmt(self) -> ast.Stmt:
-        temp_lexeme = self.peek_curr()[0]
+        """
+            NOTE `if` statements open a `BlockFrame` in `parse_block` instead.
+        """
+        temp_lexeme = self.curr_lexeme() if self.match_token(TokenChoice.current, [TokenTag.KEYWORD]) else None
 
-        if self.match_token(TokenChoice.current, [TokenTag.KEYWORD])  and temp_lexeme == 'if':
-            return self.parse_if()
-        elif self.match_token(TokenChoice.current, [TokenTag.KEYWORD]) and temp_lexeme == 'return':
+        if temp_lexeme == 'return':
             return self.parse_return()
         elif self.match_token(TokenChoice.current, [TokenTag.TYPENAME_VOID, TokenTag.TYPENAME_CHAR, TokenTag.TYPENAME_INT]):
             return self.parse_variable()
@@ -334,15 +443,16 @@ class Parser:
             return temp_params
 
         while True:
-            if self.peek_curr() is None:
+            if self.at_end():
                 raise SyntaxError('Missing closing parenthesis for parameter list!')
 
             self.consume_token([TokenTag.TYPENAME_CHAR, TokenTag.TYPENAME_INT])
 
-            temp_param_typename = TYPENAME_TABLE.get(self.peek_prev()[0]) or ast.DataType.TYPENAME_VOID
-            temp_param_name = self.peek_curr()[0]
+            temp_param_typename = TYPENAME_TABLE.get(self.prev_kind()) or ast.DataType.VOID
+            temp_param_name, temp_param_symbol = self.curr_symbol()
 
-            temp_params.append((temp_param_typename, temp_param_name))
+            temp_params.append((temp_param_typename, temp_param_name, temp_param_symbol))
+            self.nodes.declare(temp_param_symbol)
 
             self.consume_token([TokenTag.IDENTIFIER])
 
@@ -354,67 +464,154 @@ class Parser:
 
         return temp_params
 
-    def parse_args(self) -> list[ast.Expr]:
+    def parse_if(self) -> ast.Expr:
+        """
+            Parses an `if` up to its body's opening brace, giving the condition.
+        """
+        self.consume_token([])
         self.consume_token([TokenTag.PAREN_OPEN])
 
-        temp_args = []
+        temp_cond = self.parse_expr()
 
-        if self.match_token(TokenChoice.current, [TokenTag.PAREN_CLOSE]):
-            self.consume_token([])
-            return temp_args
+        self.consume_token([TokenTag.PAREN_CLOSE])
+        self.consume_token([TokenTag.BRACE_OPEN])
 
-        while True:
-            if self.peek_curr() is None:
-                raise SyntaxError('Missing closing parenthesis for argument list!')
+        return temp_cond
 
-            temp_args.append(self.parse_expr())
+    def parse_return(self) -> ast.Stmt:
+        self.consume_token([]) # NOTE skip 'return' since the expr matters most!
 
-            if self.match_token(TokenChoice.current, [TokenTag.PAREN_CLOSE]):
-                self.consume_token([])
+        temp_result_expr = self.parse_expr()
+        self.consume_token([TokenTag.SEMICOLON])
+
+        return ast.Return(temp_result_expr)
+
+    def skip_to_code(self, stop_code: int):
+        """
+            Skips tokens up to and past the next `stop_code` token without building anything.
+        """
+        kinds = self.tokens.kinds
+        mask = self.tokens.mask
+
+        while kinds[self.curr & mask] != lex.EOF_CODE:
+            kind = kinds[self.curr & mask]
+
+            self.prev = self.curr
+            self.curr += 1
+
+            if self.curr >= self.tokens.count:
+                self.tokens.fill(self.curr, self.prev)
+
+            if kind == stop_code:
+                return
+
+        raise SyntaxError('Unexpected end of source while skipping!')
+
+    def skip_body(self):
+        """
+            Skips a `{ ... }` body whose opening brace was just consumed: tokens already in the ring are counted first, then the lexer skips the rest of the body as raw text.
+        """
+        kinds = self.tokens.kinds
+        mask = self.tokens.mask
+        depth = 1
+
+        while self.curr < self.tokens.count:
+            kind = kinds[self.curr & mask]
+
+            if kind == lex.EOF_CODE:
+                raise SyntaxError('Unexpected end of source while skipping!')
+            elif kind == SYNC_BRACE_OPEN_CODE:
+                depth += 1
+            elif kind == SYNC_BRACE_CLOSE_CODE:
+                depth -= 1
+
+            self.prev = self.curr
+            self.curr += 1
+
+            if depth == 0:
                 break
-            elif self.match_token(TokenChoice.current, [TokenTag.COMMA]):
-                self.consume_token([])
 
-        return temp_args
+        if depth != 0 and self.lexer.skip_braces(depth) != 0:
+            self.tokens.fill(self.curr, self.prev)
+            raise SyntaxError('Unexpected end of source while skipping!')
 
-    def parse_if(self) -> ast.Stmt:
-        self.consume_token([])
-        self.consume_token([TokenTag.PAREN_OPEN])
+        self.tokens.fill(self.curr, self.prev)
 
-        temp_cond = self.parse_expr()
+    def skim_declaration(self) -> tuple[int, sem.SymbolNote]:
+        self.consume_token([TokenTag.TYPENAME_VOID, TokenTag.TYPENAME_CHAR, TokenTag.TYPENAME_INT])
 
-        self.consume_token([TokenTag.PAREN_CLOSE])
+        temp_typename = TYPENAME_TABLE.get(self.prev_kind())
+        temp_symbol = self.curr_symbol()[1]
 
-        temp_main_block = self.parse_block()
+        self.consume_token([TokenTag.IDENTIFIER])
 
-        if self.match_token(TokenChoice.current, [TokenTag.KEYWORD]) and self.peek_curr()[0] == 'else':
-            return ast.If(temp_cond, temp_main_block, self.parse_else())
+        if self.match_token(TokenChoice.current, [TokenTag.OP_ASSIGN]):
+            # NOTE initializers hold no braces, so the next ';' ends the declaration.
+            self.skip_to_code(SYNC_SEMICOLON_CODE)
 
-        return ast.If(temp_cond, temp_main_block, None)
+            return (temp_symbol, sem.SymbolNote(True, sem.SymbolRole.ROLE_VAR, temp_typename, None))
+        elif self.match_token(TokenChoice.current, [TokenTag.PAREN_OPEN]):
+            temp_func_params = self.parse_params()
 
-    def parse_else(self) -> ast.Stmt:
-        self.consume_token([]) # NOTE skip 'else' since I only care about its block!
+            self.consume_token([TokenTag.BRACE_OPEN])
+            self.skip_body()
 
-        return self.parse_block()
+            return (temp_symbol, sem.SymbolNote(True, sem.SymbolRole.ROLE_FUNC, temp_typename, {
+                "arity": len(temp_func_params),
+                "ptypes": [param[0] for param in temp_func_params]
+            }))
 
-    def parse_return(self) -> ast.Stmt:
-        self.consume_token([]) # NOTE skip 'return' since the expr matters most!
+        raise SyntaxError('Invalid token for declaration!')
 
-        temp_result_expr = self.parse_expr()
-        self.consume_token([TokenTag.SEMICOLON])
+    def skim_spans(self) -> list[SkimEntry]:
+        """
+            Skims every top-level declaration like `skim_all`, but also gives where each attempt started so callers can cut the source into per-declaration spans. Each span runs up to the next entry's start offset.
+        """
+        entries: list[SkimEntry] = []
 
-        return ast.Return(temp_result_expr)
+        while not self.at_end():
+            decl_start = self.tokens.get_offset(self.curr)
+
+            try:
+                temp_symbol, temp_note = self.skim_declaration()
+                entries.append((decl_start, temp_symbol, temp_note))
+            except SyntaxError as e:
+                self.record_error(e)
+                self.synchronize(True)
+                entries.append((decl_start, 0, None))
+
+        return entries
+
+    def skim_all(self) -> sem.ScopeObj:
+        """
+            Indexes the signatures of all top-level declarations without parsing function bodies or initializers, which are skipped by brace depth without even lexing most of their tokens. Gives the same global scope notes as `SemanticChecker` would record, keyed by symbol ids of `self.lexer.symbols`.\n
+            NOTE syntax errors are recovered from as in `parse_all`, but errors inside skipped code go unnoticed.
+        """
+        return {temp_symbol: temp_note for _, temp_symbol, temp_note in self.skim_spans() if temp_note is not None}
+
+    def parse_each(self) -> Iterator[ast.Stmt]:
+        """
+            Yields the top-level declarations one at a time, recovering from syntax errors like `parse_all`. The parser holds no reference to a declaration once it's yielded, so a caller may process and drop each in turn.
+        """
+        while not self.at_end():
+            decl_diagnostic_start = len(self.diagnostics)
 
-    def parse_all(self) -> ParseResult:
-        stmts: list[ast.Stmt] = []
+            try:
+                temp_decl = self.parse_declaration()
+            except SyntaxError as e:
+                self.record_error(e)
+                self.synchronize(True)
+                continue
 
-        self.consume_token([])
+            self.nodes.drop_interned()
+            self.decl_diagnostic_start = decl_diagnostic_start
 
-        try:
-            while not self.at_end():
-                stmts.append(self.parse_declaration())
-        except SyntaxError as e:
-            self.error_count += 1
-            print(f'Parse Error at {self.curr[1]} with \"{self.curr[0]}\":\n{e}')
+            yield temp_decl
+
+    def parse_all(self) -> ParseResult:
+        """
+            Parses every top-level declaration, recovering from syntax errors instead of stopping at the first. See `get_diagnostics` for the errors found.
+        """
+        stmts = list(self.parse_each())
 
         return (self.error_count == 0, stmts)
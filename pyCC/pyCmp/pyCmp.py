@@ -3,3 +3,347 @@
     Modified by DrkWithT (Derek Tan)\n
     TODO write main, encapsulated logic.
 """
+
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum, auto
+from typing import AsyncIterator, Iterator
+import pyCC.pyCmp.lexer as lex
+import pyCC.pyCmp.parser as par
+import pyCC.pyCmp.semantics as sem
+import pyCC.pyCmp.ir_gen as irgen
+import pyCC.pyCmp.ir_types as ir_types
+
+## Aliases ##
+
+# NOTE represents the outcome of one top-level declaration: name, its syntax errors, its semantic errors, and its IR steps. Syntax errors of declarations that failed to parse come in results named ''.
+DeclResult = tuple[str, list[par.ParseDiagnostic], list[sem.ErrorChunk], ir_types.StepList]
+
+# NOTE represents one top-level declaration compiled apart from the others: its syntax errors, semantic errors, (symbol, local scope notes) if it's a function, IR steps, and the first jump label number plus count of labels its IR took.
+DeclOutcome = tuple[list[par.ParseDiagnostic], list[sem.ErrorChunk], tuple[int, sem.ScopeObj] | None, ir_types.StepList, int, int]
+
+# NOTE represents what every worker starts from: the interned names so far, the global bindings, and an emitter holding only global registers.
+SharedState = tuple[list[str], sem.BindingScope, irgen.IREmitter]
+
+# NOTE represents a whole compiled source: syntax errors, semantic errors, the semantics table, and IR steps, all in source order.
+CompileResult = tuple[list[par.ParseDiagnostic], list[sem.ErrorChunk], sem.SemanticsTable, ir_types.StepList]
+
+class CompilePhase(Enum):
+    TOKENS = auto()      # NOTE payload is the whole source's lex.TokenBuffer
+    DIAGNOSTICS = auto() # NOTE payload is a declaration's (syntax errors, semantic errors)
+    IR = auto()          # NOTE payload is a declaration's IR steps
+
+# NOTE represents one streamed result of `compile_source`: its phase, the declaration's name or '' for the whole source, and the phase's payload.
+CompileEvent = tuple[CompilePhase, str, "any"]
+
+## Pipeline ##
+
+def compile_stream(source: str, parser: par.Parser = None) -> Iterator[DeclResult]:
+    """
+        Runs parsing, semantic checks, and IR generation one top-level declaration at a time, so each declaration's AST is released before the next is parsed. Only the global symbols, labels, and registers carry over, keeping peak memory flat as sources grow.\n
+        NOTE IR is given out until the first error of any kind and never after, while the staged `parse_all`, `check_ast`, `gen_ir_from_ast` run would give none at all.
+    """
+    parser = parser or par.Parser()
+    checker = sem.SemanticChecker(keep_locals=False)
+    emitter = irgen.IREmitter({})
+    seen_diagnostics = 0
+    all_ok = True
+
+    parser.use_source(source)
+
+    for decl in parser.parse_each():
+        # NOTE syntax errors of declarations that failed to parse belong to none, so they get a result of their own.
+        if parser.decl_diagnostic_start != seen_diagnostics:
+            all_ok = False
+            yield ('', parser.get_diagnostics()[seen_diagnostics: parser.decl_diagnostic_start], [], [])
+            seen_diagnostics = parser.decl_diagnostic_start
+
+        parse_errors = parser.get_diagnostics()[seen_diagnostics:]
+        seen_diagnostics += len(parse_errors)
+        sem_errors = checker.check_decl(decl)
+        all_ok = all_ok and len(parse_errors) == 0 and len(sem_errors) == 0
+        steps = emitter.gen_ir_from_decl(decl) if all_ok else []
+
+        yield (decl.get_name(), parse_errors, sem_errors, steps)
+
+    # NOTE syntax errors after the last declaration still need reporting.
+    trailing_errors = parser.get_diagnostics()[seen_diagnostics:]
+
+    if len(trailing_errors) != 0:
+        yield ('', trailing_errors, [], [])
+
+def compile_whole(source: str, parser: par.Parser = None, checker: sem.SemanticChecker = None, emitter: irgen.IREmitter = None) -> CompileResult:
+    """
+        Runs the staged `parse_all`, `check_ast`, `gen_ir_from_ast` passes over a whole source, giving IR only if there are no errors. Passed in objects are reset and reused, so a caller may keep one set per thread.
+    """
+    parser = parser or par.Parser()
+    checker = checker or sem.SemanticChecker()
+    checker.reset()
+
+    # NOTE symbol ids must not depend on sources compiled before with the same parser.
+    parser.lexer.symbols.clear()
+    parser.use_source(source)
+    ok, tops = parser.parse_all()
+    sem_errors = checker.check_ast(tops)
+    semantic_info = checker.eject_semantic_info()
+    steps: ir_types.StepList = []
+
+    if ok and len(sem_errors) == 0:
+        emitter = emitter or irgen.IREmitter(semantic_info)
+        emitter.reset(semantic_info)
+        steps = emitter.gen_ir_from_ast(tops)
+
+    return (parser.get_diagnostics(), sem_errors, semantic_info, steps)
+
+class CompilerSession:
+    """
+        Compiles many in-memory sources one after another with one parser, checker, and emitter, so their tables e.g the lexer's master pattern and kind codes, token ring, and interner are set up once per session instead of once per source. Every source still starts from a clean state, see `compile_whole`.\n
+        NOTE a session is not thread-safe, so use one per thread.
+    """
+    def __init__(self, engine: lex.LexerEngine = lex.LexerEngine.REGEX):
+        self.parser = par.Parser(engine=engine)
+        self.checker = sem.SemanticChecker()
+        self.emitter = irgen.IREmitter({})
+        self.file_count = 0
+        self.busy_seconds = 0.0
+
+    def compile(self, source: str) -> CompileResult:
+        return self.compile_batch([source])[0]
+
+    def compile_batch(self, sources: list[str]) -> list[CompileResult]:
+        parser = self.parser
+        checker = self.checker
+        emitter = self.emitter
+        started = time.perf_counter()
+
+        results = [compile_whole(source, parser, checker, emitter) for source in sources]
+
+        self.busy_seconds += time.perf_counter() - started
+        self.file_count += len(sources)
+
+        return results
+
+    def get_file_count(self) -> int:
+        return self.file_count
+
+    def get_throughput(self) -> float:
+        """
+            Gives the files compiled per second of time spent compiling so far, or 0 before any.
+        """
+        if self.busy_seconds == 0.0:
+            return 0.0
+
+        return self.file_count / self.busy_seconds
+
+## Threaded Pipeline ##
+
+def compile_threaded(sources: list[str], executor: Executor = None) -> list[CompileResult]:
+    """
+        Compiles many independent sources with `compile_whole` on a thread pool, by default a fresh `ThreadPoolExecutor`, giving results in the order of `sources`.\n
+        NOTE every compilation owns its own parser, checker, and emitter, and module level tables are only ever read, so no locks are needed. Threads only run at once on free-threaded CPython builds, though.
+    """
+    pool = executor if executor is not None else ThreadPoolExecutor(max_workers=os.cpu_count())
+
+    try:
+        return list(pool.map(compile_whole, sources))
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+## Parallel Pipeline ##
+
+def shift_diagnostics(diagnostics: list[par.ParseDiagnostic], base_pos: tuple[int, int]) -> list[par.ParseDiagnostic]:
+    """
+        NOTE maps positions within a span back to the whole source, given the span's own starting position... only its first line is offset by columns.
+    """
+    base_line, base_column = base_pos
+
+    return [((line + base_line - 1, column + base_column - 1 if line == 1 else column), lexeme, message) for (line, column), lexeme, message in diagnostics]
+
+def compile_span(parser: par.Parser, checker: sem.SemanticChecker, emitter: irgen.IREmitter, span: str, base_pos: tuple[int, int]) -> list[DeclOutcome]:
+    """
+        Parses, checks, and lowers the declarations of one source span against the globals `checker` and `emitter` already hold. A declaration only gets IR if it and the span before it are free of errors.
+    """
+    outcomes: list[DeclOutcome] = []
+    seen_diagnostics = 0
+
+    parser.use_source(span)
+
+    for decl in parser.parse_each():
+        parse_errors = parser.get_diagnostics()[seen_diagnostics:]
+        seen_diagnostics += len(parse_errors)
+        sem_errors = checker.check_decl(decl)
+        label_start = emitter.jump_label_i
+        steps = emitter.gen_ir_from_decl(decl) if parser.error_count == 0 and len(sem_errors) == 0 else []
+        func_scope = None
+
+        if decl.get_binding()[2].role == sem.SymbolRole.ROLE_FUNC:
+            func_scope = (decl.get_symbol(), checker.resolver.semantic_info.pop(decl.get_symbol(), {}))
+
+        outcomes.append((shift_diagnostics(parse_errors, base_pos), sem_errors, func_scope, steps, label_start, emitter.jump_label_i - label_start))
+
+    # NOTE syntax errors after the last declaration still need reporting.
+    trailing_errors = parser.get_diagnostics()[seen_diagnostics:]
+
+    if len(trailing_errors) != 0:
+        outcomes.append((shift_diagnostics(trailing_errors, base_pos), [], None, [], emitter.jump_label_i, 0))
+
+    return outcomes
+
+def compile_function_batch(spans: list[tuple[str, tuple[int, int]]], shared: SharedState) -> tuple[list[list[DeclOutcome]], list[str]]:
+    """
+        Worker side of `compile_parallel`: compiles a batch of function spans in order, giving their outcomes and any names it interned past the shared ones.\n
+        NOTE local symbol ids only mean something together with those names, see `merge_local_symbols`.
+    """
+    names, global_scope, emitter = shared
+    symbols = lex.SymbolInterner()
+
+    for name in names[1:]:
+        symbols.intern(name)
+
+    parser = par.Parser(symbols=symbols)
+    checker = sem.SemanticChecker()
+    checker.resolver.use_globals(global_scope)
+
+    batch_outcomes = [compile_span(parser, checker, emitter, span, base_pos) for span, base_pos in spans]
+
+    return (batch_outcomes, symbols.names[len(names):])
+
+def merge_local_symbols(scope: sem.ScopeObj, symbols: lex.SymbolInterner, shared_count: int, local_names: list[str]) -> sem.ScopeObj:
+    """
+        Re-keys a worker's local scope notes by ids of the main interner. Ids below `shared_count` were shared already, later ones index `local_names`.
+    """
+    return {(symbol if symbol < shared_count else symbols.intern(local_names[symbol - shared_count])): note for symbol, note in scope.items()}
+
+def compile_parallel(source: str, executor: Executor = None, batch_count: int = None) -> CompileResult:
+    """
+        Compiles a whole source in 2 phases. First, a skim collects every function signature into the global scope, so functions may be used before their definitions, and global variables are checked and lowered in order. Then the function bodies, which only see globals and their own locals, are parsed, checked, and lowered in batches across a process pool, by default a fresh `ProcessPoolExecutor`.\n
+        NOTE outcomes merge in source order and jump labels are renumbered to follow it, so the result never depends on scheduling. IR is given only if there are no errors at all, like the staged passes.
+    """
+    skimmer = par.Parser()
+    skimmer.use_source(source)
+    entries = skimmer.skim_spans()
+    symbols = skimmer.lexer.symbols
+
+    checker = sem.SemanticChecker()
+    checker.resolver.predeclare({temp_symbol: temp_note for _, temp_symbol, temp_note in entries if temp_note is not None and temp_note.role == sem.SymbolRole.ROLE_FUNC})
+    emitter = irgen.IREmitter({})
+    parser = par.Parser(symbols=symbols)
+
+    # NOTE each declaration's span ends where the next one starts, and the 1st also holds any leading comments.
+    span_bounds = [0] + [decl_start for decl_start, _, _ in entries[1:]] + [len(source)]
+    span_outcomes: list[list[DeclOutcome] | None] = []
+    func_spans: list[tuple[str, tuple[int, int]]] = []
+
+    for entry_i, (decl_start, _, temp_note) in enumerate(entries):
+        span = source[span_bounds[entry_i]: span_bounds[entry_i + 1]]
+        base_pos = skimmer.lexer.resolve_position(span_bounds[entry_i])
+
+        if temp_note is not None and temp_note.role == sem.SymbolRole.ROLE_VAR:
+            span_outcomes.append(compile_span(parser, checker, emitter, span, base_pos))
+        else:
+            span_outcomes.append(None)
+            func_spans.append((span, base_pos))
+
+    emitter.release_locals()
+    emitter.results = []
+    shared_state: SharedState = (symbols.names, checker.resolver.scopes.get_global_scope(), emitter)
+    shared_count = len(symbols.names)
+
+    batch_count = min(batch_count or 4 * (os.cpu_count() or 1), len(func_spans))
+    batches = [func_spans[batch_i * len(func_spans) // batch_count: (batch_i + 1) * len(func_spans) // batch_count] for batch_i in range(batch_count)]
+    pool = executor if executor is not None else ProcessPoolExecutor()
+
+    try:
+        batch_results = list(pool.map(compile_function_batch, batches, [shared_state] * len(batches)))
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+    func_outcomes: list[list[DeclOutcome]] = []
+    semantic_info: sem.SemanticsTable = {}
+
+    for batch_outcomes, local_names in batch_results:
+        for outcomes in batch_outcomes:
+            for _, _, func_scope, _, _, _ in outcomes:
+                if func_scope is not None:
+                    semantic_info[func_scope[0]] = merge_local_symbols(func_scope[1], symbols, shared_count, local_names)
+
+            func_outcomes.append(outcomes)
+
+    func_outcomes.reverse()
+    parse_errors: list[par.ParseDiagnostic] = []
+    sem_errors: list[sem.ErrorChunk] = []
+    steps: ir_types.StepList = []
+    label_count = 0
+
+    for outcomes in span_outcomes:
+        for decl_parse_errors, decl_sem_errors, _, decl_steps, label_start, decl_label_count in (outcomes if outcomes is not None else func_outcomes.pop()):
+            parse_errors.extend(decl_parse_errors)
+            sem_errors.extend(decl_sem_errors)
+            irgen.shift_jump_labels(decl_steps, label_count - label_start)
+            steps.extend(decl_steps)
+            label_count += decl_label_count
+
+    semantic_info[sem.GLOBAL_SCOPE_ID] = sem.get_scope_notes(checker.resolver.scopes.get_global_scope())
+
+    if len(parse_errors) != 0 or len(sem_errors) != 0:
+        steps = []
+
+    return (parse_errors, sem_errors, semantic_info, steps)
+
+## Async Pipeline ##
+
+def lex_source(source: str) -> lex.TokenBuffer:
+    tokenizer = lex.Lexer(engine=lex.LexerEngine.REGEX)
+    tokens = lex.TokenBuffer()
+
+    tokenizer.use_source(source)
+    tokens.reset(source)
+    tokenizer.lex_into(tokens)
+
+    return tokens
+
+async def compile_source(source: str, executor: Executor = None, with_tokens: bool = False) -> AsyncIterator[CompileEvent]:
+    """
+        Streams the phases of compiling one source as they finish: its tokens if asked for, then each declaration's diagnostics if it has any and its IR if it got some, see `compile_stream`. Syntax errors outside any parsed declaration come as diagnostics named ''. Every step runs on `executor`, by default the loop's, so the event loop stays free meanwhile.\n
+        NOTE steps of one stream hop between threads one at a time, so `executor` must be a thread pool since the stream can't be sent to another process.
+    """
+    loop = asyncio.get_running_loop()
+
+    if with_tokens:
+        yield (CompilePhase.TOKENS, '', await loop.run_in_executor(executor, lex_source, source))
+
+    results = compile_stream(source)
+
+    while (result := await loop.run_in_executor(executor, next, results, None)) is not None:
+        decl_name, parse_errors, sem_errors, steps = result
+
+        if len(parse_errors) != 0 or len(sem_errors) != 0:
+            yield (CompilePhase.DIAGNOSTICS, decl_name, (parse_errors, sem_errors))
+
+        if len(steps) != 0:
+            yield (CompilePhase.IR, decl_name, steps)
+
+async def compile_many(sources: list[str], executor: Executor = None, max_in_flight: int = 8) -> AsyncIterator[tuple[int, CompileResult]]:
+    """
+        Compiles many sources with `compile_whole` on `executor`, which may be a thread or process pool, giving each `(source index, result)` as soon as it's done. A semaphore keeps at most `max_in_flight` jobs handed to the executor at once.
+    """
+    loop = asyncio.get_running_loop()
+    gate = asyncio.Semaphore(max_in_flight)
+
+    async def run_one(source_i: int) -> tuple[int, CompileResult]:
+        async with gate:
+            return (source_i, await loop.run_in_executor(executor, compile_whole, sources[source_i]))
+
+    pending = [asyncio.ensure_future(run_one(source_i)) for source_i in range(len(sources))]
+
+    try:
+        for next_done in asyncio.as_completed(pending):
+            yield await next_done
+    finally:
+        # NOTE a consumer leaving early must not leave jobs queued behind it.
+        for job in pending:
+            job.cancel()
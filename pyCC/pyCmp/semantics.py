@@ -15,7 +15,7 @@ import pyCC.pyCmp.lexer as lex
 # NOTE categorizes undefined symbols!
 BOGUS_SCOPE_ID = -1
 
-# NOTE denotes global scope ID of a symbol!
+# NOTE denotes global scope ID of a symbol! Interned symbol ids start at 1, so this never names a function.
 GLOBAL_SCOPE_ID = 0
 
 class SymbolRole(Enum):
@@ -30,111 +30,319 @@ class SymbolNote:
         * role i.e variable / function
         * data type
     """
+    __slots__ = ('in_global', 'role', 'data_type', 'extras')
+
     def __init__(self, in_global: bool, role: SymbolRole, data_type: nodes.DataType, extras):
         self.in_global = in_global
         self.role = role
         self.data_type = data_type
         self.extras = extras
 
-ScopeObj = dict[str, SymbolNote]
+# NOTE scopes are keyed by interned symbol ids, see lexer.SymbolInterner.
+ScopeObj = dict[int, SymbolNote]
+
+# NOTE a scope of the resolver, mapping symbol ids to their current bindings.
+BindingScope = dict[int, nodes.Binding]
+
+# NOTE bound to uses of undefined names and calls of undeclared functions.
+UNRESOLVED: nodes.Binding = (BOGUS_SCOPE_ID, -1, None)
 
 class ScopeStore:
     """
         A utility class to track symbol scope information per function or global area:\n
-        * separate global "scope"
-        * regular function "scopes"
+        * separate global "scope" at depth `GLOBAL_SCOPE_ID`
+        * regular function "scopes" stacked above it\n
+        NOTE each scope hands out slot indexes to its variables in declaration order, and lookups walk the chain from the innermost scope out to the globals.
     """
     def __init__(self):
         # NOTE global scope stored externally from scope stack, slight lookup boost?
-        self.globals: ScopeObj = {}
+        self.globals: BindingScope = {}
 
         # NOTE small stack of scopes
-        self.others: list[ScopeObj] = []
+        self.others: list[BindingScope] = []
+
+        # NOTE slots taken so far per depth, globals first.
+        self.slot_counts: list[int] = [0]
 
     def at_global_scope(self) -> bool:
         return len(self.others) == 0
 
-    def get_global_scope(self) -> ScopeObj:
+    def get_global_scope(self) -> BindingScope:
         return self.globals
 
-    def get_current_scope(self) -> ScopeObj:
+    def get_current_scope(self) -> BindingScope:
         if len(self.others) == 0:
             return self.get_global_scope()
 
         return self.others[len(self.others) - 1]
 
     def create_new_scope(self):
-        self.others.append(ScopeObj())
+        self.others.append(BindingScope())
+        self.slot_counts.append(0)
 
     def pop_current_scope(self):
         self.others.pop()
+        self.slot_counts.pop()
+
+    def declare(self, symbol: int, note: SymbolNote, needs_slot: bool = True) -> nodes.Binding:
+        """
+            Binds `symbol` in the current scope to the next free slot, or to no slot (-1) e.g for functions. A redeclaration takes a new slot, shadowing the old one for later uses.
+        """
+        depth = len(self.others)
+        slot = -1
+
+        if needs_slot:
+            slot = self.slot_counts[depth]
+            self.slot_counts[depth] += 1
+
+        binding = (depth, slot, note)
+        self.get_current_scope()[symbol] = binding
+
+        return binding
+
+    def lookup(self, symbol: int) -> nodes.Binding | None:
+        for scope_i in range(len(self.others) - 1, -1, -1):
+            binding = self.others[scope_i].get(symbol)
+
+            if binding is not None:
+                return binding
+
+        return self.globals.get(symbol)
+
+def get_scope_notes(scope: BindingScope) -> ScopeObj:
+    return {symbol: binding[2] for symbol, binding in scope.items()}
 
 # represents (symbol, scope-name, message)
 ErrorChunk = tuple[str, str, str]
 
-# NOTE maps an AST op to support flag per (CHAR, INT, VOID)... use DataType.FOO.index()!
-ALLOWED_DATA_OPS = {
-    "OP_CALL": [False, False, False, False],
-    "OP_NEG": [False, True, False, False],
-    "OP_MULT": [False, True, False, False],
-    "OP_DIV": [False, True, False, False],
-    "OP_ADD": [False, True, False, False],
-    "OP_SUB": [False, True, False, False],
-    "OP_EQUALITY": [True, True, False, False],
-    "OP_INEQUALITY": [True, True, False, False],
-    "OP_LT": [True, True, False, False],
-    "OP_LTE": [True, True, False, False],
-    "OP_GT": [True, True, False, False],
-    "OP_GTE": [True, True, False, False],
-    "OP_LOGIC_AND": [True, True, False, False],
-    "OP_LOGIC_OR": [True, True, False, False],
-    "OP_ASSIGN": [True, True, False, False],
-    "OP_NONE": [True, True, False, False]
+# NOTE maps an AST op to support flag per (CHAR, INT, VOID, UNKNOWN)... see ALLOWED_DATA_OPS for lookups.
+ALLOWED_DATA_OP_ROWS = {
+    nodes.OpType.OP_CALL: [False, False, False, False],
+    nodes.OpType.OP_NEG: [False, True, False, False],
+    nodes.OpType.OP_MULT: [False, True, False, False],
+    nodes.OpType.OP_DIV: [False, True, False, False],
+    nodes.OpType.OP_ADD: [False, True, False, False],
+    nodes.OpType.OP_SUB: [False, True, False, False],
+    nodes.OpType.OP_EQUALITY: [True, True, False, False],
+    nodes.OpType.OP_INEQUALITY: [True, True, False, False],
+    nodes.OpType.OP_LT: [True, True, False, False],
+    nodes.OpType.OP_LTE: [True, True, False, False],
+    nodes.OpType.OP_GT: [True, True, False, False],
+    nodes.OpType.OP_GTE: [True, True, False, False],
+    nodes.OpType.OP_LOGIC_AND: [True, True, False, False],
+    nodes.OpType.OP_LOGIC_OR: [True, True, False, False],
+    nodes.OpType.OP_ASSIGN: [True, True, False, False],
+    nodes.OpType.OP_NONE: [True, True, False, False]
 }
 
+def build_allowed_ops_table() -> list[list[bool] | None]:
+    """
+        Spreads `ALLOWED_DATA_OP_ROWS` over a list indexed by `OpType` value, so a check is `ALLOWED_DATA_OPS[op.value][data_type.value]` with no string keys.
+    """
+    table = [None] * (len(nodes.OpType) + 1)
+
+    for op, row in ALLOWED_DATA_OP_ROWS.items():
+        table[op.value] = row
+
+    return table
+
+ALLOWED_DATA_OPS = build_allowed_ops_table()
+
+## Name Resolver ##
+# NOTE represents (symbol id or 0, name or '', type) of a checked expression.
+ExprInfo = tuple[int, str, nodes.DataType]
+
+# NOTE maps GLOBAL_SCOPE_ID or a function's symbol id to its scope.
+SemanticsTable = dict[int, ScopeObj]
+
+class Resolver(ASTVisitor):
+    """
+        Binds every name use, variable, function, and call of a parsed tree to a `(depth, slot, SymbolNote)` tuple in one pass, so later passes index by depth and slot instead of looking names up again.\n
+        NOTE names are resolved in source order, so a use before its declaration or in its own initializer stays `UNRESOLVED`. Without `keep_locals`, a function's scope is dropped once resolved and only the globals persist.
+    """
+    def __init__(self, keep_locals: bool = True):
+        self.keep_locals = keep_locals
+        self.reset()
+
+    def reset(self):
+        self.scopes = ScopeStore()
+        self.semantic_info: SemanticsTable = {}
+
+    def predeclare(self, notes: ScopeObj):
+        """
+            Binds global notes ahead of their definitions e.g function signatures from `Parser.skim_spans`, so uses before a definition resolve too.
+        """
+        for symbol, note in notes.items():
+            self.scopes.declare(symbol, note, note.role != SymbolRole.ROLE_FUNC)
+
+    def use_globals(self, scope: BindingScope):
+        """
+            NOTE shares an existing global scope e.g one collected by another process, so only function scopes are resolved here.
+        """
+        self.scopes.globals = scope
+
+    def resolve_decl(self, stmt: nodes.Stmt):
+        self.visit_tree(stmt)
+
+    def resolve_ast(self, tops: list[nodes.Stmt]) -> SemanticsTable:
+        for stmt in tops:
+            self.resolve_decl(stmt)
+
+        return self.get_semantic_info()
+
+    def get_semantic_info(self) -> SemanticsTable:
+        self.semantic_info[GLOBAL_SCOPE_ID] = get_scope_notes(self.scopes.get_global_scope())
+
+        return self.semantic_info
+
+    def visit_literal(self, node: nodes.Literal):
+        if node.get_token_kind() == lex.TokenType.IDENTIFIER:
+            node.set_binding(self.scopes.lookup(node.get_symbol()) or UNRESOLVED)
+
+    def visit_unary(self, node: nodes.Unary):
+        yield node.get_inner()
+
+    def visit_binary(self, node: nodes.Binary):
+        yield node.get_lhs()
+        yield node.get_rhs()
+
+    def visit_call(self, node: nodes.Call):
+        # NOTE functions only live in the global scope.
+        node.set_binding(self.scopes.get_global_scope().get(node.get_symbol()) or UNRESOLVED)
+
+        for arg in node.get_args():
+            yield arg
+
+    def visit_variable_decl(self, node: nodes.Variable):
+        yield node.get_rhs()
+
+        node.set_binding(self.scopes.declare(node.get_symbol(), SymbolNote(self.scopes.at_global_scope(), SymbolRole.ROLE_VAR, node.get_type(), None)))
+
+    def visit_block(self, node: nodes.Block):
+        for stmt in node.get_stmts():
+            yield stmt
+
+    def visit_function_decl(self, node: nodes.FunctionDecl):
+        func_param_v = node.get_params()
+
+        # NOTE track arity and parameter vars. for this new function!
+        func_note = SymbolNote(self.scopes.at_global_scope(), SymbolRole.ROLE_FUNC, node.get_type(), {
+            "arity": node.get_arity(),
+            "ptypes": [param[0] for param in func_param_v]
+        })
+        node.set_binding(self.scopes.declare(node.get_symbol(), func_note, False))
+
+        # NOTE params take the first slots of a function's scope, in order.
+        self.scopes.create_new_scope()
+
+        for param in func_param_v:
+            self.scopes.declare(param[2], SymbolNote(False, SymbolRole.ROLE_VAR, param[0], None))
+
+        yield node.get_body()
+
+        if self.keep_locals:
+            self.semantic_info[node.get_symbol()] = get_scope_notes(self.scopes.get_current_scope())
+
+        self.scopes.pop_current_scope()
+
+    def visit_expr_stmt(self, node: nodes.ExprStmt):
+        yield node.get_inner()
+
+    def visit_if(self, node: nodes.If):
+        yield node.get_conditions()
+        yield node.get_if_body()
+
+        if node.get_alt_body() is not None:
+            yield node.get_alt_body()
+
+    def visit_return(self, node: nodes.Return):
+        yield node.get_result_expr()
+
 ## Semantic Analyzer ##
-ExprInfo = tuple[str, nodes.DataType]
-SemanticsTable = dict[str, ScopeObj]
+
+def get_name_note(expr: nodes.Expr) -> SymbolNote | None:
+    """
+        NOTE gives the note bound to a name literal, else None... calls are typed by `visit_call` instead.
+    """
+    if expr.get_op_type() != nodes.OpType.OP_NONE:
+        return None
+
+    binding = expr.get_binding()
+
+    return binding[2] if binding is not None else None
 
 class SemanticChecker(ASTVisitor):
-    def __init__(self):
-        self.scopes = ScopeStore()
+    def __init__(self, keep_locals: bool = True):
+        self.resolver = Resolver(keep_locals)
+        self.reset()
+
+    def reset(self):
+        """
+            NOTE readies this checker for another compilation, dropping all scopes and errors of the last one.
+        """
+        self.resolver.reset()
+        # NOTE the name is only kept for diagnostics.
         self.current_scope_name: str = 'global'
+        # NOTE note of the function being checked, None at global scope.
+        self.current_func_note: SymbolNote | None = None
         self.errors: list[ErrorChunk] = []
         self.semantic_info: SemanticsTable = {}
 
+    def check_decl(self, stmt: nodes.Stmt) -> list[ErrorChunk]:
+        """
+            Resolves and checks one top-level declaration against the globals seen so far, giving only its own errors.
+        """
+        old_error_count = len(self.errors)
+
+        self.resolver.resolve_decl(stmt)
+        self.visit_tree(stmt)
+
+        return self.errors[old_error_count:]
+
     def check_ast(self, tops: list[nodes.Stmt]) -> list[ErrorChunk]:
         for stmt in tops:
-            stmt.accept_visitor(self)
+            self.check_decl(stmt)
 
-        self.semantic_info[".global"] = self.scopes.get_global_scope()
+        self.semantic_info = self.resolver.get_semantic_info()
 
         return self.errors
 
+    def at_global_scope(self) -> bool:
+        return self.current_func_note is None
+
     def eject_semantic_info(self) -> SemanticsTable:
         return self.semantic_info
 
+    def note_expr_type(self, node: nodes.Expr, info: ExprInfo) -> ExprInfo:
+        """
+            NOTE caches the resolved type of an expression on its node for later passes, e.g IR generation.
+        """
+        node.set_resolved_type(info[2])
+        return info
+
     def visit_literal(self, node: nodes.Literal) -> ExprInfo:
-        opt_token, opt_other = node.get_data()
+        token_kind = node.get_token_kind()
+        result_symbol = 0
         result_name = ''
         result_type = nodes.DataType.VOID
 
-        if opt_token is not None:
-            if opt_token[2] == lex.TokenType.TYPENAME_VOID:
+        if token_kind is not None:
+            if token_kind == lex.TokenType.TYPENAME_VOID:
                 self.errors.append((
-                    f'{opt_token[0]}',
+                    f'{token_kind.name}',
                     self.current_scope_name,
                     f'Invalid void type for literal!'
                 ))
-            elif opt_token[2] == lex.TokenType.IDENTIFIER:
-                result_name = opt_token[0]
-                name_info = self.scopes.get_current_scope().get(result_name)
+            elif token_kind == lex.TokenType.IDENTIFIER:
+                result_symbol = node.get_symbol()
+                result_name = node.get_name()
+                name_info = get_name_note(node)
                 name_type = name_info.data_type if name_info is not None else nodes.DataType.VOID
                 result_type = name_type
 
                 if result_type == nodes.DataType.VOID:
                     self.errors.append((
-                        opt_token[0],
+                        result_name,
                         self.current_scope_name,
                         f'Literals of undefined names are forbidden!'
                     ))
@@ -144,45 +352,49 @@ class SemanticChecker(ASTVisitor):
             # TODO handle arrays?
             pass
 
-        return (result_name, result_type)
+        return self.note_expr_type(node, (result_symbol, result_name, result_type))
 
     def visit_unary(self, node: nodes.Unary) -> ExprInfo:
-        inner_result: ExprInfo = node.get_inner().accept_visitor(self)
+        inner_result: ExprInfo = yield node.get_inner()
 
         expr_type = node.get_inner().deduce_early_type()        
         expr_op = node.get_op_type()
 
-        if not ALLOWED_DATA_OPS.get(expr_op.name)[expr_type.value]:
+        if not ALLOWED_DATA_OPS[expr_op.value][expr_type.value]:
             self.errors.append((
                 '<expr>',
                 self.current_scope_name,
                 f'Invalid {expr_op.name} on {expr_type.name} value!'
             ))
 
-        return inner_result
+        return self.note_expr_type(node, inner_result)
 
     def visit_binary(self, node: nodes.Binary) -> ExprInfo:
-        lhs_result: ExprInfo = node.get_lhs().accept_visitor(self)
-        rhs_result: ExprInfo = node.get_rhs().accept_visitor(self)
+        lhs_result: ExprInfo = yield node.get_lhs()
+        rhs_result: ExprInfo = yield node.get_rhs()
         bin_op = node.get_op_type()
 
-        lhs_opt_name, lhs_type = lhs_result
+        _, lhs_opt_name, lhs_type = lhs_result
+        lhs_opt_info = get_name_note(node.get_lhs())
+
+        if lhs_opt_info is not None:
+            lhs_type = lhs_opt_info.data_type
 
-        if lhs_opt_name != '' and self.scopes.get_current_scope().get(lhs_opt_name) is not None:
-            lhs_type = self.scopes.get_current_scope().get(lhs_opt_name).data_type
+        _, rhs_opt_name, rhs_type = rhs_result
+        rhs_opt_info = get_name_note(node.get_rhs())
 
-        rhs_opt_name, rhs_type = rhs_result
+        if rhs_opt_info is not None:
+            rhs_type = rhs_opt_info.data_type
 
-        if rhs_opt_name != '' and self.scopes.get_current_scope().get(rhs_opt_name) is not None:
-            rhs_type = self.scopes.get_current_scope().get(rhs_opt_name).data_type
+        allowed_types = ALLOWED_DATA_OPS[bin_op.value]
 
-        if not ALLOWED_DATA_OPS.get(bin_op.name)[lhs_type.value] or not ALLOWED_DATA_OPS.get(bin_op.name)[rhs_type.value]:
+        if not allowed_types[lhs_type.value] or not allowed_types[rhs_type.value]:
             self.errors.append((
                 '<expr>',
                 self.current_scope_name,
                 f'Invalid types for basic operation of {bin_op.name}'
             ))
-            return ('', nodes.DataType.VOID)
+            return self.note_expr_type(node, (0, '', nodes.DataType.VOID))
 
         if bin_op == nodes.OpType.OP_ASSIGN and (lhs_type == nodes.DataType.VOID or lhs_type == nodes.DataType.UNKNOWN or node.get_lhs().get_op_type() == nodes.OpType.OP_CALL or not lhs_opt_name):
             self.errors.append((
@@ -190,24 +402,26 @@ class SemanticChecker(ASTVisitor):
                 self.current_scope_name,
                 f'Invalid assignment to invalid type or target object (value category checks TODO)!'
             ))
-            return ('', nodes.DataType.VOID)
+            return self.note_expr_type(node, (0, '', nodes.DataType.VOID))
 
         if lhs_type == rhs_type:
-            return ('', lhs_type)
+            return self.note_expr_type(node, (0, '', lhs_type))
         elif lhs_type == nodes.DataType.VOID or rhs_type == nodes.DataType.VOID:
-            return ('', nodes.DataType.VOID)
+            return self.note_expr_type(node, (0, '', nodes.DataType.VOID))
         elif lhs_type == nodes.DataType.INT or rhs_type == nodes.DataType.INT: # NOTE promote partial char expr to int?
-            return ('', nodes.DataType.INT)
+            return self.note_expr_type(node, (0, '', nodes.DataType.INT))
         elif lhs_type == nodes.DataType.CHAR and rhs_type == nodes.DataType.CHAR:
-            return ('', nodes.DataType.CHAR)
+            return self.note_expr_type(node, (0, '', nodes.DataType.CHAR))
 
-        return ('', nodes.DataType.VOID)
+        return self.note_expr_type(node, (0, '', nodes.DataType.VOID))
 
     def visit_call(self, node: nodes.Call) -> ExprInfo:
+        call_symbol = node.get_symbol()
         call_name = node.get_name()
         call_argv = node.get_args()
 
-        call_info_opt = self.scopes.get_global_scope().get(call_name)
+        call_binding = node.get_binding()
+        call_info_opt = call_binding[2] if call_binding is not None else None
 
         if not call_info_opt:
             self.errors.append((
@@ -215,7 +429,7 @@ class SemanticChecker(ASTVisitor):
                 self.current_scope_name,
                 f'Undefined function name \"{call_name}\"!'
             ))
-            return (call_name, nodes.DataType.VOID)
+            return self.note_expr_type(node, (call_symbol, call_name, nodes.DataType.VOID))
 
         result_type = call_info_opt.data_type
         param_types = call_info_opt.extras["ptypes"]
@@ -228,14 +442,18 @@ class SemanticChecker(ASTVisitor):
                 self.current_scope_name,
                 f'Invalid argument count for function {call_name}, expected {call_arity}!'
             ))
-            return ('', nodes.DataType.VOID)
+            return self.note_expr_type(node, (0, '', nodes.DataType.VOID))
 
         for arg_i in range(argc):
             arg = call_argv[arg_i]
 
-            arg_name = '<name>' if arg.get_op_type() == nodes.OpType.OP_NONE else arg.data[0][0] # NOTE get identifier if literal...
+            arg_is_name = arg.get_op_type() == nodes.OpType.OP_NONE
+            arg_name = (arg.get_name() if arg_is_name else None) or '<expr>' # NOTE get identifier if literal...
             arg_type = arg.deduce_early_type()
-            arg_type = arg_type if arg_type != nodes.DataType.UNKNOWN else self.scopes.get_current_scope().get(arg_name).data_type or nodes.DataType.VOID
+
+            if arg_type == nodes.DataType.UNKNOWN:
+                arg_info = get_name_note(arg)
+                arg_type = arg_info.data_type if arg_info is not None else nodes.DataType.VOID
 
             if arg_type != param_types[arg_i]:
                 self.errors.append((
@@ -243,36 +461,28 @@ class SemanticChecker(ASTVisitor):
                     self.current_scope_name,
                     f'Invalid arg #{arg_i} passed to function {call_name}, invalid type.'
                 ))
-                return (call_name, nodes.DataType.VOID)
+                return self.note_expr_type(node, (call_symbol, call_name, nodes.DataType.VOID))
 
-        return (call_name, result_type)
+        return self.note_expr_type(node, (call_symbol, call_name, result_type))
 
     def visit_variable_decl(self, node: nodes.Variable):
+        # NOTE the resolver already declared this variable, so only its initializer is checked here.
         var_name = node.get_name()
         var_type = node.get_type()
         var_rhs = node.get_rhs()
-        rhs_name, rhs_type = var_rhs.accept_visitor(self)
-
-        if not self.scopes.get_current_scope().get(var_name):
-            self.scopes.get_current_scope()[var_name] = SymbolNote(self.scopes.at_global_scope(), SymbolRole.ROLE_VAR, var_type, None)
+        _, rhs_name, rhs_type = yield var_rhs
 
         if var_type == rhs_type:
-            rhs_opt_info = self.scopes.get_current_scope().get(rhs_name)
+            rhs_opt_info = get_name_note(var_rhs)
             rhs_role = rhs_opt_info.role if rhs_opt_info is not None else SymbolRole.ROLE_NONE
 
-            if var_rhs.get_op_type() != nodes.OpType.OP_CALL and rhs_role == SymbolRole.ROLE_FUNC:
+            if rhs_role == SymbolRole.ROLE_FUNC:
                 self.errors.append((
                     rhs_name,
                     self.current_scope_name,
                     f'Invalid use of function {rhs_name or '<unknown>'} returning {rhs_type.name}'
                 ))
-            else:
-                self.scopes.get_current_scope()[var_name] = SymbolNote(self.scopes.at_global_scope(), SymbolRole.ROLE_VAR, var_type, None);
-        elif var_type == nodes.DataType.INT and rhs_type != nodes.DataType.UNKNOWN and rhs_type != nodes.DataType.VOID:
-            self.scopes.get_current_scope()[var_name] = SymbolNote(self.scopes.at_global_scope(), SymbolRole.ROLE_VAR, var_type, None);
-        elif var_type == nodes.DataType.CHAR and rhs_type != nodes.DataType.UNKNOWN and rhs_type != nodes.DataType.VOID:
-            self.scopes.get_current_scope()[var_name] = SymbolNote(self.scopes.at_global_scope(), SymbolRole.ROLE_VAR, var_type, None);
-        else:
+        elif (var_type != nodes.DataType.INT and var_type != nodes.DataType.CHAR) or rhs_type == nodes.DataType.UNKNOWN or rhs_type == nodes.DataType.VOID:
             # NOTE: handle invalid types in var. decls: VOID
             self.errors.append((
                 '<expr>',
@@ -284,33 +494,18 @@ class SemanticChecker(ASTVisitor):
         stmts = node.get_stmts()
 
         for temp in stmts:
-            temp.accept_visitor(self)
+            yield temp
 
     def visit_function_decl(self, node: nodes.FunctionDecl):
-        func_name = node.get_name()
-        func_retype = node.get_type()
-        func_arity = node.get_arity()
-        func_param_v = node.get_params()
+        self.current_scope_name = node.get_name()
+        self.current_func_note = node.get_binding()[2]
 
-        # NOTE track arity and parameter vars. for this new function!
-        self.scopes.get_current_scope()[func_name] = SymbolNote(self.scopes.at_global_scope(), SymbolRole.ROLE_FUNC, func_retype, {
-            "arity": func_arity,
-            "ptypes": [param[0] for param in func_param_v]
-        })
+        yield node.get_body()
 
-        self.scopes.create_new_scope()
-        self.current_scope_name = func_name
-
-        for param in func_param_v:
-            self.scopes.get_current_scope()[param[1]] = SymbolNote(False, SymbolRole.ROLE_VAR, param[0], None)
-
-        node.get_body().accept_visitor(self)
-
-        self.semantic_info[self.current_scope_name] = self.scopes.get_current_scope()
-        self.scopes.pop_current_scope()
+        self.current_func_note = None
 
     def visit_expr_stmt(self, node: nodes.ExprStmt):
-        if self.scopes.at_global_scope():
+        if self.at_global_scope():
             self.errors.append((
                 '<expr-stmt>',
                 self.current_scope_name,
@@ -318,10 +513,10 @@ class SemanticChecker(ASTVisitor):
             ))
             return
 
-        node.get_inner().accept_visitor(self)
+        yield node.get_inner()
 
     def visit_if(self, node: nodes.If):
-        if self.scopes.at_global_scope():
+        if self.at_global_scope():
             self.errors.append((
                 '<if-else-stmt>',
                 self.current_scope_name,
@@ -329,16 +524,16 @@ class SemanticChecker(ASTVisitor):
             ))
             return
 
-        node.get_conditions().accept_visitor(self)
-        node.get_if_body().accept_visitor(self)
+        yield node.get_conditions()
+        yield node.get_if_body()
 
         else_body_opt = node.get_alt_body()
 
         if else_body_opt is not None:
-            else_body_opt.accept_visitor(self)
+            yield else_body_opt
 
     def visit_return(self, node: nodes.Return):
-        if self.scopes.at_global_scope():
+        if self.at_global_scope():
             self.errors.append((
                 'return <expr>;',
                 self.current_scope_name,
@@ -346,10 +541,10 @@ class SemanticChecker(ASTVisitor):
             ))
             return
 
-        result_name, result_type = node.get_result_expr().accept_visitor(self)
+        _, result_name, result_type = yield node.get_result_expr()
 
         # NOTE lookup current function's return type to check return semantics!
-        parent_func_retype = self.scopes.get_global_scope().get(self.current_scope_name).data_type
+        parent_func_retype = self.current_func_note.data_type
 
         if parent_func_retype != result_type:
             self.errors.append((
@@ -4,10 +4,17 @@
     Unit testing for IR generator from AST.
 """
 
+import io
+import os
+import tempfile
 import unittest
 import pyCC.pyCmp.parser as par
 import pyCC.pyCmp.semantics as sem
 import pyCC.pyCmp.ir_gen as irgen
+import pyCC.pyCmp.ir_buffer as irbuf
+import pyCC.pyCmp.ir_text as irtext
+import pyCC.pyCmp.ir_cfg as ircfg
+import pyCC.pyCmp.ir_ssa as irssa
 
 def test_impl(file_path: str):
     parser = par.Parser()
@@ -57,3 +64,241 @@ class IRGenTester(unittest.TestCase):
 
     def test_good_4a(self):
         self.assertTrue(test_impl('./c_samples/test_04a.c'))
+
+    def test_deep_nesting(self):
+        # NOTE 100k levels is far past the recursion limit, so any recursive pass would fail here.
+        depth = 100000
+        deep_sources = [
+            'int f(int a) {\n    int b = a' + ' + a' * depth + ';\n    return b;\n}\n',
+            'int f(int a) {\n' + 'if (a) {\n' * depth + 'a = a - 1;\n' + '}\n' * depth + '    return a;\n}\n',
+            'int f(int a) {\n    int b = ' + '(' * depth + 'a' + ')' * depth + ';\n    return b;\n}\n'
+        ]
+
+        for source in deep_sources:
+            parser = par.Parser()
+            checker = sem.SemanticChecker()
+            parser.use_source(source)
+
+            ok, ast = parser.parse_all()
+
+            self.assertTrue(ok)
+            self.assertEqual(len(checker.check_ast(ast)), 0)
+            self.assertTrue(len(irgen.IREmitter(checker.eject_semantic_info()).gen_ir_from_ast(ast)) > 0)
+
+    def test_late_global_regs(self):
+        parser = par.Parser()
+        checker = sem.SemanticChecker()
+        parser.use_source('int f() {\n    int x = 1;\n    return x;\n}\nint g = 5;\nint main() {\n    f();\n    return g;\n}\n')
+
+        ok, ast = parser.parse_all()
+        self.assertTrue(ok)
+        self.assertEqual(len(checker.check_ast(ast)), 0)
+
+        steps = irgen.IREmitter(checker.eject_semantic_info()).gen_ir_from_ast(ast)
+        main_i = steps.index(irgen.IRLabel('main'))
+        g_reg = steps[main_i - 1].dest
+        f_regs = {step.dest for step in steps[:main_i - 2] if step.get_ir_type() == irgen.ir_types.IRType.ADDR_ASSIGN}
+        f_regs.update(step.addr for step in steps[:main_i - 2] if step.get_ir_type() == irgen.ir_types.IRType.LOAD_CONSTANT)
+
+        # NOTE g follows f, so it must take none of f's registers, and main's call result must not land on it either.
+        self.assertEqual(steps[main_i - 1], irgen.IRAssign(g_reg, irgen.ir_types.IROp.NOP, [steps[main_i - 2].addr]))
+        self.assertNotIn(g_reg, f_regs)
+        self.assertNotEqual(steps[main_i + 1].dest, g_reg)
+
+    def test_ir_buffer(self):
+        parser = par.Parser()
+        checker = sem.SemanticChecker()
+        parser.use_source('int g(int a) {\n    return a;\n}\nint f(int a, int b) {\n    if (a < b && b > 1) {\n        a = b * g(3) - 1;\n    }\n    g(a);\n    return a;\n}\n')
+
+        ok, ast = parser.parse_all()
+        self.assertTrue(ok)
+        self.assertEqual(len(checker.check_ast(ast)), 0)
+
+        steps = irgen.IREmitter(checker.eject_semantic_info()).gen_ir_from_ast(ast)
+        buffer = irbuf.build_ir_buffer(steps)
+
+        self.assertEqual(buffer.get_steps(), steps)
+        self.assertEqual(buffer.names, ['g', 'f'])
+        self.assertTrue(buffer.get_bytes_per_step() < 32)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ir_path = os.path.join(temp_dir, 'test.ir')
+            irbuf.save_ir_buffer(buffer, ir_path)
+            loaded = irbuf.load_ir_buffer(ir_path)
+
+            self.assertEqual(loaded.get_steps(), steps)
+            self.assertEqual(loaded.find_labels(), buffer.find_labels())
+
+            # NOTE rewriting a mapped buffer must leave the file as it was.
+            loaded.set_step(1, irgen.IRLoadConst(loaded.dests[1], 7))
+            loaded.shift_jump_labels(10)
+            irgen.shift_jump_labels(steps, 10)
+            steps[1] = irgen.IRLoadConst(steps[1].addr, 7)
+
+            self.assertEqual(loaded.get_steps(), steps)
+            self.assertNotEqual(irbuf.load_ir_buffer(ir_path).get_steps(), steps)
+            del loaded
+
+    def test_ir_text(self):
+        for sample_path in ['./c_samples/test_03.c', './c_samples/test_04.c', './c_samples/test_04a.c']:
+            parser = par.Parser()
+            checker = sem.SemanticChecker()
+
+            with open(sample_path) as src:
+                parser.use_source(src.read())
+
+            ok, ast = parser.parse_all()
+            checker.check_ast(ast)
+            steps = irgen.IREmitter(checker.eject_semantic_info()).gen_ir_from_ast(ast)
+            steps.extend([irgen.IRPushArg(3), irgen.IRCallFunc('main'), irgen.IRCallFunc('main', 12), irgen.IRAssign(4, irgen.ir_types.IROp.NEGATE, [2]), irgen.IRLoadConst(5, -7)])
+
+            ir_out = io.StringIO()
+            irtext.write_ir(steps, ir_out)
+
+            self.assertEqual(list(irtext.read_ir(io.StringIO(ir_out.getvalue()))), steps)
+
+        self.assertEqual(irtext.format_step(irgen.IRJumpIf(3, irgen.ir_types.IROp.COMPARE_LT, 0, 1)), '    jumpif L3 COMPARE_LT v0 v1')
+
+        with self.assertRaisesRegex(ValueError, 'line 2'):
+            list(irtext.read_ir(['@main:', '    v1 = FOO v2']))
+
+    def test_cfg_analyses(self):
+        # NOTE sources of this subset have no loops, so nested ones are written as IR: L1 heads the outer loop, L2 the inner one.
+        loop_ir = [
+            '@f:', '    v0 = const 0',
+            'L1:', '    v1 = const 1',
+            'L2:', '    jumpif L3 COMPARE_LT v0 v1',
+            '    jump L2',
+            'L3:', '    jumpif L1 COMPARE_EQ v0 v1',
+            'L4:', '    jumpif L6 COMPARE_EQ v0 v1',
+            '    push v0',
+            'L6:', '    return'
+        ]
+        cfg = ircfg.ControlFlowGraph(list(irtext.read_ir(loop_ir)))
+
+        self.assertEqual([block.get_label() for block in cfg.blocks], ['f', 1, 2, None, 3, 4, None, 6])
+        self.assertEqual([block.succs for block in cfg.blocks], [[1], [2], [4, 3], [2], [1, 5], [7, 6], [7], []])
+        self.assertEqual(cfg.get_idoms(), [0, 0, 1, 2, 2, 4, 5, 5])
+        self.assertEqual(cfg.get_frontiers(), [[], [1], [1, 2], [2], [1], [], [7], []])
+        self.assertTrue(cfg.dominates(2, 6) and not cfg.dominates(3, 4))
+
+        loops = cfg.get_loops()
+        self.assertEqual(loops.headers, [1, 2])
+        self.assertEqual(loops.parents, {1: None, 2: 1})
+        self.assertEqual([loops.get_depth(block_i) for block_i in range(len(cfg.blocks))], [0, 1, 2, 2, 1, 0, 0, 0])
+
+        # NOTE a change keeping the edges keeps the dominators, but retargeting a jump drops them.
+        idoms = cfg.get_idoms()
+        cfg.blocks[1].steps.append(irgen.IRLoadConst(2, 5))
+        cfg.mark_changed()
+        self.assertIs(cfg.get_idoms(), idoms)
+
+        cfg.blocks[3].steps[-1] = irgen.IRJump(4)
+        cfg.mark_changed()
+        self.assertEqual(cfg.get_version(), 2)
+        self.assertEqual(cfg.get_loops().headers, [1])
+        self.assertEqual(cfg.get_steps()[4], irgen.IRLoadConst(2, 5))
+
+        # NOTE globals' initializers before the first function or between two get graphs of their own, while a labeled block after a return stays in its function.
+        program = [
+            irgen.IRLoadConst(0, 1),
+            irgen.IRLabel('main'), irgen.IRJumpIf(2, irgen.ir_types.IROp.COMPARE_EQ, 0, 0), irgen.IRReturn(), irgen.IRLabel(2), irgen.IRReturn(),
+            irgen.IRLoadConst(2, 3), irgen.IRJumpIf(0, irgen.ir_types.IROp.COMPARE_EQ, 2, 2), irgen.IRLoadConst(2, 1), irgen.IRLabel(0), irgen.IRAssign(1, irgen.ir_types.IROp.NOP, [2]),
+            irgen.IRLabel('g'), irgen.IRReturn()
+        ]
+        self.assertEqual([len(cfg.get_steps()) for cfg in ircfg.build_cfgs(program)], [1, 5, 5, 2])
+
+    def test_ssa_round_trip(self):
+        # NOTE v0 and v1 swap every trip around the loop through the temp v3, so each gets a phi at L1.
+        swap_ir = [
+            '@f:', '    v0 = const 1', '    v1 = const 2', '    v2 = const 3',
+            'L1:', '    v3 = NOP v0', '    v0 = NOP v1', '    v1 = NOP v3',
+            '    push v0',
+            '    jumpif L1 COMPARE_LT v0 v2',
+            'L2:', '    push v1',
+            '    return'
+        ]
+        cfg = ircfg.ControlFlowGraph(list(irtext.read_ir(swap_ir)))
+        irssa.construct_ssa(cfg)
+
+        self.assertEqual([irtext.format_step(step) for step in cfg.blocks[1].steps[:3]], ['L1:', '    v7 = phi v4 v10', '    v8 = phi v5 v11'])
+        defs, uses = irssa.get_def_use(cfg)
+        self.assertEqual(len(defs), len(set(defs)))
+        self.assertEqual(uses[10], [cfg.blocks[1].steps[1], cfg.blocks[1].steps[6], cfg.blocks[1].steps[7]])
+        self.assertIs(irssa.get_def_use(cfg), irssa.get_def_use(cfg))
+
+        next_label = irssa.destruct_ssa(cfg, 3)
+        out_ir = [irtext.format_step(step) for step in cfg.get_steps()]
+
+        self.assertEqual(next_label, 4)
+        self.assertNotIn('phi', ' '.join(out_ir))
+        # NOTE the taken edge's block goes before the final return block, so the fall-through now jumps over it.
+        self.assertEqual(out_ir[-9:], ['    jumpif L3 COMPARE_LT v10 v6', '    jump L2', 'L3:', '    v8 = NOP v11', '    v7 = NOP v10', '    jump L1', 'L2:', '    push v11', '    return'])
+
+        # NOTE here the phis swap each other directly, so the back edge's copies form a cycle broken through the scratch v4.
+        phi_swap_ir = [
+            '@f:', '    v0 = const 1', '    v1 = const 2',
+            'L1:', '    v2 = phi v0 v3', '    v3 = phi v1 v2',
+            '    push v2',
+            '    jumpif L1 COMPARE_LT v2 v3',
+            'L2:', '    return'
+        ]
+        cfg = ircfg.ControlFlowGraph(list(irtext.read_ir(phi_swap_ir)))
+        irssa.destruct_ssa(cfg, 3)
+        out_ir = [irtext.format_step(step) for step in cfg.get_steps()]
+
+        self.assertEqual(out_ir[3:5], ['    v3 = NOP v1', '    v2 = NOP v0'])
+        self.assertEqual(out_ir[-7:], ['L3:', '    v4 = NOP v2', '    v2 = NOP v3', '    v3 = NOP v4', '    jump L1', 'L2:', '    return'])
+
+        self.assertEqual(irssa.sequentialize_copy([1, 2, 3], [2, 1, 1], 9), [
+            irgen.IRAssign(3, irgen.ir_types.IROp.NOP, [1]),
+            irgen.IRAssign(9, irgen.ir_types.IROp.NOP, [1]),
+            irgen.IRAssign(1, irgen.ir_types.IROp.NOP, [2]),
+            irgen.IRAssign(2, irgen.ir_types.IROp.NOP, [9])
+        ])
+
+    def test_program_ssa_keeps_globals(self):
+        parser = par.Parser()
+        checker = sem.SemanticChecker()
+        parser.use_source('int f() {\n    int x = 1;\n    return x;\n}\nint g = 5;\nint h = g && 2;\nint main() {\n    f();\n    return g;\n}\n')
+
+        ok, ast = parser.parse_all()
+        self.assertTrue(ok)
+        self.assertEqual(len(checker.check_ast(ast)), 0)
+
+        steps = irgen.IREmitter(checker.eject_semantic_info()).gen_ir_from_ast(ast)
+        # NOTE SSA passes rewrite steps in place, so the globals' IR is kept as text.
+        global_irs = [[irtext.format_step(step) for step in chunk] for chunk in ircfg.split_functions(steps) if chunk[0].get_ir_type() != irgen.ir_types.IRType.LABEL]
+        out_steps = irssa.destruct_program_ssa(irssa.construct_program_ssa(steps))
+        out_chunks = ircfg.split_functions(out_steps)
+
+        # NOTE g and h sit between f and main, so their initializers must come through as they were, and no function may write their registers.
+        self.assertEqual([[irtext.format_step(step) for step in chunk] for chunk in out_chunks if chunk[0].get_ir_type() != irgen.ir_types.IRType.LABEL], global_irs)
+        self.assertEqual(len(global_irs), 1)
+
+        global_regs = {irssa.get_step_def(step) for chunk in out_chunks if chunk[0].get_ir_type() != irgen.ir_types.IRType.LABEL for step in chunk} - {None}
+        func_regs = {irssa.get_step_def(step) for chunk in out_chunks if chunk[0].get_ir_type() == irgen.ir_types.IRType.LABEL for step in chunk} - {None}
+
+        self.assertEqual(len(out_chunks), 3)
+        self.assertEqual(global_regs & func_regs, set())
+
+    def test_program_ssa_twice(self):
+        parser = par.Parser()
+        checker = sem.SemanticChecker()
+        # NOTE the && inside the if gives f phis on taken jump edges, whose copies need blocks of their own.
+        parser.use_source('int f(int a) {\n    if (a) {\n        int y = a && 1;\n    }\n    int x = a && 2;\n    return x;\n}\nint g = 3;\nint main() {\n    return g;\n}\n')
+
+        ok, ast = parser.parse_all()
+        self.assertTrue(ok)
+        self.assertEqual(len(checker.check_ast(ast)), 0)
+
+        steps = irgen.IREmitter(checker.eject_semantic_info()).gen_ir_from_ast(ast)
+        global_ir = [irtext.format_step(step) for step in ircfg.split_functions(steps)[1]]
+
+        for _ in range(2):
+            steps = irssa.destruct_program_ssa(irssa.construct_program_ssa(steps))
+            chunks = ircfg.split_functions(steps)
+
+            self.assertEqual([chunk[0] for chunk in chunks if chunk[0].get_ir_type() == irgen.ir_types.IRType.LABEL], [irgen.IRLabel('f'), irgen.IRLabel('main')])
+            self.assertEqual([irtext.format_step(step) for step in chunks[1]], global_ir)
+            self.assertEqual(chunks[0][-1], irgen.IRReturn())
@@ -4,10 +4,29 @@
 """
 
 import unittest
+from concurrent.futures import ProcessPoolExecutor
 import pyCC.pyCmp.lexer as pycc_lexer
 
 PyCCToken = pycc_lexer.TokenType
 
+# NOTE odd spacing, unknown operator runs, and bad chars must agree across engines too.
+TRICKY_SOURCE = "int a1 = 'z';\n  // note\nif1 x<=<y ==!= @ && || returnx 'ab"
+
+def lex_all(source: str, engine: pycc_lexer.LexerEngine) -> list[pycc_lexer.TokenObj]:
+    tokenizer = pycc_lexer.Lexer(engine=engine)
+    tokenizer.use_source(source)
+    results = []
+
+    while True:
+        temp = tokenizer.lex_next()
+
+        if temp is None:
+            break
+
+        results.append(temp)
+
+    return results
+
 class LexerTester(unittest.TestCase):
     def test_sample_1(self):
         # NOTE ignore spaces though for simplicity.
@@ -117,5 +136,136 @@ class LexerTester(unittest.TestCase):
 
         self.assertTrue(test_ok)
 
+    def test_regex_engine_matches_classic(self):
+        sources = []
+
+        for sample_path in ['./c_samples/test_01.c', './c_samples/test_02.c', './c_samples/test_03.c', './c_samples/test_04.c']:
+            with open(sample_path) as sample:
+                sources.append(sample.read())
+
+        # NOTE odd spacing, unknown operator runs, and bad chars must agree too.
+        sources.append(TRICKY_SOURCE)
+
+        for source in sources:
+            self.assertEqual(lex_all(source, pycc_lexer.LexerEngine.CLASSIC), lex_all(source, pycc_lexer.LexerEngine.REGEX))
+
+    @unittest.skipIf(pycc_lexer.np is None, 'numpy is not installed')
+    def test_vector_engine_matches_classic(self):
+        sources = [TRICKY_SOURCE, "'==//c\nx 'abc' '\n\n' ab"]
+
+        for sample_path in ['./c_samples/test_01.c', './c_samples/test_02.c', './c_samples/test_03.c', './c_samples/test_04.c']:
+            with open(sample_path) as sample:
+                sources.append(sample.read())
+
+        for source in sources:
+            self.assertEqual(lex_all(source, pycc_lexer.LexerEngine.CLASSIC), lex_all(source, pycc_lexer.LexerEngine.VECTOR))
+
+        tokenizer = pycc_lexer.Lexer(engine=pycc_lexer.LexerEngine.VECTOR)
+        tokenizer.use_buffer(sources[-1].encode())
+        buffer_tokens = []
+
+        while (temp := tokenizer.lex_next()) is not None:
+            buffer_tokens.append(temp)
+
+        self.assertEqual(lex_all(sources[-1], pycc_lexer.LexerEngine.CLASSIC), buffer_tokens)
+
+    def test_token_buffer(self):
+        for engine in [pycc_lexer.LexerEngine.CLASSIC, pycc_lexer.LexerEngine.REGEX]:
+            tokenizer = pycc_lexer.Lexer(engine=engine)
+            tokens = pycc_lexer.TokenBuffer()
+            source = "int main() {\n    // skip me\n    char c = 'z';\n    return 42;\n}"
+
+            tokenizer.use_source(source)
+            tokens.reset(source)
+            tokenizer.lex_into(tokens)
+
+            self.assertEqual(len(tokens), 15)
+            self.assertEqual(tokens.get_kind(len(tokens) - 1), None)
+            self.assertEqual(tokens.get_lexeme(1), 'main')
+            self.assertEqual(tokens.get_literal_token(8), (PyCCToken.LITERAL_CHAR, ord('z'), None))
+            self.assertEqual(tokens.get_literal_token(11), (PyCCToken.LITERAL_INT, 42, None))
+            self.assertEqual(tokens.get_literal_token(6), (PyCCToken.IDENTIFIER, 2, 'c'))
+            self.assertEqual(tokenizer.resolve_position(tokens.get_offset(11)), (4, 12))
+            self.assertEqual(tokenizer.resolve_position(0), (1, 1))
+            self.assertEqual(tokenizer.resolve_position(len(source) - 1), (5, 1))
+
+    def test_wide_literals(self):
+        # NOTE literals past int64 don't fit the values column, but must still lex to their exact values.
+        wide_value = 99999999999999999999
+        source = f'int main() {{\n    return {wide_value};\n}}\nint g = 9223372036854775807;\n'
+        engines = [pycc_lexer.LexerEngine.CLASSIC, pycc_lexer.LexerEngine.REGEX]
+
+        if pycc_lexer.np is not None:
+            engines.append(pycc_lexer.LexerEngine.VECTOR)
+
+        for engine in engines:
+            tokenizer = pycc_lexer.Lexer(engine=engine)
+            tokens = pycc_lexer.TokenBuffer()
+
+            tokenizer.use_source(source)
+            tokens.reset(source)
+            tokenizer.lex_into(tokens)
+
+            self.assertEqual(tokens.get_literal_token(6), (PyCCToken.LITERAL_INT, wide_value, None))
+            self.assertEqual(tokens.get_value(12), (1 << 63) - 1)
+
+        sharded = pycc_lexer.lex_sharded(source * 3, 3, min_shard_length=1)
+        self.assertEqual([sharded.get_value(token_i) for token_i in range(len(sharded)) if sharded.get_kind(token_i) == PyCCToken.LITERAL_INT], [wide_value, (1 << 63) - 1] * 3)
+
+        ring = pycc_lexer.TokenRing(4)
+        ring.push(PyCCToken.LITERAL_INT.value, 0, 20, wide_value)
+        ring.push(PyCCToken.LITERAL_INT.value, 21, 1, 7)
+        self.assertEqual((ring.get_value(0), ring.get_value(1)), (wide_value, 7))
+
+    def test_symbol_interning(self):
+        source = "int foo(int a) {\n    int b = a + a;\n    return foo(b);\n}"
+        engines = [pycc_lexer.LexerEngine.CLASSIC, pycc_lexer.LexerEngine.REGEX]
+
+        if pycc_lexer.np is not None:
+            engines.append(pycc_lexer.LexerEngine.VECTOR)
+
+        for engine in engines:
+            symbols = pycc_lexer.SymbolInterner()
+            tokenizer = pycc_lexer.Lexer(engine=engine, symbols=symbols)
+            tokens = pycc_lexer.TokenBuffer()
+
+            tokenizer.use_source(source)
+            tokens.reset(source)
+            tokenizer.lex_into(tokens)
+
+            name_ids = [tokens.get_value(token_i) for token_i in range(len(tokens)) if tokens.get_kind(token_i) == PyCCToken.IDENTIFIER]
+
+            self.assertEqual(name_ids, [1, 2, 3, 2, 2, 1, 3])
+            self.assertEqual(len(symbols), 3)
+            self.assertEqual(symbols.get_name(name_ids[0]), 'foo')
+            self.assertEqual(symbols.intern('b'), 3)
+
+    def test_sharded_lexing(self):
+        # NOTE a ';' or '}' hidden in a char literal, comment, or operator run must never split shards.
+        sources = ["int a() {\n    x = ';';\n    y = '}'; // } ;\n    z =//;\n}\nint b;\nchar c = '{';\nint d() { return 1; }\n"]
+
+        for sample_path in ['./c_samples/test_01.c', './c_samples/test_02.c', './c_samples/test_03.c', './c_samples/test_04.c']:
+            with open(sample_path) as sample:
+                sources.append(sample.read())
+
+        sources.append(''.join(sources))
+        self.assertEqual(pycc_lexer.find_shard_bounds(sources[0], 3), [0, 55, 98, len(sources[0])])
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            for source in sources:
+                sequential_symbols = pycc_lexer.SymbolInterner()
+                tokenizer = pycc_lexer.Lexer(engine=pycc_lexer.LexerEngine.REGEX, symbols=sequential_symbols)
+                expected = pycc_lexer.TokenBuffer()
+
+                tokenizer.use_source(source)
+                expected.reset(source)
+                tokenizer.lex_into(expected)
+
+                sharded_symbols = pycc_lexer.SymbolInterner()
+                tokens = pycc_lexer.lex_sharded(source, 4, symbols=sharded_symbols, executor=pool, min_shard_length=1)
+
+                self.assertEqual((tokens.kinds, tokens.starts, tokens.lengths, tokens.values), (expected.kinds, expected.starts, expected.lengths, expected.values))
+                self.assertEqual(sharded_symbols.names, sequential_symbols.names)
+
 if __name__ == '__main__':
     unittest.main()
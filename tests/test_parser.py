@@ -57,5 +57,117 @@ class ParserTester(unittest.TestCase):
 
             self.assertTrue(ast_ok and len(ast_4) > 0)
 
+    def test_lookahead_ring(self):
+        # NOTE many small functions must parse through a tiny ring without it ever growing.
+        parser = pycc_parser.Parser(lookahead=4)
+        source = 'int f(int a) {\n    a = a + 1;\n    return a;\n}\n' * 500
+
+        parser.use_source(source)
+
+        self.assertEqual(parser.peek(0), pycc_parser.TokenTag.TYPENAME_INT)
+        self.assertEqual(parser.peek(1), pycc_parser.TokenTag.IDENTIFIER)
+        self.assertEqual(parser.peek(2), pycc_parser.TokenTag.PAREN_OPEN)
+        self.assertRaises(ValueError, parser.peek, 4)
+
+        ast_ok, ast_all = parser.parse_all()
+
+        self.assertTrue(ast_ok and len(ast_all) == 500)
+        self.assertEqual(len(parser.tokens.kinds), 4)
+        self.assertEqual(parser.peek(2), None)
+
+    def test_operator_precedence(self):
+        parser = pycc_parser.Parser()
+        parser.use_source('int f() {\n    return a - b - c || d && e == f < g + h * -2;\n}')
+
+        ast_ok, ast_all = parser.parse_all()
+        op_of = lambda node: node.get_op_type()
+        OpType = pycc_parser.ast.OpType
+
+        self.assertTrue(ast_ok)
+
+        result = ast_all[0].get_body().get_stmts()[0].get_result_expr()
+
+        # NOTE (((a - b) - c) || (d && (e == (f < (g + (h * -2)))))
+        self.assertEqual(op_of(result), OpType.OP_LOGIC_OR)
+        self.assertEqual(op_of(result.get_lhs()), OpType.OP_SUB)
+        self.assertEqual(op_of(result.get_lhs().get_lhs()), OpType.OP_SUB)
+        self.assertEqual(result.get_lhs().get_rhs().get_name(), 'c')
+
+        rhs = result.get_rhs()
+
+        self.assertEqual([op_of(rhs), op_of(rhs.get_rhs()), op_of(rhs.get_rhs().get_rhs())], [OpType.OP_LOGIC_AND, OpType.OP_EQUALITY, OpType.OP_LT])
+
+        rhs = rhs.get_rhs().get_rhs().get_rhs()
+
+        self.assertEqual([op_of(rhs), op_of(rhs.get_rhs()), op_of(rhs.get_rhs().get_rhs())], [OpType.OP_ADD, OpType.OP_MULT, OpType.OP_NEG])
+
+    def test_hash_consing(self):
+        source = 'int f(int a, int b, int c) {\n    int x = (a + b) / c;\n    a = (a + b) / c - -c;\n    return a;\n}\n'
+        parser = pycc_parser.Parser(hash_cons=True)
+        parser.use_source(source)
+
+        ast_ok, ast_all = parser.parse_all()
+        stmts = ast_all[0].get_body().get_stmts()
+        first_rhs = stmts[0].get_rhs()
+        second_rhs = stmts[1].get_inner().get_rhs()
+
+        self.assertTrue(ast_ok)
+        self.assertIs(second_rhs.get_lhs(), first_rhs)
+        self.assertIs(second_rhs.get_rhs().get_inner(), first_rhs.get_rhs())
+        self.assertTrue(parser.nodes.get_shared_count() >= 5)
+
+        # NOTE a plain parse must not share any nodes.
+        parser = pycc_parser.Parser()
+        parser.use_source(source)
+        ast_all = parser.parse_all()[1]
+        stmts = ast_all[0].get_body().get_stmts()
+
+        self.assertIsNot(stmts[1].get_inner().get_rhs().get_lhs(), stmts[0].get_rhs())
+        self.assertEqual(parser.nodes.get_shared_count(), 0)
+
+    def test_error_recovery(self):
+        # NOTE each bad statement or declaration is reported, and the good ones around them still parse.
+        source = 'int f(int a) {\n    int b = a + ;\n    if (a +) {\n        return 1;\n    }\n    return a;\n}\nint g(int a,) {\n    return a;\n}\nint h() {\n    return 2 3;\n}\nint k = 4;\n'
+        parser = pycc_parser.Parser()
+        parser.use_source(source)
+
+        ast_ok, ast_all = parser.parse_all()
+        diagnostics = parser.get_diagnostics()
+
+        self.assertFalse(ast_ok)
+        self.assertEqual([decl.get_name() for decl in ast_all], ['f', 'h', 'k'])
+        self.assertEqual(len(ast_all[0].get_body().get_stmts()), 1)
+        self.assertEqual([diagnostic[0] for diagnostic in diagnostics], [(2, 17), (3, 12), (8, 13), (12, 14)])
+        self.assertEqual(diagnostics[3][1], '3')
+
+        parser.use_source(source.replace('+ ;', '+ 1;'))
+        parser.parse_all()
+
+        self.assertEqual(len(parser.get_diagnostics()), 3)
+
+    def test_skim_signatures(self):
+        def signatures(notes, symbols) -> dict:
+            return {symbols.get_name(symbol): (note.in_global, note.role, note.data_type, note.extras) for symbol, note in notes.items()}
+
+        # NOTE braces inside char literals and comments must not end a skipped body.
+        tricky_source = "int f(int a, char b) {\n    char c = '{';\n    // } {\n    if (a) { if (b) { return '}'; } }\n    return a;\n}\nchar g = 'x';\nvoid h() {}\n"
+
+        with open('./c_samples/test_bad_04.c') as src:
+            sources = [src.read(), tricky_source]
+
+        for source in sources:
+            parser = pycc_parser.Parser()
+            checker = pycc_parser.sem.SemanticChecker()
+            parser.use_source(source)
+            checker.check_ast(parser.parse_all()[1])
+            expected = signatures(checker.eject_semantic_info()[pycc_parser.sem.GLOBAL_SCOPE_ID], parser.lexer.symbols)
+
+            for lookahead in [4, 32]:
+                skimmer = pycc_parser.Parser(lookahead=lookahead)
+                skimmer.use_source(source)
+
+                self.assertEqual(signatures(skimmer.skim_all(), skimmer.lexer.symbols), expected)
+                self.assertEqual(skimmer.get_diagnostics(), [])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,224 @@
+"""
+    test_pipeline.py\n
+    Added by DrkWithT\n
+    Tests the streaming compile pipeline against the staged passes.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pyCC.pyCmp.parser as par
+import pyCC.pyCmp.semantics as sem
+import pyCC.pyCmp.ir_gen as irgen
+import pyCC.pyCmp.pyCmp as driver
+import pyCC.pyCmp.ir_text as irtext
+import pyCC.pyCC as cli
+
+def stream_peak_memory(source: str) -> int:
+    tracemalloc.start()
+
+    for _ in driver.compile_stream(source):
+        pass
+
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak
+
+def numbered_source(number: int) -> str:
+    # NOTE names can't hold digits, so the number is spelled in letters... every 10th source has a semantic error.
+    name = 'f' + ''.join(chr(ord('a') + int(digit)) for digit in str(number))
+    rhs = 'a' if number % 10 != 0 else 'c'
+
+    return f'int {name}(int a) {{\n    int b = {rhs} * {number} + {number % 7};\n    if (b > {number} && a != 0) {{\n        b = b - a;\n    }}\n    return b;\n}}\nint main() {{\n    return {name}({number});\n}}\n'
+
+class PipelineTester(unittest.TestCase):
+    def test_stream_matches_staged(self):
+        for sample_path in ['./c_samples/test_03.c', './c_samples/test_04.c', './c_samples/test_bad_04.c']:
+            with open(sample_path) as src:
+                source = src.read()
+
+            parser = par.Parser()
+            checker = sem.SemanticChecker()
+            parser.use_source(source)
+            ok, ast = parser.parse_all()
+            errors = checker.check_ast(ast)
+
+            results = list(driver.compile_stream(source))
+
+            self.assertEqual([result[0] for result in results], [decl.get_name() for decl in ast])
+            self.assertEqual([error for result in results for error in result[2]], errors)
+
+            if ok and len(errors) == 0:
+                staged_ir = irgen.IREmitter(checker.eject_semantic_info()).gen_ir_from_ast(ast)
+                self.assertEqual([step for result in results for step in result[3]], staged_ir)
+
+    def test_stream_syntax_errors(self):
+        # NOTE syntax errors of declarations that never parse must not be dropped or blamed on the next good one.
+        bad_decl = 'int f(int a,) {\n    return a;\n}\n'
+        good_decl = 'int g() {\n    return 1;\n}\n'
+
+        for source, names in [(bad_decl, ['']), (bad_decl + bad_decl, ['']), (good_decl + bad_decl, ['g', '']), (bad_decl + good_decl, ['', 'g'])]:
+            results = list(driver.compile_stream(source))
+
+            self.assertEqual([result[0] for result in results], names)
+            self.assertEqual([error for result in results for error in result[1]], driver.compile_whole(source)[0])
+            self.assertTrue(all(len(result[1]) == 0 for result in results if result[0] == 'g'))
+
+            if names[0] == '':
+                self.assertEqual(results[-1][3], [])
+
+    def test_stream_memory_is_flat(self):
+        # NOTE 16x the declarations must not take much more peak memory.
+        source = 'int f(int a) {\n    int b = a * 2 + 1;\n    if (b > a) {\n        b = b - (a + b) * 3;\n    }\n    return b;\n}\n'
+
+        stream_peak_memory(source)
+        small_peak = stream_peak_memory(source * 100)
+        large_peak = stream_peak_memory(source * 1600)
+
+        self.assertLess(large_peak, small_peak * 2)
+
+    def test_parallel_matches_staged(self):
+        # NOTE globals come first here, since the staged passes can't see globals declared after a function.
+        sources = ["char c = 'z';\nint n = 3 && 4;\n" + ''.join(f'int f{name}(int a) {{\n    if (a < n || a == 2) {{\n        a = a + 1;\n    }}\n    return a;\n}}\n' for name in 'abcdefgh')]
+
+        for sample_path in ['./c_samples/test_03.c', './c_samples/test_04.c', './c_samples/test_04a.c', './c_samples/test_bad_01.c', './c_samples/test_bad_02.c']:
+            with open(sample_path) as src:
+                sources.append(src.read())
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            for source in sources:
+                parser = par.Parser()
+                checker = sem.SemanticChecker()
+                parser.use_source(source)
+                ok, ast = parser.parse_all()
+                errors = checker.check_ast(ast)
+                staged_ir = irgen.IREmitter(checker.eject_semantic_info()).gen_ir_from_ast(ast) if ok and len(errors) == 0 else []
+
+                parse_errors, sem_errors, semantic_info, steps = driver.compile_parallel(source, pool, 3)
+
+                self.assertEqual(parse_errors, parser.get_diagnostics())
+                self.assertEqual(sem_errors, errors)
+                self.assertEqual(steps, staged_ir)
+                self.assertEqual(len(semantic_info), len(checker.eject_semantic_info()))
+
+    def test_parallel_forward_calls(self):
+        source = 'int main() {\n    return twice(2);\n}\nint twice(int a) {\n    int b = a + a;\n    return b;\n}\n'
+        parse_errors, sem_errors, semantic_info, steps = driver.compile_parallel(source)
+
+        self.assertEqual((parse_errors, sem_errors), ([], []))
+        self.assertEqual(sorted(len(scope) for scope in semantic_info.values()), [0, 2, 2])
+        self.assertEqual([step.title for step in steps if step.get_ir_type() == irgen.ir_types.IRType.LABEL], ['main', 0, 'twice', 1])
+
+    def test_threaded_matches_serial(self):
+        sources = [numbered_source(number) for number in range(300)]
+
+        for sample_path in ['./c_samples/test_03.c', './c_samples/test_04.c', './c_samples/test_bad_02.c']:
+            with open(sample_path) as src:
+                sources.append(src.read())
+
+        serial_results = [driver.compile_whole(source) for source in sources]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            threaded_results = driver.compile_threaded(sources, pool)
+
+        for serial, threaded in zip(serial_results, threaded_results):
+            self.assertEqual((threaded[0], threaded[1], threaded[3]), (serial[0], serial[1], serial[3]))
+
+        # NOTE reused objects must give the same results as fresh ones.
+        parser = par.Parser()
+        checker = sem.SemanticChecker()
+        emitter = irgen.IREmitter({})
+
+        for source, serial in zip(sources[:20], serial_results):
+            reused = driver.compile_whole(source, parser, checker, emitter)
+            self.assertEqual((reused[0], reused[1], reused[3]), (serial[0], serial[1], serial[3]))
+
+    def test_compiler_session(self):
+        sources = [numbered_source(number) for number in range(50)] + ['int x = 1;\n', 'int y(int x) {\n    return x;\n}\n']
+        session = driver.CompilerSession()
+        results = session.compile_batch(sources)
+
+        for source, result in zip(sources, results):
+            fresh = driver.compile_whole(source)
+            self.assertEqual((result[0], result[1], result[3]), (fresh[0], fresh[1], fresh[3]))
+            self.assertEqual({key: sorted(scope) for key, scope in result[2].items()}, {key: sorted(scope) for key, scope in fresh[2].items()})
+
+        # NOTE names of earlier sources must not pile up in the session's interner.
+        self.assertEqual(len(session.parser.lexer.symbols), 2)
+        self.assertEqual(session.get_file_count(), len(sources))
+        self.assertGreater(session.get_throughput(), 0.0)
+
+    def test_async_compile(self):
+        with open('./c_samples/test_04.c') as src:
+            source = src.read()
+
+        sources = [numbered_source(number) for number in range(40)] + [source]
+
+        async def tick(gaps: list[float], done: asyncio.Event):
+            last_time = time.perf_counter()
+
+            while not done.is_set():
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                gaps.append(now - last_time)
+                last_time = now
+
+        async def run_all():
+            events = [event async for event in driver.compile_source(source, with_tokens=True)]
+            stream_results = list(driver.compile_stream(source))
+
+            self.assertEqual(events[0][0], driver.CompilePhase.TOKENS)
+            self.assertEqual(len(events[0][2]), len(driver.lex_source(source)))
+            self.assertEqual([(event[1], event[2]) for event in events[1:]], [(result[0], result[3]) for result in stream_results])
+
+            bad_events = [event async for event in driver.compile_source(numbered_source(10))]
+            self.assertEqual([(event[0], event[1]) for event in bad_events], [(driver.CompilePhase.DIAGNOSTICS, 'fba')])
+
+            syntax_events = [event async for event in driver.compile_source('int f(int a,) { return a; }')]
+            self.assertEqual(syntax_events, [(driver.CompilePhase.DIAGNOSTICS, '', ([((1, 13), ')', 'Unexpected token!')], []))])
+
+            # NOTE the loop must keep ticking while a batch compiles.
+            gaps = []
+            done = asyncio.Event()
+            ticker = asyncio.ensure_future(tick(gaps, done))
+            results = [result async for result in driver.compile_many(sources * 5, max_in_flight=4)]
+            done.set()
+            await ticker
+
+            self.assertEqual(sorted(result[0] for result in results), list(range(len(sources) * 5)))
+
+            for source_i, result in results:
+                serial = driver.compile_whole(sources[source_i % len(sources)])
+                self.assertEqual((result[1], result[3]), (serial[1], serial[3]))
+
+            self.assertLess(max(gaps), 0.5)
+
+        asyncio.run(run_all())
+
+    def test_ir_switches(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ir_path = os.path.join(temp_dir, 'test_04.ir')
+            copy_path = os.path.join(temp_dir, 'copy.ir')
+
+            self.assertEqual(cli.main(['-emit-ir', '-o', ir_path, './c_samples/test_04.c']), 0)
+            self.assertEqual(cli.main(['-from-ir', '-emit-ir', '-o', copy_path, ir_path]), 0)
+
+            with open('./c_samples/test_04.c') as src:
+                expected = driver.compile_whole(src.read())[3]
+
+            with open(ir_path) as ir_file, open(copy_path) as copy_file:
+                ir_text = ir_file.read()
+                self.assertEqual(copy_file.read(), ir_text)
+
+            self.assertEqual(list(irtext.read_ir(ir_text.splitlines())), expected)
+
+            self.assertEqual(cli.main(['-emit-ir', '-o', copy_path, './c_samples/test_bad_03.c']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -175,5 +175,48 @@ class SemAnalyzerTester(unittest.TestCase):
 
             self.assertTrue(len(errors) > 0)
 
+    def test_cached_types(self):
+        # NOTE a long chain in a call arg used to take exponential time to type.
+        parser = par.Parser()
+        checker = sema.SemanticChecker()
+        parser.use_source('int g(int a) {\n    return a;\n}\nint f(int a) {\n    return g(1' + ' + 2' * 5000 + ');\n}\n')
+
+        ok, ast = parser.parse_all()
+
+        self.assertTrue(ok)
+        self.assertEqual(len(checker.check_ast(ast)), 0)
+
+        call = ast[1].get_body().get_stmts()[0].get_result_expr()
+        chain = call.get_args()[0]
+
+        self.assertEqual(call.get_resolved_type(), sema.nodes.DataType.INT)
+        self.assertEqual(chain.early_type, sema.nodes.DataType.INT)
+        self.assertEqual(chain.get_lhs().early_type, sema.nodes.DataType.INT)
+
+    def test_resolver_bindings(self):
+        for hash_cons in [False, True]:
+            parser = par.Parser(hash_cons=hash_cons)
+            checker = sema.SemanticChecker()
+            parser.use_source('int k = 3;\nint f(int a, int b) {\n    int c = a + k;\n    return c;\n}\nint g(int b) {\n    return a;\n}\n')
+
+            ok, ast = parser.parse_all()
+
+            self.assertTrue(ok)
+
+            errors = checker.check_ast(ast)
+            f_stmts = ast[1].get_body().get_stmts()
+            c_sum = f_stmts[0].get_rhs()
+
+            # NOTE locals see globals, and each name is bound to a (depth, slot) of its declaration.
+            self.assertEqual(f_stmts[0].get_binding()[:2], (1, 2))
+            self.assertEqual(c_sum.get_lhs().get_binding()[:2], (1, 0))
+            self.assertIs(c_sum.get_rhs().get_binding(), ast[0].get_binding())
+            self.assertEqual(ast[0].get_binding()[:2], (sema.GLOBAL_SCOPE_ID, 0))
+            self.assertIs(f_stmts[1].get_result_expr().get_binding(), f_stmts[0].get_binding())
+
+            # NOTE f's param a is out of scope in g.
+            self.assertIs(ast[2].get_body().get_stmts()[0].get_result_expr().get_binding(), sema.UNRESOLVED)
+            self.assertEqual([error[1] for error in errors], ['g', 'g'])
+
 if __name__ == '__main__':
     unittest.main()